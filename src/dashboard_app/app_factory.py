@@ -1,25 +1,120 @@
+import os
+import threading
+import time
 import dash
 import dash_bootstrap_components as dbc
+import startup_snapshot
+# La capa de datos (pandas) se importa antes de servir aunque los datos se carguen en segundo
+# plano: el serializador JSON de plotly consulta sys.modules['pandas'] y fallaría con un import
+# a medias en otro hilo
 from database.data_manager import DataManager
+from database.columnar_store import POINTER_FILE
+from database.snapshot import DataSnapshot
+from database.refresher import DataRefresher
 from layout.layout import get_layout
-from config import TIPOS_DEPORTE
+from config import (
+    TIPOS_DEPORTE, REFRESH_INTERVAL, CACHE_DIR, ATTACH_TIMEOUT, STARTUP_SNAPSHOT, LOAD_RETRY_INTERVAL,
+    COMPRESS_RESPONSES, COMPRESS_ALGORITHMS, QUERY_BACKEND
+)
 from callbacks.kpi_callbacks import init_callbacks
 
-def create_app():
-    # Inicializar datos
-    initial_data = DataManager.initialize_data()
-    
+
+def _cargar_datos(worker):
+    """Carga los datos completos: un worker se engancha al caché que publica loader.py"""
+    if worker:
+        return DataManager.attach_cache(timeout=ATTACH_TIMEOUT)
+    return DataManager.initialize_data()
+
+
+def _crear_refresco(snapshot, worker):
+    """Recarga en segundo plano cuando cambia el Excel (o, en un worker, la versión publicada del caché)"""
+    if worker:
+        return DataRefresher(
+            snapshot, REFRESH_INTERVAL,
+            watch_file=os.path.join(CACHE_DIR, POINTER_FILE),
+            load=lambda: _cargar_datos(worker)
+        )
+    return DataRefresher(snapshot, REFRESH_INTERVAL)
+
+
+def _configurar_compresion(server):
+    """Comprime las respuestas con Flask-Compress (dash[compress]) si está instalado"""
+    try:
+        from flask_compress import Compress
+    except ImportError:
+        print("Compresión de respuestas desactivada: falta flask-compress")
+        return
+    server.config["COMPRESS_ALGORITHM"] = COMPRESS_ALGORITHMS
+    Compress(server)
+
+
+def _guardar_instantanea(datos):
+    try:
+        startup_snapshot.guardar(datos)
+    except OSError as e:
+        print(f"No se pudo guardar la instantánea de arranque: {str(e)}")
+
+
+def create_app(worker=False):
+    inicio = time.perf_counter()
+    if worker and QUERY_BACKEND == "pandas":
+        # Los workers no cargan las filas crudas (ATTACH_SKIP_FRAMES), que este backend necesita
+        raise ValueError(
+            'QUERY_BACKEND = "pandas" no está disponible en los workers de wsgi.py: '
+            'usa "cubo" o "sqlite", o main.py en un solo proceso'
+        )
+
+    # Con una instantánea de arranque la página se sirve ya y los datos se cargan en segundo plano
+    instantanea = startup_snapshot.cargar() if STARTUP_SNAPSHOT else None
+    if instantanea is not None:
+        snapshot = DataSnapshot(instantanea['datos'], provisional=True)
+    else:
+        snapshot = DataSnapshot(_cargar_datos(worker))
+
     # Crear aplicación Dash
     app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-    
-    # Configurar layout
-    app.layout = get_layout(
-        departamentos=initial_data['ubicacion']['departamentos'],
-        municipios=initial_data['ubicacion']['municipios'],
-        TIPOS_DEPORTE=TIPOS_DEPORTE
-    )
-    
-    # Inicializar callbacks
-    init_callbacks(app, initial_data)
-    
-    return app, initial_data 
\ No newline at end of file
+    if COMPRESS_RESPONSES:
+        _configurar_compresion(app.server)
+
+    # Inicializar callbacks (vacía las cachés, así que la instantánea se aplica después)
+    init_callbacks(app, snapshot)
+    if instantanea is not None:
+        startup_snapshot.aplicar(instantanea)
+    if STARTUP_SNAPSHOT:
+        snapshot.subscribe(_guardar_instantanea)
+
+    # Configurar layout: se genera en cada carga de página para que los desplegables
+    # muestren los departamentos de la versión vigente
+    def layout():
+        data = snapshot.get()
+        return get_layout(
+            departamentos=data['ubicacion']['departamentos'],
+            TIPOS_DEPORTE=TIPOS_DEPORTE
+        )
+    app.layout = layout
+
+    def completar():
+        # Si la carga falla, los callbacks que necesitan los datos completos fallan con el error
+        # en lugar de esperar CALLBACK_WAIT_TIMEOUT, y se reintenta hasta que se publiquen
+        while instantanea is not None:
+            try:
+                datos = _cargar_datos(worker)
+            except Exception as e:
+                print(f"Error al cargar los datos: {str(e)}; se reintenta en {LOAD_RETRY_INTERVAL} s")
+                snapshot.fail(e)
+                time.sleep(LOAD_RETRY_INTERVAL)
+                continue
+            snapshot.publish(datos)
+            print(f"Datos completos en {time.perf_counter() - inicio:.2f} s")
+            break
+        if REFRESH_INTERVAL:
+            _crear_refresco(snapshot, worker).run()
+
+    # Sin instantánea se guarda ahora, con las figuras del layout ya construidas, para el próximo arranque
+    if instantanea is None and STARTUP_SNAPSHOT:
+        _guardar_instantanea(snapshot.get())
+    threading.Thread(target=completar, name="data-loader", daemon=True).start()
+
+    origen = "instantánea de arranque" if instantanea is not None else "datos completos"
+    print(f"Aplicación lista en {time.perf_counter() - inicio:.2f} s ({origen}, versión {snapshot.get()['version']})")
+    return app, snapshot.get()
@@ -0,0 +1,69 @@
+/* Leyenda de tipos de deporte del gráfico "Inscritos por deporte".
+   Se ejecuta en el navegador: el servidor envía las series por tipo una vez por filtro
+   (deportes-series-store) y aquí se eligen los tipos sin volver a consultarlo. */
+
+// Mismo orden que TIPOS_DEPORTE en config.py
+const TIPOS_DEPORTE = ["conjunto", "individual", "para deporte"];
+
+const LEYENDA_TIPOS = {
+    "conjunto-legend": "conjunto",
+    "individual-legend": "individual",
+    "paradeporte-legend": "para deporte"
+};
+
+function titulo(texto) {
+    // Equivalente a str.title() de Python para los nombres de tipo
+    return texto.toLowerCase().replace(/(^|[^a-záéíóúñü])([a-záéíóúñü])/g, (_, antes, letra) => antes + letra.toUpperCase());
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    tipo_deporte: {
+        // Activa o desactiva el tipo de la leyenda pulsada
+        toggle: function (conjuntoClicks, individualClicks, paradeporteClicks, seleccionados) {
+            if (!seleccionados || seleccionados.length === 0) {
+                return TIPOS_DEPORTE;
+            }
+            const triggered = window.dash_clientside.callback_context.triggered;
+            if (!triggered || triggered.length === 0) {
+                return seleccionados;
+            }
+            const tipo = LEYENDA_TIPOS[triggered[0].prop_id.split(".")[0]];
+            if (tipo === undefined) {
+                return seleccionados;
+            }
+            if (seleccionados.includes(tipo)) {
+                return seleccionados.filter(valor => valor !== tipo);
+            }
+            // Orden fijo, igual que la selección inicial
+            return TIPOS_DEPORTE.filter(valor => seleccionados.includes(valor) || valor === tipo);
+        },
+
+        // Opacidad de cada entrada de la leyenda según la selección
+        estilos: function (seleccionados) {
+            return TIPOS_DEPORTE.map(tipo => ({"opacity": seleccionados.includes(tipo) ? 1.0 : 0.5}));
+        },
+
+        // Barras de los tipos seleccionados sobre los deportes con inscritos en alguno de ellos
+        figura: function (series, seleccionados, figuraActual) {
+            if (!series) {
+                return window.dash_clientside.no_update;
+            }
+            const tipos = seleccionados || [];
+            const indices = [];
+            series.deportes.forEach((_, i) => {
+                if (tipos.some(tipo => (series.series[tipo] || [])[i] > 0)) {
+                    indices.push(i);
+                }
+            });
+            const deportes = indices.map(i => series.deportes[i]);
+            const data = tipos.map(tipo => ({
+                "marker": {"color": series.colores[tipo] || "#888888"},
+                "name": titulo(tipo),
+                "x": deportes,
+                "y": indices.map(i => (series.series[tipo] || [])[i] || 0),
+                "type": "bar"
+            }));
+            return Object.assign({}, figuraActual, {"data": data});
+        }
+    }
+});
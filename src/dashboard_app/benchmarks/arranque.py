@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Tiempo hasta la primera petición: cada medición arranca un proceso nuevo que crea la app,
+# pide la página (/, layout y dependencias) y el callback inicial de la página General.
+# Se mide desde fuera, así que incluye el arranque del intérprete y los imports.
+
+# "Excel modificado" reemplaza el Excel por otro antes de cada arranque, así que el caché se
+# reconstruye; la instantánea de la versión anterior sigue sirviendo la página mientras tanto
+ESCENARIOS = {
+    "sin caché": {"borrar": ["cache"], "instantanea": True},
+    "caché sin instantánea": {"borrar": ["instantanea"], "instantanea": False},
+    "caché con instantánea": {"borrar": [], "instantanea": True},
+    "Excel modificado sin instantánea": {"borrar": ["instantanea"], "instantanea": False, "cambiar_excel": True},
+    "Excel modificado con instantánea": {"borrar": [], "instantanea": True, "cambiar_excel": True},
+}
+
+
+def proceso_hijo(directorio, data_file, instantanea):
+    """Arranca la app con el caché en `directorio` y responde la primera carga de la página"""
+    import config
+    config.DATA_FILE = data_file
+    config.CACHE_DIR = os.path.join(directorio, "cache")
+    config.STARTUP_SNAPSHOT_FILE = os.path.join(config.CACHE_DIR, "startup.json")
+    config.STARTUP_SNAPSHOT = instantanea
+    config.REFRESH_INTERVAL = 0
+
+    import contextlib
+    import io
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app_factory import create_app
+        inicio = time.perf_counter()
+        app, _ = create_app()
+        creada = time.perf_counter()
+        cliente = app.server.test_client()
+        for ruta in ("/", "/_dash-layout", "/_dash-dependencies"):
+            cliente.get(ruta)
+        salida = next(clave for clave in app.callback_map if "total-estudiantes-value" in clave)
+        peticion = {
+            "output": salida,
+            "outputs": [dict(zip(("id", "property"), o.rsplit(".", 1))) for o in salida.strip(".").split("...")],
+            "inputs": [{"id": i["id"], "property": i["property"], "value": None} for i in app.callback_map[salida]["inputs"]],
+            "changedPropIds": []
+        }
+        respuesta = cliente.post("/_dash-update-component", json=peticion)
+        # En segundo plano la respuesta es el trabajo lanzado: se consulta como el navegador
+        # (sin esperar el intervalo) hasta tener el resultado
+        trabajo = respuesta.get_json()
+        while "cacheKey" in trabajo:
+            respuesta = cliente.post(
+                f"/_dash-update-component?cacheKey={trabajo['cacheKey']}&job={trabajo['job']}", json=peticion
+            )
+            if "response" in respuesta.get_json():
+                break
+            time.sleep(0.005)
+        respondida = time.perf_counter()
+        respondida_epoch = time.time()
+        from callbacks import kpi_callbacks
+        kpi_callbacks.snapshot.wait()
+        completa = time.perf_counter()
+        if instantanea:
+            # La instantánea de la versión nueva se guarda en otro hilo: se asegura antes de salir
+            import startup_snapshot
+            startup_snapshot.guardar(kpi_callbacks.snapshot.get())
+    # El resultado va a un archivo: el hilo que carga los datos puede seguir escribiendo en stdout
+    with open(os.path.join(directorio, "medida.json"), 'w', encoding='utf-8') as f:
+        json.dump({
+            "estado": respuesta.status_code,
+            "create_app_s": creada - inicio,
+            "primera_peticion_s": respondida - inicio,
+            "datos_completos_s": completa - inicio,
+            "respondida_epoch": respondida_epoch,
+        }, f)
+
+
+def medir_arranque(directorio, data_file, escenario, repeticiones, alternativos=()):
+    """Mediana de `repeticiones` arranques; con "cambiar_excel" cada arranque copia sobre
+    `data_file` el siguiente de los Excel `alternativos`"""
+    resultados = []
+    for repeticion in range(repeticiones):
+        if escenario.get("cambiar_excel"):
+            shutil.copyfile(alternativos[repeticion % len(alternativos)], data_file)
+        cache_dir = os.path.join(directorio, "cache")
+        if "cache" in escenario["borrar"]:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        if "instantanea" in escenario["borrar"] and os.path.exists(os.path.join(cache_dir, "startup.json")):
+            os.remove(os.path.join(cache_dir, "startup.json"))
+        lanzado = time.time()
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.arranque", "--hijo", directorio, data_file,
+             "1" if escenario["instantanea"] else "0"],
+            capture_output=True, text=True, check=True
+        )
+        with open(os.path.join(directorio, "medida.json"), 'r', encoding='utf-8') as f:
+            medida = json.load(f)
+        assert medida["estado"] == 200, medida
+        # Desde que se lanza el proceso (intérprete e imports incluidos) hasta la primera respuesta
+        medida["hasta_primera_peticion_s"] = medida["respondida_epoch"] - lanzado
+        resultados.append(medida)
+    return {
+        clave: statistics.median(medida[clave] for medida in resultados)
+        for clave in ("hasta_primera_peticion_s", "create_app_s", "datos_completos_s")
+    }
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--hijo":
+        proceso_hijo(sys.argv[2], sys.argv[3], sys.argv[4] == "1")
+        return
+
+    parser = argparse.ArgumentParser(description="Mide el tiempo hasta la primera petición de la app")
+    parser.add_argument("--rows", type=int, default=10_000, help="filas del Excel sintético")
+    parser.add_argument("--repeat", type=int, default=5, help="arranques por escenario (se informa la mediana)")
+    args = parser.parse_args()
+
+    from benchmarks.generador import generar_inscripciones
+    with tempfile.TemporaryDirectory(prefix="bench_arranque_") as directorio:
+        data_file = os.path.join(directorio, "inscripciones.xlsx")
+        alternativos = [os.path.join(directorio, f"inscripciones_{semilla}.xlsx") for semilla in (0, 1)]
+        for semilla, archivo in enumerate(alternativos):
+            generar_inscripciones(args.rows, semilla).to_excel(archivo, index=False)
+        shutil.copyfile(alternativos[0], data_file)
+        for nombre, escenario in ESCENARIOS.items():
+            # Un arranque sin medir deja el caché y la instantánea como los encuentra el escenario
+            # (con el Excel que no se copia primero, para que la primera medición vea un cambio)
+            shutil.copyfile(alternativos[1], data_file)
+            medir_arranque(directorio, data_file, {"borrar": [], "instantanea": True}, 1)
+            medida = medir_arranque(directorio, data_file, escenario, args.repeat, alternativos)
+            print(
+                f"{nombre:34} primera petición {medida['hasta_primera_peticion_s']:6.2f} s   "
+                f"create_app {medida['create_app_s']:6.2f} s   datos completos {medida['datos_completos_s']:6.2f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generador import generar_inscripciones
+from database.columnar_store import save_frame, load_frame
+from database.queries import QueriesInscripciones as Queries
+from transformers.frames import concatenar
+from transformers.kpi_metrics import MetricasInscritos
+from transformers.motores import MOTORES, obtener_motor
+
+# Comprobación común de los motores de DataFrame: cada operación de QueriesInscripciones y
+# MetricasInscritos tiene que devolver con cada motor exactamente lo mismo que con pandas
+# (valores, orden, índices y tipos), sobre varias formas del DataFrame de la ingesta.
+
+OPERACIONES = {
+    "Queries.get_metricas": lambda data, motor: Queries.get_metricas(data, motor=motor),
+    "Queries.get_zona_counts": lambda data, motor: Queries.get_zona_counts(data, motor=motor),
+    "Queries.get_tipo_counts": lambda data, motor: Queries.get_tipo_counts(data, motor=motor),
+    "Queries.get_departamentos": lambda data, motor: Queries.get_departamentos(data, motor=motor),
+    "Queries.get_municipios": lambda data, motor: Queries.get_municipios(data, motor=motor),
+    "Queries.get_rural_urbano_counts": lambda data, motor: Queries.get_rural_urbano_counts(
+        data, Queries.get_departamentos(data, motor="pandas"), motor=motor
+    ),
+    "Queries.get_trend_data": lambda data, motor: Queries.get_trend_data(data, motor=motor),
+    "Queries.get_deportes_data": lambda data, motor: Queries.get_deportes_data(data, motor=motor),
+    **{
+        f"MetricasInscritos.{familia}": (
+            lambda data, motor, calcular=calcular: calcular(MetricasInscritos(data, obtener_motor(motor)))
+        )
+        for familia, calcular in MetricasInscritos.FAMILIAS.items()
+    },
+}
+
+
+def comparar(obtenido, esperado, ruta="resultado"):
+    """Lanza AssertionError si los resultados difieren en valores, orden o tipos"""
+    if isinstance(esperado, pd.DataFrame):
+        pd.testing.assert_frame_equal(obtenido, esperado, obj=ruta)
+    elif isinstance(esperado, pd.Series):
+        pd.testing.assert_series_equal(obtenido, esperado, obj=ruta)
+    elif isinstance(esperado, (list, tuple)):
+        assert type(obtenido) is type(esperado) and len(obtenido) == len(esperado), ruta
+        for i, (a, b) in enumerate(zip(obtenido, esperado)):
+            comparar(a, b, f"{ruta}[{i}]")
+    else:
+        assert obtenido == esperado, f"{ruta}: {obtenido!r} != {esperado!r}"
+
+
+def comprobar(data, motor):
+    """Compara todas las OPERACIONES de `motor` con las de pandas sobre `data`"""
+    for nombre, operacion in OPERACIONES.items():
+        comparar(operacion(data, motor), operacion(data, "pandas"), f"{motor}: {nombre}")
+
+
+def variantes(filas, directorio):
+    """Formas del DataFrame que llegan a las consultas: recién normalizado, mapeado desde el
+    caché columnar, concatenado por la ingesta incremental, con nulos y vacío"""
+    crudo = generar_inscripciones(filas)
+    data = Queries.normalizar_dimensiones(crudo.copy())
+    yield "normalizado", data
+
+    save_frame(data, os.path.join(directorio, "data"))
+    yield "caché columnar", load_frame(os.path.join(directorio, "data"))
+
+    mitad = filas // 2
+    yield "incremental", concatenar(
+        Queries.normalizar_dimensiones(crudo.iloc[:mitad].copy()),
+        Queries.normalizar_dimensiones(crudo.iloc[mitad:].reset_index(drop=True).copy())
+    )
+
+    rng = np.random.default_rng(1)
+    nulos = crudo.copy()
+    for columna in ["Departamento Deportista", "Municipio Deportista", "Zona", "Género", "Deporte",
+                    "tipo deporte", "Nombre Institución", "Fecha de Registro"]:
+        nulos.loc[rng.random(filas) < 0.05, columna] = np.nan
+    yield "con nulos", Queries.normalizar_dimensiones(nulos)
+
+    yield "vacío", data.iloc[:0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprueba que los motores de DataFrame devuelven lo mismo que pandas")
+    parser.add_argument("--rows", type=int, default=20_000, help="filas del conjunto sintético")
+    parser.add_argument("--engines", nargs="+", default=[m for m in MOTORES if m != "pandas"], help="motores a comprobar")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="equivalencia_motores_") as directorio:
+        for variante, data in variantes(args.rows, directorio):
+            for motor in args.engines:
+                if obtener_motor(motor).nombre != motor:
+                    raise SystemExit(f"El motor {motor} no está disponible")
+                comprobar(data, motor)
+                print(f"{variante:16} {motor:8} {len(OPERACIONES)} operaciones iguales a pandas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+# Departamentos de Colombia con su código DANE
+DEPARTAMENTOS = {
+    "ANTIOQUIA": 5, "ATLÁNTICO": 8, "BOGOTÁ D.C.": 11, "BOLÍVAR": 13, "BOYACÁ": 15, "CALDAS": 17,
+    "CAQUETÁ": 18, "CAUCA": 19, "CESAR": 20, "CÓRDOBA": 23, "CUNDINAMARCA": 25, "CHOCÓ": 27,
+    "HUILA": 41, "LA GUAJIRA": 44, "MAGDALENA": 47, "META": 50, "NARIÑO": 52, "NORTE DE SANTANDER": 54,
+    "QUINDÍO": 63, "RISARALDA": 66, "SANTANDER": 68, "SUCRE": 70, "TOLIMA": 73, "VALLE DEL CAUCA": 76,
+    "ARAUCA": 81, "CASANARE": 85, "PUTUMAYO": 86,
+    "ARCHIPIÉLAGO DE SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA": 88, "AMAZONAS": 91, "GUAINÍA": 94,
+    "GUAVIARE": 95, "VAUPÉS": 97, "VICHADA": 99
+}
+
+# Número aproximado de municipios por departamento (1.122 en total)
+MUNICIPIOS_POR_DEPARTAMENTO = {
+    "ANTIOQUIA": 125, "ATLÁNTICO": 23, "BOGOTÁ D.C.": 1, "BOLÍVAR": 46, "BOYACÁ": 123, "CALDAS": 27,
+    "CAQUETÁ": 16, "CAUCA": 42, "CESAR": 25, "CÓRDOBA": 30, "CUNDINAMARCA": 116, "CHOCÓ": 31,
+    "HUILA": 37, "LA GUAJIRA": 15, "MAGDALENA": 30, "META": 29, "NARIÑO": 64, "NORTE DE SANTANDER": 40,
+    "QUINDÍO": 12, "RISARALDA": 14, "SANTANDER": 87, "SUCRE": 26, "TOLIMA": 47, "VALLE DEL CAUCA": 42,
+    "ARAUCA": 7, "CASANARE": 19, "PUTUMAYO": 13,
+    "ARCHIPIÉLAGO DE SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA": 2, "AMAZONAS": 11, "GUAINÍA": 9,
+    "GUAVIARE": 4, "VAUPÉS": 6, "VICHADA": 4
+}
+
+DEPORTES = [
+    "Futbol Salón", "Voleibol", "Baloncesto", "Futbol", "Futsal", "Atletismo", "Balonmano",
+    "Ajedrez Integrado", "Patinaje", "Natación", "Ciclismo Ruta", "Baloncesto 3x3", "Tenis Mesa",
+    "Taekwondo", "Tenis Campo", "MiniBaloncesto", "Porrismo", "Actividades SubAcuáticas",
+    "Levantamiento de pesas", "Judo", "Boxeo", "MiniFutsal", "Softball", "Esgrima", "Karate Do",
+    "Badminton", "Lucha", "Gimnasia", "Tiro con Arco", "Ciclismo Pista", "Voleibol Playa",
+    "Béisbol", "Rugby", "Squash", "Triatlón", "Canotaje", "Remo", "Escalada", "Golf", "Hockey"
+]
+
+TIPOS_DEPORTE = ["conjunto", "individual", "para deporte"]
+CATEGORIAS = ["Juvenil", "Pre Juvenil", "Infantil"]
+DOCUMENTOS = ["Tarjeta de identidad", "Permiso por protección temporal", "Permiso especial de permanencia", "Registro Civil"]
+NOMBRES = ["MARIA", "JUAN", "ANDREA", "CARLOS", "LAURA", "DAVID", "VALENTINA", "SANTIAGO", "DANIELA", "SEBASTIAN"]
+APELLIDOS = ["GARCIA", "RODRIGUEZ", "MARTINEZ", "LOPEZ", "GONZALEZ", "HERRERA", "PEREZ", "SANCHEZ", "RAMIREZ", "TORRES"]
+COLUMNAS = [
+    "Código Dane", "Nombre Institución", "Código Departamento Institución", "Departamento Institución",
+    "Código Municipio Institución", "Municipio Institución", "Tipo de Documento", "Número de Documento",
+    "Nombre Completo", "Género", "Correo Electrónico", "Código Departamento Deportista",
+    "Departamento Deportista", "Código Municipio Deportista", "Municipio Deportista", "Deporte",
+    "Clasificación Funcional", "Prueba Deportiva", "Categoría Deportiva", "Equipo Deportivo",
+    "Fecha de Registro", "Zona", "tipo deporte"
+]
+
+
+def _zipf(rng, n_valores, filas, exponente=1.1):
+    """Índices con distribución de Zipf: pocos valores concentran la mayoría de las filas"""
+    pesos = 1.0 / np.arange(1, n_valores + 1) ** exponente
+    return rng.choice(n_valores, size=filas, p=pesos / pesos.sum())
+
+
+def generar_inscripciones(filas: int, semilla: int = 0) -> pd.DataFrame:
+    """Genera un DataFrame con las columnas y tipos de inscripciones.xlsx tal como los
+    devuelve pd.read_excel, con cardinalidades realistas: 33 departamentos, ~1.100 municipios,
+    40 deportes y hasta 40.000 instituciones (una por cada ~25 inscritos)"""
+    rng = np.random.default_rng(semilla)
+
+    # Municipios: código DANE de 5 dígitos y el primero de cada departamento es la capital
+    municipios = [
+        (departamento, f"{departamento} MUNICIPIO {k + 1}", codigo * 1000 + 1 + k * 3)
+        for departamento, codigo in DEPARTAMENTOS.items()
+        for k in range(MUNICIPIOS_POR_DEPARTAMENTO[departamento])
+    ]
+    # Las capitales concentran más inscritos que los municipios pequeños
+    orden = sorted(range(len(municipios)), key=lambda i: (municipios[i][1].rsplit(" ", 1)[1] != "1", i))
+    mun_idx = np.array(orden)[_zipf(rng, len(municipios), filas, 0.9)]
+    mun_dep = np.array([DEPARTAMENTOS[m[0]] for m in municipios])
+    mun_nombre = np.array([m[1] for m in municipios], dtype=object)
+    mun_codigo = np.array([m[2] for m in municipios])
+    dep_nombre = np.array([m[0] for m in municipios], dtype=object)
+
+    # Instituciones: cada una pertenece a un municipio
+    n_instituciones = int(min(max(filas // 25, 50), 40_000))
+    inst_mun = _zipf(rng, len(municipios), n_instituciones, 0.9)
+    inst_nombre = np.array([f"INSTITUCION EDUCATIVA {i:05d}" for i in range(n_instituciones)], dtype=object)
+    inst_codigo = 100_000_000_000 + np.arange(n_instituciones) * 37
+    inst = _zipf(rng, n_instituciones, filas, 0.6)
+
+    genero = rng.choice(np.array(["Hombre", "Mujer"], dtype=object), size=filas, p=[0.55, 0.45])
+    deporte = np.array(DEPORTES, dtype=object)[_zipf(rng, len(DEPORTES), filas, 1.3)]
+    categoria = rng.choice(np.array(CATEGORIAS, dtype=object), size=filas, p=[0.61, 0.37, 0.02])
+    # Valores como llegan del formulario: mayúsculas y espacios que normaliza la ingesta
+    zona = rng.choice(np.array(["rural", "urbano", "Rural", "Urbano ", "URBANO"], dtype=object), size=filas,
+                      p=[0.50, 0.44, 0.02, 0.02, 0.02])
+    tipo = rng.choice(np.array(TIPOS_DEPORTE + ["Conjunto", "individual "], dtype=object), size=filas,
+                      p=[0.29, 0.31, 0.36, 0.02, 0.02])
+
+    nombres = np.array([f"{n} {a} {b}" for n in NOMBRES for a in APELLIDOS for b in APELLIDOS], dtype=object)
+    inicio = np.datetime64("2025-03-01T00:00:00")
+    segundos = np.sort(rng.integers(0, 120 * 24 * 3600, size=filas))
+    fechas = pd.Series(inicio + segundos.astype("timedelta64[s]")).dt.strftime("%Y-%m-%d %H:%M:%S")
+
+    documento = 1_000_000_000 + rng.permutation(filas)
+    equipos = np.array([f"EQUIPO {i}" for i in range(200)] + [np.nan], dtype=object)
+    equipo = equipos[np.minimum(rng.integers(0, 400, size=filas), 200)]
+
+    m_inst = inst_mun[inst]
+    return pd.DataFrame({
+        "Código Dane": inst_codigo[inst],
+        "Nombre Institución": inst_nombre[inst],
+        "Código Departamento Institución": mun_dep[m_inst],
+        "Departamento Institución": dep_nombre[m_inst],
+        "Código Municipio Institución": mun_codigo[m_inst],
+        "Municipio Institución": mun_nombre[m_inst],
+        "Tipo de Documento": rng.choice(np.array(DOCUMENTOS, dtype=object), size=filas, p=[0.98, 0.013, 0.004, 0.003]),
+        "Número de Documento": documento,
+        "Nombre Completo": nombres[rng.integers(0, len(nombres), size=filas)],
+        "Género": genero,
+        "Correo Electrónico": pd.Series(documento).astype(str).radd("usuario").add("@correo.com").to_numpy(dtype=object),
+        "Código Departamento Deportista": mun_dep[mun_idx],
+        "Departamento Deportista": dep_nombre[mun_idx],
+        "Código Municipio Deportista": mun_codigo[mun_idx],
+        "Municipio Deportista": mun_nombre[mun_idx],
+        "Deporte": deporte,
+        "Clasificación Funcional": np.full(filas, np.nan),
+        "Prueba Deportiva": ("CAMPEONATO DE " + pd.Series(deporte).str.upper() + " " + pd.Series(categoria).str.upper()
+                             + " " + pd.Series(genero)).to_numpy(dtype=object),
+        "Categoría Deportiva": categoria,
+        "Equipo Deportivo": equipo,
+        "Fecha de Registro": fechas.to_numpy(dtype=object),
+        "Zona": zona,
+        "tipo deporte": tipo,
+    }, columns=COLUMNAS)
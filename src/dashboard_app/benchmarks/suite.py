@@ -0,0 +1,305 @@
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import dash
+import numpy as np
+import pandas as pd
+from plotly.io.json import to_json_plotly
+
+from benchmarks.equivalencia_motores import OPERACIONES, comprobar
+from benchmarks.generador import generar_inscripciones
+from callbacks import kpi_callbacks
+from database import data_manager
+from database.data_manager import DataManager
+from database.queries import QueriesInscripciones as Queries, ConsultasPandas, COLUMNAS_DIMENSION, COLUMNA_FECHA
+from database.session import SesionSQLite
+from database.snapshot import DataSnapshot
+from layout.layout import get_layout
+from transformers.cubo_conteos import CuboConteos
+from transformers.kpi_metrics import MetricasInscritos
+from transformers.motores import MOTORES, MotorPolars, obtener_motor
+from config import INGESTA_FILAS_POR_BLOQUE, TIPOS_DEPORTE
+
+TAMANOS = [10_000, 100_000, 1_000_000]
+
+
+def medir(funcion, repeticiones, preparar=None):
+    """Ejecuta `funcion` varias veces y devuelve sus tiempos en segundos.
+    `preparar` se llama antes de cada repetición, fuera de la medición"""
+    tiempos = []
+    for _ in range(repeticiones):
+        argumentos = preparar() if preparar else ()
+        inicio = time.perf_counter()
+        funcion(*argumentos)
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        "min_s": min(tiempos),
+        "mediana_s": statistics.median(tiempos),
+        "media_s": statistics.fmean(tiempos),
+        "repeticiones": repeticiones
+    }
+
+
+def procesar(data):
+    """Reproduce lo que DataManager.initialize_data calcula a partir de las filas ya leídas"""
+    processed = {'ingesta': None, 'data': data, 'cubo': CuboConteos.construir(data).indexar()}
+    for calcular in DataManager.DERIVADOS.values():
+        processed.update(calcular(data))
+    processed['version'] = datetime.now().isoformat()
+    return processed
+
+
+def bench_ingesta(filas, crudo, repeticiones, directorio):
+    """Lectura del Excel completa y por bloques (escribir el .xlsx de prueba es lento)"""
+    archivo = os.path.join(directorio, f"inscripciones_{filas}.xlsx")
+    crudo.to_excel(archivo, index=False)
+    resultados = {
+        "Queries.get_inscripciones_data": medir(lambda: Queries.get_inscripciones_data(archivo), repeticiones),
+        "Queries.iter_inscripciones_data": medir(
+            lambda: [None for _ in Queries.iter_inscripciones_data(archivo, INGESTA_FILAS_POR_BLOQUE)], repeticiones
+        ),
+    }
+    os.remove(archivo)
+    return resultados
+
+
+def bench_queries(crudo, data, repeticiones):
+    departamentos = Queries.get_departamentos(data)
+    return {
+        "Queries.normalizar_dimensiones": medir(Queries.normalizar_dimensiones, repeticiones, lambda: (crudo.copy(),)),
+        "Queries.get_metricas": medir(lambda: Queries.get_metricas(data), repeticiones),
+        "Queries.get_zona_counts": medir(lambda: Queries.get_zona_counts(data), repeticiones),
+        "Queries.get_tipo_counts": medir(lambda: Queries.get_tipo_counts(data), repeticiones),
+        "Queries.get_departamentos": medir(lambda: Queries.get_departamentos(data), repeticiones),
+        "Queries.get_municipios": medir(lambda: Queries.get_municipios(data), repeticiones),
+        "Queries.get_rural_urbano_counts": medir(lambda: Queries.get_rural_urbano_counts(data, departamentos), repeticiones),
+        "Queries.get_trend_data": medir(lambda: Queries.get_trend_data(data), repeticiones),
+        "Queries.get_deportes_data": medir(lambda: Queries.get_deportes_data(data), repeticiones),
+        "MetricasInscritos.construir_metricas": medir(lambda: MetricasInscritos(data).construir_metricas(), repeticiones),
+        "CuboConteos.construir": medir(lambda: CuboConteos.construir(data).indexar(), repeticiones),
+    }
+
+
+def bench_motores(data, repeticiones):
+    """Cada operación de QueriesInscripciones y MetricasInscritos con los motores de DataFrame
+    disponibles: comprueba que devuelven lo mismo que pandas y calcula la aceleración sobre pandas.
+    El motor polars convierte las columnas una vez por DataFrame; esa conversión se mide aparte"""
+    motores = [motor for motor in MOTORES if obtener_motor(motor).nombre == motor]
+    resultados = {}
+    if "polars" in motores:
+        columnas = COLUMNAS_DIMENSION + [COLUMNA_FECHA]
+        resultados["polars: conversión de columnas"] = medir(lambda: MotorPolars()._columnas(data, columnas), repeticiones)
+    for motor in motores:
+        comprobar(data, motor)
+    for nombre, operacion in OPERACIONES.items():
+        referencia = None
+        for motor in motores:
+            medida = medir(lambda: operacion(data, motor), repeticiones)
+            if referencia is None:
+                referencia = medida["min_s"]
+            else:
+                medida["aceleracion"] = referencia / medida["min_s"]
+            resultados[f"{motor}: {nombre}"] = medida
+    return resultados
+
+
+def bench_cache(processed, repeticiones, directorio):
+    """Guardado y carga del caché columnar en un directorio temporal"""
+    cache_dir = data_manager.CACHE_DIR
+    data_manager.CACHE_DIR = os.path.join(directorio, "cache")
+    try:
+        resultados = {
+            "DataManager._save_to_cache": medir(lambda: DataManager._save_to_cache(processed, None, {}), repeticiones),
+            "DataManager._load_from_cache": medir(
+                lambda: DataManager._load_from_cache(DataManager._load_manifest()), repeticiones
+            ),
+            "DataManager.attach_cache": medir(lambda: DataManager.attach_cache(timeout=0), repeticiones),
+        }
+        resultados["tamano_cache_bytes"] = sum(
+            os.path.getsize(os.path.join(raiz, archivo))
+            for raiz, _, archivos in os.walk(data_manager.CACHE_DIR) for archivo in archivos
+        )
+        return resultados
+    finally:
+        shutil.rmtree(data_manager.CACHE_DIR, ignore_errors=True)
+        data_manager.CACHE_DIR = cache_dir
+
+
+def _normalizar_agregados(agregados):
+    """Agregados comparables entre backends: las series y tablas pasan a listas de tuplas"""
+    def normalizar(valor):
+        if isinstance(valor, pd.Series):
+            return [(str(indice), int(total)) for indice, total in valor.items()]
+        if isinstance(valor, pd.DataFrame):
+            return sorted(tuple(map(str, fila)) for fila in valor.itertuples(index=False))
+        if isinstance(valor, dict):
+            return {clave: normalizar(v) for clave, v in valor.items()}
+        return valor
+    return normalizar(agregados)
+
+
+def bench_backends(processed, repeticiones, directorio):
+    """Agregados de la página General para varias selecciones con cada backend de consultas:
+    el cubo de conteos, SQLite (filtros y agrupaciones en SQL con índices) y pandas sobre las
+    filas crudas. Comprueba que los tres devuelven lo mismo"""
+    ruta = os.path.join(directorio, "inscripciones.sqlite")
+    inicio = time.perf_counter()
+    sesion = SesionSQLite.crear(ruta, processed['data'])
+    resultados = {
+        "SesionSQLite.crear": {"min_s": time.perf_counter() - inicio, "repeticiones": 1},
+        "SesionSQLite bytes": os.path.getsize(ruta),
+    }
+    backends = {"cubo": processed['cubo'], "sqlite": sesion, "pandas": ConsultasPandas(processed['data'])}
+    departamentos = processed['ubicacion']['departamentos']
+    municipios = [m for m, _ in processed['cubo'].jerarquia().municipios(departamentos[:2])[:3]]
+    selecciones = {
+        "sin filtro": (None, None),
+        "1 departamento": (departamentos[:1], None),
+        "2 departamentos y 3 municipios": (departamentos[:2], municipios),
+        "1 municipio": (None, municipios[:1]),
+    }
+    for nombre, (deps, muns) in selecciones.items():
+        esperado = _normalizar_agregados(Queries.get_agregados_filtro(backends["cubo"], deps, muns))
+        for backend, consultas in backends.items():
+            calcular = lambda: Queries.get_agregados_filtro(consultas, deps, muns)
+            if _normalizar_agregados(calcular()) != esperado:
+                raise AssertionError(f"El backend {backend} no coincide con el cubo en '{nombre}'")
+            resultados[f"{backend}: {nombre}"] = medir(calcular, repeticiones)
+    os.remove(ruta)
+    return resultados
+
+
+def bench_callbacks(snapshot, processed, repeticiones):
+    """Cada callback de servidor de kpi_callbacks llamado directamente, con las cachés vacías (frío)
+    y con la misma selección ya calculada (caliente)"""
+    snapshot.publish(processed)
+    departamentos = processed['ubicacion']['departamentos'][:2]
+    municipios = kpi_callbacks.actualizar_municipios(departamentos)
+    municipios = [opcion["value"] for opcion in municipios[:3]]
+    filtro = kpi_callbacks.crear_filtro(departamentos, municipios)
+
+    def frio():
+        kpi_callbacks.limpiar_caches()
+        return ()
+
+    actualizar_general = lambda: kpi_callbacks.actualizar_general(filtro)
+    filtrar = lambda: kpi_callbacks.filtrar_datos(1, departamentos, municipios)
+    return {
+        "filtrar_datos (frío)": medir(filtrar, repeticiones, frio),
+        "filtrar_datos (caliente)": medir(filtrar, repeticiones),
+        "actualizar_general (frío)": medir(actualizar_general, repeticiones, frio),
+        "actualizar_general (caliente)": medir(actualizar_general, repeticiones),
+        "actualizar_municipios": medir(lambda: kpi_callbacks.actualizar_municipios(departamentos), repeticiones),
+    }
+
+
+def bench_respuestas(snapshot, processed, repeticiones):
+    """Respuesta de cada callback (y del layout) como la codifica Dash: tiempo con el motor
+    json de la biblioteca estándar y con orjson, y bytes sin comprimir, con gzip y con brotli
+    (los niveles por defecto de Flask-Compress)"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    snapshot.publish(processed)
+    departamentos = processed['ubicacion']['departamentos'][:2]
+    filtro = kpi_callbacks.crear_filtro(departamentos, None)
+    respuestas = {
+        "layout": get_layout(departamentos=processed['ubicacion']['departamentos'], TIPOS_DEPORTE=TIPOS_DEPORTE),
+        "filtrar_datos": kpi_callbacks.filtrar_datos(1, departamentos, None),
+        "actualizar_general (inicial)": kpi_callbacks.actualizar_general(None),
+        "actualizar_general (filtro)": kpi_callbacks.actualizar_general(filtro),
+        "actualizar_municipios": kpi_callbacks.actualizar_municipios(departamentos),
+    }
+    resultados = {}
+    for nombre, salida in respuestas.items():
+        respuesta = {"multi": True, "response": salida}
+        cuerpo = to_json_plotly(respuesta, engine="orjson").encode("utf-8")
+        for motor in ("json", "orjson"):
+            resultados[f"{nombre} [{motor}]"] = medir(lambda: to_json_plotly(respuesta, engine=motor), repeticiones)
+        resultados[f"{nombre} bytes"] = len(cuerpo)
+        resultados[f"{nombre} bytes gzip"] = len(gzip.compress(cuerpo, 6))
+        if brotli is not None:
+            resultados[f"{nombre} bytes brotli"] = len(brotli.compress(cuerpo, quality=4))
+    return resultados
+
+
+def ejecutar(tamanos, repeticiones, excel_max_filas):
+    resultados = []
+    snapshot = None
+    with tempfile.TemporaryDirectory(prefix="bench_dash_") as directorio:
+        for filas in tamanos:
+            print(f"== {filas:,} filas ==")
+            inicio = time.perf_counter()
+            crudo = generar_inscripciones(filas)
+            grupos = {"generador": {"generar_inscripciones": {"min_s": time.perf_counter() - inicio, "repeticiones": 1}}}
+            data = Queries.normalizar_dimensiones(crudo.copy())
+
+            if filas <= excel_max_filas:
+                grupos["ingesta"] = bench_ingesta(filas, crudo, 1, directorio)
+            grupos["queries"] = bench_queries(crudo, data, repeticiones)
+            grupos["motores"] = bench_motores(data, repeticiones)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                processed = procesar(data)
+                grupos["cache"] = bench_cache(processed, repeticiones, directorio)
+
+            grupos["backends"] = bench_backends(processed, repeticiones, directorio)
+
+            if snapshot is None:
+                snapshot = DataSnapshot(processed)
+                kpi_callbacks.init_callbacks(dash.Dash(__name__), snapshot)
+            grupos["callbacks"] = bench_callbacks(snapshot, processed, repeticiones)
+            grupos["respuestas"] = bench_respuestas(snapshot, processed, repeticiones)
+
+            for grupo, operaciones in grupos.items():
+                for operacion, medida in operaciones.items():
+                    if not isinstance(medida, dict):
+                        medida = {"valor": medida}
+                    resultados.append({"filas": filas, "grupo": grupo, "operacion": operacion, **medida})
+                    if "min_s" in medida:
+                        aceleracion = f"   x{medida['aceleracion']:.1f}" if "aceleracion" in medida else ""
+                        print(f"{grupo:10} {operacion:45} {medida['min_s'] * 1000:10.2f} ms{aceleracion}")
+                    elif operacion.endswith(("bytes", "gzip", "brotli")):
+                        print(f"{grupo:10} {operacion:45} {medida['valor']:10,} B")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide las consultas, métricas, caché y callbacks con datos sintéticos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=TAMANOS,
+                        help="filas de cada conjunto sintético (10.000.000 necesita unos 12 GB de RAM)")
+    parser.add_argument("--repeat", type=int, default=5, help="repeticiones por operación")
+    parser.add_argument("--excel-max-rows", type=int, default=100_000,
+                        help="tamaño máximo para medir la lectura del Excel (escribir el .xlsx tarda)")
+    parser.add_argument("--output", default="benchmark_results.json", help="archivo JSON de resultados")
+    args = parser.parse_args()
+
+    resultados = ejecutar(args.sizes, args.repeat, args.excel_max_rows)
+    salida = {
+        "fecha": datetime.now().isoformat(),
+        "entorno": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+        },
+        "resultados": resultados,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(salida, f, ensure_ascii=False, indent=2)
+    print(f"Resultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
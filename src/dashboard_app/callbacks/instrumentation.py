@@ -0,0 +1,176 @@
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+from collections import defaultdict
+
+import flask
+
+# Límites de los buckets (en segundos y en bytes) de los histogramas
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Fases abiertas del callback en curso: [nombre, tiempo de las fases anidadas]
+_pila = contextvars.ContextVar("fases_callback", default=None)
+_tiempos = contextvars.ContextVar("tiempos_callback", default=None)
+
+
+class Histograma:
+    """Histograma acumulativo al estilo Prometheus"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)
+        self.suma = 0.0
+        self._lock = threading.Lock()
+
+    def observar(self, valor):
+        with self._lock:
+            self.suma += valor
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    self.conteos[i] += 1
+                    break
+            else:
+                self.conteos[-1] += 1
+
+    def lineas(self, nombre, etiquetas: dict):
+        """Líneas _bucket, _sum y _count en formato de texto de Prometheus"""
+        with self._lock:
+            conteos, suma = list(self.conteos), self.suma
+        base = ",".join(f'{clave}="{valor}"' for clave, valor in etiquetas.items())
+        separador = "," if base else ""
+        acumulado = 0
+        for limite, conteo in zip(list(self.buckets) + ["+Inf"], conteos):
+            acumulado += conteo
+            yield f'{nombre}_bucket{{{base}{separador}le="{limite}"}} {acumulado}'
+        yield f"{nombre}_sum{{{base}}} {suma}"
+        yield f"{nombre}_count{{{base}}} {acumulado}"
+
+
+@contextlib.contextmanager
+def fase(nombre):
+    """Mide el tiempo exclusivo de una fase (sin las fases anidadas) dentro de un callback
+    instrumentado; fuera de uno no hace nada"""
+    pila = _pila.get()
+    if pila is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    pila.append([nombre, 0.0])
+    try:
+        yield
+    finally:
+        _, anidadas = pila.pop()
+        total = time.perf_counter() - inicio
+        _tiempos.get()[nombre] += total - anidadas
+        if pila:
+            pila[-1][1] += total
+
+
+class Instrumentacion:
+    """Registro de latencias por callback y fase, tamaños de petición y respuesta y uso de
+    las cachés, expuesto en formato de texto de Prometheus.
+
+    Las fases son: deserialize (lectura del JSON de la petición), compute (agregados y
+    lógica del callback), figure (construcción de tarjetas y figuras) y serialize
+    (codificación de la respuesta y resto del ciclo de Dash)."""
+
+    def __init__(self):
+        self.duraciones = defaultdict(lambda: Histograma(LATENCY_BUCKETS))
+        self.bytes_peticion = defaultdict(lambda: Histograma(BYTES_BUCKETS))
+        self.bytes_respuesta = defaultdict(lambda: Histograma(BYTES_BUCKETS))
+        self.caches = {}
+
+    def instrumentar(self, funcion):
+        """Envuelve el cuerpo de un callback para medir sus fases"""
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            tiempos = defaultdict(float)
+            token_pila = _pila.set([])
+            token_tiempos = _tiempos.set(tiempos)
+            inicio = time.perf_counter()
+            try:
+                with fase("compute"):
+                    return funcion(*args, **kwargs)
+            finally:
+                _pila.reset(token_pila)
+                _tiempos.reset(token_tiempos)
+                if flask.has_request_context():
+                    flask.g.metricas_callback = (funcion.__name__, time.perf_counter() - inicio)
+                for nombre, segundos in tiempos.items():
+                    self.duraciones[(funcion.__name__, nombre)].observar(segundos)
+        return envoltura
+
+    def registrar_cache(self, nombre, cache):
+        """Incluye los contadores de una LRUCache en la salida de métricas"""
+        self.caches[nombre] = cache
+
+    def instalar(self, server, ruta):
+        """Mide las peticiones de callbacks en el servidor Flask y publica la ruta de métricas"""
+        @server.before_request
+        def _inicio_peticion():
+            if flask.request.path.endswith("/_dash-update-component"):
+                inicio = time.perf_counter()
+                flask.request.get_json(silent=True)  # Flask guarda el resultado y Dash lo reutiliza
+                flask.g.metricas_inicio = inicio
+                flask.g.metricas_deserialize = time.perf_counter() - inicio
+
+        @server.after_request
+        def _fin_peticion(response):
+            medida = flask.g.pop("metricas_callback", None)
+            inicio = flask.g.pop("metricas_inicio", None)
+            if medida is None or inicio is None:
+                return response
+            nombre, segundos_callback = medida
+            deserialize = flask.g.pop("metricas_deserialize", 0.0)
+            total = time.perf_counter() - inicio
+            self.duraciones[(nombre, "deserialize")].observar(deserialize)
+            self.duraciones[(nombre, "serialize")].observar(max(total - deserialize - segundos_callback, 0.0))
+            self.duraciones[(nombre, "total")].observar(total)
+            self.bytes_peticion[nombre].observar(flask.request.content_length or 0)
+            if not response.direct_passthrough:
+                self.bytes_respuesta[nombre].observar(len(response.get_data()))
+            return response
+
+        server.add_url_rule(ruta, "metricas", self._respuesta_metricas)
+
+    def _respuesta_metricas(self):
+        return flask.Response(self.exponer(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    def exponer(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus"""
+        lineas = [
+            "# HELP dash_callback_duration_seconds Duración de los callbacks por fase",
+            "# TYPE dash_callback_duration_seconds histogram",
+        ]
+        for (nombre, nombre_fase), histograma in sorted(self.duraciones.items()):
+            lineas.extend(histograma.lineas("dash_callback_duration_seconds", {"callback": nombre, "phase": nombre_fase}))
+        for metrica, descripcion, histogramas in (
+            ("dash_callback_request_bytes", "Tamaño del cuerpo de la petición", self.bytes_peticion),
+            ("dash_callback_response_bytes", "Tamaño del cuerpo de la respuesta", self.bytes_respuesta),
+        ):
+            lineas += [f"# HELP {metrica} {descripcion}", f"# TYPE {metrica} histogram"]
+            for nombre, histograma in sorted(histogramas.items()):
+                lineas.extend(histograma.lineas(metrica, {"callback": nombre}))
+
+        estadisticas = {nombre: cache.stats() for nombre, cache in self.caches.items()}
+        for clave, tipo, descripcion in (
+            ("hits", "counter", "Consultas resueltas desde la caché"),
+            ("misses", "counter", "Consultas que tuvieron que calcularse"),
+            ("entries", "gauge", "Entradas guardadas"),
+            ("bytes", "gauge", "Bytes estimados de las entradas guardadas"),
+        ):
+            metrica = f"dash_cache_{clave}_total" if tipo == "counter" else f"dash_cache_{clave}"
+            lineas += [f"# HELP {metrica} {descripcion}", f"# TYPE {metrica} {tipo}"]
+            lineas += [f'{metrica}{{cache="{nombre}"}} {stats[clave]}' for nombre, stats in estadisticas.items()]
+        lineas += ["# HELP dash_cache_hit_ratio Proporción de aciertos de la caché", "# TYPE dash_cache_hit_ratio gauge"]
+        for nombre, stats in estadisticas.items():
+            consultas = stats["hits"] + stats["misses"]
+            lineas.append(f'dash_cache_hit_ratio{{cache="{nombre}"}} {stats["hits"] / consultas if consultas else 0.0}')
+        return "\n".join(lineas) + "\n"
+
+
+# Registro compartido por todos los callbacks del proceso
+instrumentacion = Instrumentacion()
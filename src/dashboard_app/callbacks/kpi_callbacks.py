@@ -1,232 +1,300 @@
-from dash import callback, Output, Input, dcc, callback_context
-import pandas as pd
-import plotly.graph_objects as go
+from dash import callback, Output, Input, State, ClientsideFunction, dcc
+from dash.exceptions import PreventUpdate
+import functools
+import json
+from plotly.io.json import to_json_plotly
 from layout.components import DashboardCard
-from transformers.kpi_metrics import MetricasInscritos
 from dash import html
-from config import TIPOS_DEPORTE, COLOR_MAP
+from database.lru_cache import LRUCache
+from transformers.agregados_general import matriz_deportes
+from transformers.tendencia import elegir_tendencia
+from database.queries import QueriesInscripciones, ConsultasPandas
+from callbacks.instrumentation import instrumentacion, fase
+from callbacks.segundo_plano import crear_gestor
+from config import (
+    TIPOS_DEPORTE, COLOR_MAP, FILTER_CACHE_SIZE, RENDER_CACHE_BYTES, METRICS_ENABLED, METRICS_ROUTE,
+    DEPORTES_TOP_N, MUNICIPIOS_MAX_OPCIONES, TENDENCIA_RESOLUCION, TENDENCIA_MAX_PUNTOS, CALLBACK_WAIT_TIMEOUT,
+    BACKGROUND_CALLBACKS, BACKGROUND_CACHE_DIR, BACKGROUND_INTERVAL, QUERY_BACKEND
+)
 
-# Variable global para almacenar los datos
-data = None
+# Snapshot con los datos vigentes; cada callback lo lee una sola vez al empezar
+snapshot = None
 
-def init_callbacks(app, initial_data):
-    global data
-    data = initial_data['data']
+# Agregados por filtro que se quedan en el servidor; el navegador solo recibe el descriptor
+filter_cache = LRUCache(max_entries=FILTER_CACHE_SIZE)
 
-    @callback(
+# Salidas ya renderizadas por filtro, compartidas entre sesiones y limitadas por tamaño serializado
+render_cache = LRUCache(max_entries=None, max_bytes=RENDER_CACHE_BYTES, sizeof=lambda salida: len(to_json_plotly(salida)))
+
+# Versión de los datos de las entradas de las cachés
+version_caches = None
+
+
+def crear_filtro(departamentos, municipios):
+    """Crea el descriptor del filtro que se guarda en filtered-data-store"""
+    departamentos = sorted(departamentos or [])
+    municipios = sorted(municipios or [])
+    return {
+        "key": json.dumps([departamentos, municipios], ensure_ascii=False),
+        "departamentos": departamentos,
+        "municipios": municipios
+    }
+
+
+def normalizar_filtro(filtro):
+    """El descriptor llega del navegador: se reconstruye en el servidor a partir de las listas,
+    sin usar su clave, para que un cliente no pueda dejar en las cachés compartidas agregados
+    que no corresponden a la clave. Sin selección devuelve None, como la carga inicial"""
+    if not isinstance(filtro, dict):
+        return None
+    filtro = crear_filtro(filtro.get("departamentos"), filtro.get("municipios"))
+    return filtro if filtro["departamentos"] or filtro["municipios"] else None
+
+
+def datos_completos(datos, clave):
+    """Los datos con `clave`. Si son los provisionales de la instantánea de arranque espera a
+    los completos como mucho CALLBACK_WAIT_TIMEOUT segundos; si no llegan, el callback responde
+    sin cambios en lugar de bloquear la petición"""
+    if clave in datos:
+        return datos
+    try:
+        return snapshot.wait(CALLBACK_WAIT_TIMEOUT)
+    except TimeoutError:
+        print("Los datos todavía se están cargando: el callback responde sin cambios")
+        raise PreventUpdate
+
+
+def cubo_de(datos):
+    return datos_completos(datos, 'cubo')['cubo']
+
+
+def consultas_de(datos):
+    """Backend que resuelve los filtros según QUERY_BACKEND: el cubo de conteos, la base
+    SQLite del caché o las filas crudas con pandas"""
+    if QUERY_BACKEND == "sqlite":
+        return datos_completos(datos, 'sql')['sql']
+    if QUERY_BACKEND == "pandas":
+        return ConsultasPandas(datos_completos(datos, 'data')['data'])
+    return cubo_de(datos)
+
+
+def obtener_agregados(datos, filtro):
+    """Devuelve los agregados de la página General para el filtro desde la caché del servidor,
+    recalculándolos si fueron descartados"""
+    filtro = normalizar_filtro(filtro) or crear_filtro(None, None)
+    def calcular():
+        with fase("compute"):
+            return QueriesInscripciones.get_agregados_filtro(consultas_de(datos), filtro["departamentos"], filtro["municipios"])
+    return filter_cache.get_or_compute((datos['version'], filtro["key"]), calcular)
+
+
+def clave_salida(version, nombre, args):
+    return (version, nombre, json.dumps(args, sort_keys=True, ensure_ascii=False))
+
+
+def memoizar_salida(funcion):
+    """Reutiliza la salida renderizada para los mismos argumentos (filtro normalizado
+    y selección de tipos) y la misma versión de los datos, que llegan como primer argumento"""
+    @functools.wraps(funcion)
+    def envoltura(datos, *args):
+        clave = clave_salida(datos['version'], funcion.__name__, args)
+        with fase("figure"):
+            return render_cache.get_or_compute(clave, lambda: funcion(datos, *args))
+    return envoltura
+
+
+def limpiar_caches(datos=None):
+    """Descarta los agregados y salidas de versiones anteriores de los datos. Con `datos` solo
+    limpia si cambia la versión: al publicarse los datos completos de la misma versión que la
+    instantánea de arranque se conservan las salidas precargadas"""
+    global version_caches
+    if datos is not None and datos['version'] == version_caches:
+        return
+    version_caches = datos['version'] if datos is not None else None
+    filter_cache.clear()
+    render_cache.clear()
+
+
+@memoizar_salida
+def renderizar_tarjetas(datos, filtro):
+    """Valores y actualizaciones parciales de todas las tarjetas de la página General a partir
+    de un mismo cálculo de agregados; la estructura de las tarjetas ya está en el layout"""
+    agregados = obtener_agregados(datos, filtro)
+    tendencia = elegir_tendencia(agregados['tendencias'], TENDENCIA_RESOLUCION, TENDENCIA_MAX_PUNTOS)
+    genero_counts = agregados['genero']
+    zona_counts = agregados['zona']
+    tipo_counts = agregados['tipo']
+    return (
+        f"{agregados['total_estudiantes']:,}",
+        f"{agregados['total_instituciones']:,}",
+        f"{agregados['total_personal']:,}",
+        DashboardCard(
+            card_type="trendline",
+            x_data=tendencia.index,
+            y_data=tendencia.values
+        ).patch(),
+        f"({int(genero_counts.get('Hombre', 0)):,})",
+        f"({int(genero_counts.get('Mujer', 0)):,})",
+        DashboardCard(
+            card_type="donut",
+            labels=zona_counts.index.tolist(),
+            values=zona_counts.values.tolist(),
+            colors=["#FFA354", "#E5C473"]
+        ).patch(),
+        DashboardCard(
+            card_type="donut",
+            labels=tipo_counts.index.tolist(),
+            values=tipo_counts.values.tolist(),
+            colors=[COLOR_MAP[tipo] for tipo in tipo_counts.index]
+        ).patch(),
+        DashboardCard(
+            card_type="bar",
+            x_data=agregados['departamentos'],
+            y_data=[agregados['rural'], agregados['urbano']]
+        ).patch()
+    )
+
+
+@memoizar_salida
+def series_deportes(datos, filtro):
+    """Inscritos por deporte de cada tipo, alineados con la lista ordenada de deportes.
+    El navegador arma el gráfico con los tipos seleccionados (assets/tipo_deporte.js)"""
+    matriz = matriz_deportes(obtener_agregados(datos, filtro)['deportes'], TIPOS_DEPORTE, DEPORTES_TOP_N)
+    return {
+        "deportes": matriz.index.tolist(),
+        "series": {tipo: matriz[tipo].tolist() for tipo in matriz.columns},
+        "colores": COLOR_MAP
+    }
+
+
+# Salidas de la página General sin filtro que guarda la instantánea de arranque
+SALIDAS_INICIALES = {"renderizar_tarjetas": renderizar_tarjetas, "series_deportes": series_deportes}
+
+
+def salidas_iniciales(datos):
+    """Salidas de la carga inicial de la página, serializadas como las envía Dash"""
+    return {nombre: json.loads(to_json_plotly(funcion(datos, None))) for nombre, funcion in SALIDAS_INICIALES.items()}
+
+
+def precargar_salidas(version, salidas):
+    """Deja en render_cache las salidas de salidas_iniciales para la versión indicada"""
+    for nombre, salida in salidas.items():
+        render_cache.put(clave_salida(version, nombre, (None,)), tuple(salida) if isinstance(salida, list) else salida)
+
+
+def filtrar_datos(n_clicks, departamentos_seleccionados, municipios_seleccionados):
+    """Solo normaliza la selección; los agregados se calculan en actualizar_general, que
+    se puede cancelar si llega un filtro más nuevo"""
+    return crear_filtro(departamentos_seleccionados, municipios_seleccionados)
+
+
+def actualizar_general(filtro):
+    filtro = normalizar_filtro(filtro)
+    datos = snapshot.get()
+    return renderizar_tarjetas(datos, filtro) + (series_deportes(datos, filtro),)
+
+
+def version_general():
+    """Clave de los resultados de actualizar_general que reutiliza el gestor en segundo plano:
+    la versión de los datos y si ya son los completos (con los provisionales de la instantánea
+    de arranque un filtro puede responder sin cambios)"""
+    datos = snapshot.get()
+    return [datos['version'], 'cubo' in datos]
+
+
+def actualizar_municipios(departamentos_seleccionados, busqueda=None, seleccionados=None):
+    """Opciones del desplegable de municipios: se piden al escribir o al cambiar de departamento
+    en lugar de incluir todos los municipios en la página"""
+    municipios = cubo_de(snapshot.get()).jerarquia().opciones(departamentos_seleccionados, busqueda, MUNICIPIOS_MAX_OPCIONES)
+    # Los municipios ya seleccionados siguen en las opciones para que el desplegable los muestre
+    disponibles = set(municipios)
+    faltantes = [mun for mun in (seleccionados or []) if mun not in disponibles]
+    return [{"label": mun, "value": mun} for mun in municipios + faltantes]
+
+
+def init_callbacks(app, data_snapshot):
+    """Registra los callbacks; sus cuerpos son funciones del módulo para poder llamarlos
+    directamente (por ejemplo desde benchmarks)"""
+    global snapshot
+    snapshot = data_snapshot
+    limpiar_caches(snapshot.get())
+    snapshot.subscribe(limpiar_caches)
+
+    # Instrumentación opcional: latencia por fase, tamaños y uso de cachés en METRICS_ROUTE
+    registrar = instrumentacion.instrumentar if METRICS_ENABLED else (lambda funcion: funcion)
+    if METRICS_ENABLED:
+        instrumentacion.registrar_cache("filter_cache", filter_cache)
+        instrumentacion.registrar_cache("render_cache", render_cache)
+        instrumentacion.instalar(app.server, METRICS_ROUTE)
+
+    callback(
         Output("filtered-data-store", "data"),
         Input("filtrar-btn", "n_clicks"),
         Input("departamento-dropdown", "value"),
         Input("municipio-dropdown", "value"),
         prevent_initial_call=True
-    )
-    def filtrar_datos(n_clicks, departamentos_seleccionados, municipios_seleccionados):
-        df_filtrado = data
-        if departamentos_seleccionados:
-            df_filtrado = df_filtrado[df_filtrado["Departamento Deportista"].isin(departamentos_seleccionados)]
-        if municipios_seleccionados:
-            df_filtrado = df_filtrado[df_filtrado["Municipio Deportista"].isin(municipios_seleccionados)]
-        return df_filtrado.to_dict("records")
-
-    @callback(
-        Output("card-total-estudiantes", "children"),
-        Output("card-total-instituciones", "children"),
-        Output("card-total-personal", "children"),
-        Input("filtered-data-store", "data")
-    )
-    def actualizar_metricas(datos_filtrados):
-        df = pd.DataFrame(datos_filtrados) if datos_filtrados else data
-        metricas = MetricasInscritos(df)
-        df_metricas = metricas.construir_metricas()
-        total_estudiantes = int(df_metricas[df_metricas["categoria"] == "total_estudiantes"]["valor"].values[0])
-        total_instituciones = int(df_metricas[df_metricas["categoria"] == "total_instituciones"]["valor"].values[0])
-        total_personal = int(df_metricas[df_metricas["categoria"] == "total_personal"]["valor"].values[0])
-        return (
-            DashboardCard(
-                card_type="metric",
-                icon_path="/assets/Images/Imagen1.png",
-                value=f"{total_estudiantes:,}",
-                title_lines=["Total de estudiantes", "inscritos"],
-                border_color="#293377"
-            ).render(),
-            DashboardCard(
-                card_type="metric",
-                icon_path="/assets/Images/Imagen2.png",
-                value=f"{total_instituciones:,}",
-                title_lines=["Total de instituciones", "inscritas"],
-                border_color="#FFA354"
-            ).render(),
-            DashboardCard(
-                card_type="metric",
-                icon_path="/assets/Images/Imagen1.png",
-                value=f"{total_personal:,}",
-                title_lines=["Total de personal de", "apoyo inscrito"],
-                border_color="#602A8C"
-            ).render()
-        )
-
-    @callback(
-        Output("trendline-card", "children"),
-        Input("filtered-data-store", "data")
-    )
-    def actualizar_trendline(datos_filtrados):
-        df = pd.DataFrame(datos_filtrados) if datos_filtrados else data
-        trend_data = df.copy()
-        trend_data['Fecha'] = pd.to_datetime(trend_data['Fecha de Registro']).dt.date
-        trend_data = trend_data.groupby('Fecha').size().reset_index(name='inscritos')
-        return DashboardCard(
-            card_type="trendline",
-            x_data=trend_data['Fecha'],
-            y_data=trend_data['inscritos'],
-            trend_title="Tendencia de inscripciones"
-        ).render()
-
-    @callback(
-        Output("gender-card", "children"),
-        Input("filtered-data-store", "data")
-    )
-    def actualizar_gender(datos_filtrados):
-        df = pd.DataFrame(datos_filtrados) if datos_filtrados else data
-        male = int(df[df['Género'] == 'Hombre'].shape[0])
-        female = int(df[df['Género'] == 'Mujer'].shape[0])
-        return DashboardCard(
-            card_type="gender",
-            image_path="/assets/Images/img_gender.png",
-            male_value=male,
-            female_value=female
-        ).render()
-
-    @callback(
-        Output("zona-donut-card", "children"),
-        Input("filtered-data-store", "data")
-    )
-    def actualizar_zona_donut(datos_filtrados):
-        df = pd.DataFrame(datos_filtrados) if datos_filtrados else data
-        zona_counts = df['Zona'].value_counts()
-        zona_labels = zona_counts.index.tolist()
-        zona_values = zona_counts.values.tolist()
-        return DashboardCard(
-            card_type="donut",
-            labels=zona_labels,
-            values=zona_values,
-            colors=["#FFA354", "#E5C473"],
-            donut_title="Distribución por Zona"
-        ).render()
-
-    @callback(
-        Output("tipo-donut-card", "children"),
-        Input("filtered-data-store", "data")
-    )
-    def actualizar_tipo_donut(datos_filtrados):
-        df = pd.DataFrame(datos_filtrados) if datos_filtrados else data
-        tipo_counts = df['tipo deporte'].value_counts()
-        tipo_labels = tipo_counts.index.tolist()
-        tipo_values = tipo_counts.values.tolist()
-        colors = [COLOR_MAP[tipo] for tipo in tipo_labels]
-        return DashboardCard(
-            card_type="donut",
-            labels=tipo_labels,
-            values=tipo_values,
-            colors=colors,
-            donut_title="Tipo de Deporte"
-        ).render()
-
-    @callback(
-        Output("bar-estudiantes-card", "children"),
-        Input("filtered-data-store", "data")
-    )
-    def actualizar_bar_estudiantes(datos_filtrados):
-        df = pd.DataFrame(datos_filtrados) if datos_filtrados else data
-        
-        # Obtener los datos necesarios
-        departamentos = sorted(df['Departamento Deportista'].dropna().unique().tolist())
-        rural_counts = df[df['Zona'].str.lower() == 'rural']['Departamento Deportista'].value_counts()
-        urbano_counts = df[df['Zona'].str.lower() == 'urbano']['Departamento Deportista'].value_counts()
-        rural = [rural_counts.get(dep, 0) for dep in departamentos]
-        urbano = [urbano_counts.get(dep, 0) for dep in departamentos]
-        
-        # Crear el gráfico usando DashboardCard
-        return DashboardCard(
-            card_type="bar",
-            x_data=departamentos,
-            y_data=[rural, urbano],
-            trend_title="Estudiantes inscritos por departamento"
-        ).render()
+    )(registrar(filtrar_datos))
 
-    @callback(
-        Output("grafico-deportes-individuales", "figure"),
-        Input("tipo-deporte-checklist", "value"),
-        Input("filtered-data-store", "data")
-    )
-    def actualizar_dashboard(tipos_seleccionados, datos_filtrados):
-        df_filtrado = pd.DataFrame(datos_filtrados) if datos_filtrados else data
-        deportes_data = df_filtrado[df_filtrado["tipo deporte"].isin(tipos_seleccionados)]
-        deportes_group = deportes_data.groupby(['Deporte', 'tipo deporte']).size().reset_index(name='total')
-        deportes_unicos = sorted(deportes_group['Deporte'].unique())
-        barras = []
-        for tipo in tipos_seleccionados:
-            y = []
-            for deporte in deportes_unicos:
-                row = deportes_group[(deportes_group['Deporte'] == deporte) & (deportes_group['tipo deporte'] == tipo)]
-                y.append(int(row['total'].values[0]) if not row.empty else 0)
-            barras.append(go.Bar(x=deportes_unicos, y=y, name=tipo.title(), marker_color=COLOR_MAP.get(tipo, "#888888")))
-        deportes_fig = go.Figure(data=barras)
-        deportes_fig.update_layout(barmode="group")
-        return deportes_fig
-
-    @callback(
+    # Con un gestor en segundo plano la página General se recalcula en otro proceso: un filtro
+    # nuevo de la misma sesión (o tocar los controles) termina el cálculo anterior
+    gestor = crear_gestor(BACKGROUND_CACHE_DIR, cache_by=[version_general]) if BACKGROUND_CALLBACKS else None
+    segundo_plano = dict(
+        background=True,
+        manager=gestor,
+        interval=BACKGROUND_INTERVAL,
+        cancel=[
+            Input("filtrar-btn", "n_clicks"),
+            Input("departamento-dropdown", "value"),
+            Input("municipio-dropdown", "value")
+        ]
+    ) if gestor else {}
+    # En segundo plano no se instrumenta: las medidas quedarían en el proceso hijo
+    general = actualizar_general if gestor else registrar(actualizar_general)
+
+    callback(
+        Output("total-estudiantes-value", "children"),
+        Output("total-instituciones-value", "children"),
+        Output("total-personal-value", "children"),
+        Output("trendline-graph", "figure"),
+        Output("gender-male", "children"),
+        Output("gender-female", "children"),
+        Output("zona-donut-graph", "figure"),
+        Output("tipo-donut-graph", "figure"),
+        Output("bar-estudiantes-graph", "figure"),
+        Output("deportes-series-store", "data"),
+        Input("filtered-data-store", "data"),
+        **segundo_plano
+    )(general)
+
+    callback(
         Output("municipio-dropdown", "options"),
-        Input("departamento-dropdown", "value")
-    )
-    def actualizar_municipios(departamentos_seleccionados):
-        if not departamentos_seleccionados:
-            municipios_filtrados = data['Municipio Deportista'].dropna().unique()
-        else:
-            municipios_filtrados = data[data['Departamento Deportista'].isin(departamentos_seleccionados)]['Municipio Deportista'].dropna().unique()
-        return [{"label": mun, "value": mun} for mun in sorted(municipios_filtrados)]
-
-    @callback(
+        Input("departamento-dropdown", "value"),
+        Input("municipio-dropdown", "search_value"),
+        State("municipio-dropdown", "value")
+    )(registrar(actualizar_municipios))
+
+    # La leyenda de tipos se resuelve en el navegador, sin ida y vuelta al servidor
+    app.clientside_callback(
+        ClientsideFunction(namespace="tipo_deporte", function_name="toggle"),
         Output("tipo-deporte-checklist", "value"),
         [Input("conjunto-legend", "n_clicks"),
          Input("individual-legend", "n_clicks"),
          Input("paradeporte-legend", "n_clicks")],
         [Input("tipo-deporte-checklist", "value")]
     )
-    def toggle_tipo_deporte(conjunto_clicks, individual_clicks, paradeporte_clicks, current_values):
-        if not current_values:
-            return TIPOS_DEPORTE
-            
-        triggered = callback_context.triggered
-        if not triggered:
-            return current_values
-
-        button_id = triggered[0]["prop_id"].split(".")[0]
-        tipo_map = {
-            "conjunto-legend": "conjunto",
-            "individual-legend": "individual",
-            "paradeporte-legend": "para deporte"
-        }
-        
-        if button_id in tipo_map:
-            tipo = tipo_map[button_id]
-            if tipo in current_values:
-                return [v for v in current_values if v != tipo]
-            else:
-                return current_values + [tipo]
-        
-        return current_values
-
-    @callback(
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="tipo_deporte", function_name="estilos"),
         [Output("conjunto-legend", "style"),
          Output("individual-legend", "style"),
          Output("paradeporte-legend", "style")],
         [Input("tipo-deporte-checklist", "value")]
     )
-    def update_legend_styles(selected_tipos):
-        styles = []
-        for tipo in ["conjunto", "individual", "para deporte"]:
-            if tipo in selected_tipos:
-                styles.append({"opacity": 1.0})
-            else:
-                styles.append({"opacity": 0.5})
-        return styles
\ No newline at end of file
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="tipo_deporte", function_name="figura"),
+        Output("grafico-deportes-individuales", "figure"),
+        Input("deportes-series-store", "data"),
+        Input("tipo-deporte-checklist", "value"),
+        State("grafico-deportes-individuales", "figure")
+    )
@@ -0,0 +1,18 @@
+from dash import DiskcacheManager
+
+
+def crear_gestor(directorio, cache_by=None):
+    """Gestor de callbacks en segundo plano de Dash (DiskcacheManager, sin cambios), o None si
+    faltan sus dependencias (los callbacks se registran entonces como callbacks normales).
+
+    Cada cálculo se ejecuta en un proceso hijo y su resultado se guarda con diskcache en
+    `directorio`. Con `cache_by` el resultado se reutiliza para los mismos argumentos y los
+    mismos valores de esas funciones sin volver a calcularlo; sin él se borra al entregarlo.
+    Dash termina el proceso cuando la misma sesión lanza una petición más nueva del callback
+    o cambia una de sus entradas `cancel`."""
+    try:
+        import diskcache
+        return DiskcacheManager(diskcache.Cache(directorio), cache_by=cache_by)
+    except ImportError as e:
+        print(f"Callbacks en segundo plano desactivados: {str(e).splitlines()[0]}")
+        return None
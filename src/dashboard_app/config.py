@@ -13,4 +13,75 @@ TIPOS_DEPORTE = ["conjunto", "individual", "para deporte"]
 # Rutas
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_FILE = os.path.join(CURRENT_DIR, "database", "inscripciones.xlsx")
-CACHE_FILE = os.path.join(CURRENT_DIR, "database", "data_cache.json")
+CACHE_DIR = os.path.join(CURRENT_DIR, "database", "cache")
+
+# Instantánea de arranque (layout, plantillas y salidas iniciales) para servir la página mientras
+# se cargan los datos en segundo plano
+STARTUP_SNAPSHOT = True
+STARTUP_SNAPSHOT_FILE = os.path.join(CACHE_DIR, "startup.json")
+# Segundos entre reintentos si falla la carga de los datos después de servir la instantánea
+LOAD_RETRY_INTERVAL = 30
+
+# Imprimir todas las tablas procesadas al cargar los datos en lugar del resumen de una línea
+RESUMEN_DETALLADO = False
+
+# Si el Excel solo crece con filas nuevas, se leen únicamente esas filas
+INGESTA_INCREMENTAL = True
+
+# Filas por bloque al leer el Excel completo (limita la memoria de la ingesta)
+INGESTA_FILAS_POR_BLOQUE = 20000
+
+# Cada cuántos segundos se revisa si el Excel cambió para recargar los datos (0 desactiva)
+REFRESH_INTERVAL = 30
+
+# Segundos que un worker espera a que el proceso cargador publique el caché
+ATTACH_TIMEOUT = 600
+
+# Segundos que un callback espera a los datos completos mientras se sirve la instantánea de
+# arranque; si no llegan, responde sin cambios y el filtro se puede volver a pedir
+CALLBACK_WAIT_TIMEOUT = 5
+
+# Instrumentación de callbacks (latencias por fase, tamaños y cachés) en una ruta de métricas
+METRICS_ENABLED = False
+METRICS_ROUTE = "/metrics"
+
+# Recalcular la página General en un proceso aparte (DiskcacheManager de Dash, requiere
+# dash[diskcache]) para poder cancelar los filtros que quedan viejos; sin las dependencias se usa
+# un callback normal. Desactivado por defecto: en Linux el proceso se crea con fork del servidor,
+# que tiene hilos en marcha (carga y refresco de los datos)
+BACKGROUND_CALLBACKS = False
+BACKGROUND_CACHE_DIR = os.path.join(CURRENT_DIR, "database", "callbacks_cache")
+# Milisegundos entre las consultas del navegador por el resultado de un cálculo en segundo plano
+BACKGROUND_INTERVAL = 200
+
+# Comprimir las respuestas (callbacks, layout y assets) con Flask-Compress, en el primer
+# algoritmo de la lista que acepte el navegador
+COMPRESS_RESPONSES = True
+COMPRESS_ALGORITHMS = ["br", "gzip"]
+
+# Motor que responde a los filtros de la página General: "cubo" (cubo de conteos con índices
+# bitmap), "sqlite" (base embebida que se crea en el caché durante la ingesta, con índices por
+# departamento, municipio y fecha) o "pandas" (filas crudas en memoria; no disponible en los workers)
+QUERY_BACKEND = "cubo"
+
+# Motor de DataFrame de las consultas y métricas sobre las filas crudas al procesar los datos:
+# "pandas", "numpy" (conteos sobre los códigos enteros de las categóricas) o "polars" (opcional;
+# si no está instalado se usa pandas). Todos devuelven exactamente lo mismo
+DATAFRAME_ENGINE = "numpy"
+
+# Caché de filtros en el servidor (número de selecciones guardadas)
+FILTER_CACHE_SIZE = 32
+
+# Caché de salidas renderizadas por filtro (bytes de JSON serializado)
+RENDER_CACHE_BYTES = 64 * 1024 * 1024
+
+# Deportes que se muestran en "Inscritos por deporte"; el resto se agrupa en "Otros deportes" (None muestra todos)
+DEPORTES_TOP_N = 40
+
+# Máximo de municipios por respuesta del desplegable (los de más inscritos); al escribir se busca entre todos
+MUNICIPIOS_MAX_OPCIONES = 200
+
+# Resolución de la tendencia: "D" (día), "W" (semana), "M" (mes) o "auto" (la más fina que quepa en
+# TENDENCIA_MAX_PUNTOS); si aun así hay más puntos, se reducen con LTTB
+TENDENCIA_RESOLUCION = "auto"
+TENDENCIA_MAX_PUNTOS = 180
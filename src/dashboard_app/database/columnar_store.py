@@ -0,0 +1,309 @@
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = "schema.json"
+# Archivo con el nombre del directorio de la versión publicada del caché
+POINTER_FILE = "CURRENT"
+VERSION_PREFIX = "v"
+POINTER_RETRIES = 50
+
+
+def _column_kind(serie: pd.Series) -> str:
+    """Determina cómo se guarda cada columna según su dtype"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return "category"
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return "datetime"
+    if serie.dtype != object and isinstance(serie.dtype, np.dtype):
+        return "numeric"
+    valores = serie.dropna()
+    if valores.map(type).eq(str).all():
+        return "string"
+    return "object"
+
+
+def _save_categories(path, categorias: pd.Index):
+    valores = categorias.to_numpy()
+    if valores.dtype == object:
+        valores = valores.astype(str)
+    np.save(path, valores, allow_pickle=False)
+
+
+def _save_column(serie: pd.Series, directory: str, i: int) -> dict:
+    """Guarda una columna en `directory` y devuelve su entrada del esquema"""
+    kind = _column_kind(serie)
+    info = {"name": serie.name, "kind": kind, "file": f"{i}.npy"}
+    path = os.path.join(directory, info["file"])
+    if kind == "category":
+        info["categories"] = f"{i}.categories.npy"
+        info["ordered"] = bool(serie.cat.ordered)
+        np.save(path, serie.cat.codes.to_numpy(), allow_pickle=False)
+        _save_categories(os.path.join(directory, info["categories"]), serie.cat.categories)
+    elif kind == "datetime":
+        if serie.dt.tz is not None:
+            info["tz"] = str(serie.dt.tz)
+            serie = serie.dt.tz_convert(None)
+        np.save(path, serie.to_numpy(dtype="datetime64[ns]"), allow_pickle=False)
+    elif kind == "numeric":
+        np.save(path, serie.to_numpy(), allow_pickle=False)
+    elif kind == "string":
+        # Codificación por diccionario: códigos enteros + valores únicos de ancho fijo
+        codes, uniques = pd.factorize(serie)
+        info["categories"] = f"{i}.categories.npy"
+        np.save(path, codes.astype(np.int32), allow_pickle=False)
+        _save_categories(os.path.join(directory, info["categories"]), uniques)
+    else:
+        np.save(path, serie.to_numpy(dtype=object), allow_pickle=True)
+    return info
+
+
+def _write_schema(directory: str, rows: int, columnas: list):
+    with open(os.path.join(directory, SCHEMA_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"rows": rows, "columns": columnas}, f, ensure_ascii=False)
+
+
+def save_frame(df: pd.DataFrame, directory: str):
+    """Guarda un DataFrame como un archivo .npy por columna, conservando los dtypes"""
+    os.makedirs(directory, exist_ok=True)
+    columnas = [_save_column(df[nombre], directory, i) for i, nombre in enumerate(df.columns)]
+    _write_schema(directory, len(df), columnas)
+
+
+def _codes_dtype(n_categorias: int):
+    """Mismo tipo de códigos que elige pandas, para que from_codes no copie el mapeo"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categorias < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class FrameWriter:
+    """Escribe un DataFrame en formato save_frame recibiéndolo por bloques de filas.
+
+    Cada bloque se guarda en archivos parciales y al cerrar se concatenan con
+    open_memmap, así que la memoria usada depende del tamaño del bloque y no del total.
+    Las columnas categóricas y de texto comparten un diccionario de valores entre bloques."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.rows = 0
+        self._columns = None
+        self._parts = []
+        self._dictionaries = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, df: pd.DataFrame):
+        """Añade un bloque de filas con las mismas columnas que el primero"""
+        if self._columns is None:
+            self._columns = list(df.columns)
+            self._parts = [[] for _ in self._columns]
+            self._dictionaries = {i: {} for i in range(len(self._columns))}
+        bloque = len(self._parts[0]) if self._parts else 0
+        for i, nombre in enumerate(self._columns):
+            serie = df[nombre]
+            path = os.path.join(self.directory, f"{i}.part{bloque}.npy")
+            kind = "null" if serie.isna().all() else _column_kind(serie)
+            if kind in ("category", "string"):
+                # Códigos contra el diccionario acumulado de la columna (orden de aparición)
+                codes, uniques = pd.factorize(serie)
+                diccionario = self._dictionaries[i]
+                mapping = np.array([diccionario.setdefault(valor, len(diccionario)) for valor in uniques], dtype=np.int64)
+                valores = np.where(codes >= 0, mapping[np.maximum(codes, 0)] if len(mapping) else -1, -1)
+                info = {"ordered": bool(serie.cat.ordered)} if kind == "category" else {}
+            elif kind == "datetime":
+                info = {"tz": str(serie.dt.tz)} if serie.dt.tz is not None else {}
+                if serie.dt.tz is not None:
+                    serie = serie.dt.tz_convert(None)
+                valores = serie.to_numpy(dtype="datetime64[ns]")
+            elif kind == "numeric":
+                valores, info = serie.to_numpy(), {}
+            elif kind == "null":
+                valores, info = np.empty(0), {"rows": len(serie)}
+            else:
+                valores, info = serie.to_numpy(dtype=object), {}
+            np.save(path, valores, allow_pickle=kind == "object")
+            self._parts[i].append((kind, path, info))
+        self.rows += len(df)
+
+    def _finish_column(self, i: int, nombre: str) -> dict:
+        partes = self._parts[i]
+        kinds = {kind for kind, _, _ in partes} - {"null"}
+        # Una columna vacía en todos los bloques queda como float con NaN, igual que en read_excel
+        kind = kinds.pop() if len(kinds) == 1 else ("numeric" if not kinds else None)
+        path = os.path.join(self.directory, f"{i}.npy")
+        if kind in ("category", "string"):
+            valores_unicos = list(self._dictionaries[i])
+            if kind == "category":
+                # Categorías ordenadas como las deja astype('category') sobre la columna completa
+                orden = sorted(range(len(valores_unicos)), key=valores_unicos.__getitem__)
+                remap = np.empty(len(orden), dtype=np.int64)
+                remap[orden] = np.arange(len(orden))
+                valores_unicos = [valores_unicos[j] for j in orden]
+                dtype = _codes_dtype(len(valores_unicos))
+            else:
+                remap = np.arange(len(valores_unicos), dtype=np.int64)
+                dtype = np.int32
+            salida = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(self.rows,))
+            inicio = 0
+            for parte_kind, parte_path, info in partes:
+                if parte_kind == "null":
+                    salida[inicio:inicio + info["rows"]] = -1
+                    inicio += info["rows"]
+                    continue
+                codes = np.load(parte_path)
+                salida[inicio:inicio + len(codes)] = np.where(codes >= 0, remap[np.maximum(codes, 0)] if len(remap) else -1, -1)
+                inicio += len(codes)
+            salida.flush()
+            del salida
+            info = {"name": nombre, "kind": kind, "file": f"{i}.npy", "categories": f"{i}.categories.npy"}
+            if kind == "category":
+                info["ordered"] = next(extra["ordered"] for k, _, extra in partes if k == "category")
+            _save_categories(os.path.join(self.directory, info["categories"]), pd.Index(valores_unicos, dtype=object))
+            return info
+
+        if kind in ("numeric", "datetime"):
+            dtypes = [np.load(parte_path, mmap_mode="r").dtype for k, parte_path, _ in partes if k == kind]
+            dtype = np.result_type(*dtypes) if dtypes else np.float64
+            if kind == "numeric" and any(k == "null" for k, _, _ in partes):
+                dtype = np.result_type(dtype, np.float64)
+            salida = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(self.rows,))
+            inicio = 0
+            for parte_kind, parte_path, extra in partes:
+                if parte_kind == "null":
+                    salida[inicio:inicio + extra["rows"]] = np.datetime64("NaT") if kind == "datetime" else np.nan
+                    inicio += extra["rows"]
+                    continue
+                valores = np.load(parte_path, mmap_mode="r")
+                salida[inicio:inicio + len(valores)] = valores
+                inicio += len(valores)
+            salida.flush()
+            del salida
+            info = {"name": nombre, "kind": kind, "file": f"{i}.npy"}
+            tz = next((extra["tz"] for k, _, extra in partes if k == kind and "tz" in extra), None)
+            if tz:
+                info["tz"] = tz
+            return info
+
+        # Tipos distintos entre bloques: se materializa solo esta columna y se guarda como save_frame
+        series = []
+        for parte_kind, parte_path, extra in partes:
+            if parte_kind == "null":
+                series.append(pd.Series([np.nan] * extra["rows"], dtype=object))
+            elif parte_kind in ("category", "string"):
+                valores_unicos = np.array(list(self._dictionaries[i]) + [np.nan], dtype=object)
+                series.append(pd.Series(valores_unicos[np.load(parte_path)], dtype=object))
+            else:
+                series.append(pd.Series(np.load(parte_path, allow_pickle=True)))
+        serie = pd.concat(series, ignore_index=True).rename(nombre)
+        return _save_column(serie, self.directory, i)
+
+    def close(self):
+        """Concatena los bloques, escribe el esquema y borra los archivos parciales"""
+        columnas = [self._finish_column(i, nombre) for i, nombre in enumerate(self._columns or [])]
+        for partes in self._parts:
+            for _, parte_path, _ in partes:
+                os.remove(parte_path)
+        _write_schema(self.directory, self.rows, columnas)
+
+
+def link_file(source: str, destination: str):
+    """Reutiliza un archivo de una versión publicada del caché sin copiar sus datos: se enlaza
+    (enlace duro), o se copia si el sistema de archivos no lo permite. Los archivos publicados
+    no se modifican, así que las dos versiones pueden compartirlo"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def link_frame(source: str, directory: str):
+    """Reutiliza en `directory` un DataFrame guardado en `source` con link_file"""
+    os.makedirs(directory, exist_ok=True)
+    for entrada in os.scandir(source):
+        link_file(entrada.path, os.path.join(directory, entrada.name))
+
+
+def load_frame(directory: str, mmap: bool = True) -> pd.DataFrame:
+    """Carga un DataFrame guardado con save_frame; las columnas numéricas, de fecha
+    y los códigos de las categóricas se mapean en memoria sin copiarse"""
+    with open(os.path.join(directory, SCHEMA_FILE), 'r', encoding='utf-8') as f:
+        schema = json.load(f)
+
+    # np.load no puede mapear archivos vacíos
+    mmap_mode = 'r' if mmap and schema["rows"] > 0 else None
+    columnas = {}
+    for info in schema["columns"]:
+        path = os.path.join(directory, info["file"])
+        kind = info["kind"]
+        if kind == "object":
+            columnas[info["name"]] = np.load(path, allow_pickle=True)
+            continue
+
+        # np.asarray conserva el mapeo pero expone un ndarray normal a pandas
+        valores = np.asarray(np.load(path, mmap_mode=mmap_mode))
+        if kind == "category":
+            categorias = pd.Index(np.load(os.path.join(directory, info["categories"])))
+            columnas[info["name"]] = pd.Categorical.from_codes(valores, categories=categorias, ordered=info["ordered"])
+        elif kind == "string":
+            categorias = np.load(os.path.join(directory, info["categories"])).astype(object)
+            columnas[info["name"]] = pd.Categorical.from_codes(valores, categories=categorias).astype(object)
+        elif kind == "datetime" and "tz" in info:
+            columnas[info["name"]] = pd.DatetimeIndex(valores).tz_localize("UTC").tz_convert(info["tz"])
+        else:
+            columnas[info["name"]] = valores
+
+    return pd.DataFrame(columnas, index=pd.RangeIndex(schema["rows"]), copy=False)
+
+
+def new_version_directory(directory: str) -> str:
+    """Crea el directorio de una versión nueva del caché dentro de `directory`.
+    Se escribe entero antes de publicarlo con publish_version"""
+    os.makedirs(directory, exist_ok=True)
+    version = os.path.join(directory, f"{VERSION_PREFIX}{time.time_ns()}")
+    os.makedirs(version)
+    return version
+
+
+def current_version(directory: str):
+    """Directorio de la versión publicada en `directory`, o None si no hay ninguna"""
+    try:
+        with open(os.path.join(directory, POINTER_FILE), 'r', encoding='utf-8') as f:
+            nombre = f.read().strip()
+    except OSError:
+        return None
+    return os.path.join(directory, nombre) if nombre else None
+
+
+def publish_version(directory: str, version_directory: str):
+    """Publica una versión escrita con new_version_directory cambiando el puntero a ella.
+
+    Las versiones no se renombran ni se borran mientras están publicadas, así que los procesos
+    que tienen mapeados sus archivos siguen leyéndolos. Las versiones anteriores se borran
+    después si se puede: en Windows un archivo mapeado en memoria no se puede borrar, y la
+    versión que algún proceso siga usando se borra en una publicación posterior."""
+    temporal = os.path.join(directory, f"{POINTER_FILE}.{os.getpid()}.tmp")
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(os.path.basename(version_directory))
+    for intento in range(POINTER_RETRIES):
+        try:
+            # Reemplazo atómico; en Windows falla si otro proceso tiene el puntero abierto
+            os.replace(temporal, os.path.join(directory, POINTER_FILE))
+            break
+        except PermissionError:
+            if intento == POINTER_RETRIES - 1:
+                raise
+            time.sleep(0.1)
+    remove_old_versions(directory)
+
+
+def remove_old_versions(directory: str):
+    """Borra los directorios de `directory` que no son la versión publicada (versiones
+    anteriores o escrituras interrumpidas); los archivos que no se pueden borrar se dejan"""
+    vigente = current_version(directory)
+    for entrada in os.scandir(directory):
+        if entrada.is_dir() and entrada.path != vigente:
+            shutil.rmtree(entrada.path, ignore_errors=True)
@@ -1,146 +1,271 @@
+import functools
+import hashlib
+import inspect
 import json
 import os
+import shutil
+import time
 import pandas as pd
-import numpy as np
-from datetime import datetime, date
+from datetime import datetime
+from plotly.io.json import to_json_plotly
+from . import queries, columnar_store, excel_stream, excel_incremental, session
 from .queries import QueriesInscripciones as Queries
-from config import DATA_FILE, CACHE_FILE
+from .columnar_store import (
+    save_frame, load_frame, link_file, link_frame, FrameWriter, new_version_directory, current_version, publish_version
+)
+from .excel_incremental import leer_marca, leer_filas_nuevas
+from .session import SesionSQLite
+from transformers import bitmap_index, cubo_conteos, frames, jerarquia_ubicacion, kpi_metrics, motores
+from transformers.cubo_conteos import CuboConteos
+from transformers.frames import concatenar
+from config import DATA_FILE, CACHE_DIR, INGESTA_INCREMENTAL, INGESTA_FILAS_POR_BLOQUE, RESUMEN_DETALLADO, QUERY_BACKEND
+
+CACHE_FORMAT = 10
+MANIFEST_FILE = "manifest.json"
+AGGREGATES_FILE = "aggregates.json"
+SQLITE_FILE = "inscripciones.sqlite"
+INGEST_DIR = CACHE_DIR + ".ingest"
+HASH_BLOCK_SIZE = 1 << 20
+
+# DataFrames del caché que los workers no necesitan mapear
+ATTACH_SKIP_FRAMES = ("data",)
+
+# Las filas crudas se guardan en bloques: la ingesta incremental añade las filas nuevas como un
+# bloque más y enlaza los anteriores. Al llegar a este número de bloques se reescriben en uno
+DATA_MAX_BLOQUES = 8
+
+# Código del que depende cada artefacto del caché: si cambia, el artefacto se recalcula.
+# "data" son las filas crudas, el cubo y la marca de ingesta; el resto se deriva de ellas.
+CODIGO_ARTEFACTOS = {
+    "data": [
+        excel_stream, excel_incremental, columnar_store, cubo_conteos, bitmap_index, jerarquia_ubicacion, frames,
+        queries.COLUMNAS_DIMENSION, queries.COLUMNAS_MINUSCULAS,
+        Queries.get_inscripciones_data, Queries.iter_inscripciones_data, Queries.normalizar_dimensiones
+    ],
+    "metricas": [kpi_metrics, motores, Queries.get_metricas],
+    "distribuciones": [
+        motores, Queries.get_zona_counts, Queries.get_tipo_counts, Queries.get_departamentos,
+        Queries.get_municipios, Queries.get_rural_urbano_counts
+    ],
+    "trend_data": [motores, Queries.get_trend_data],
+    "deportes_data": [motores, Queries.get_deportes_data],
+    "sqlite": [session],
+}
 
 class DataManager:
     @staticmethod
-    def _convert_numpy_types(obj):
-        """Convierte tipos de numpy y otros tipos complejos a tipos Python nativos"""
-        if isinstance(obj, (np.integer, np.int64)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float64)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif isinstance(obj, pd.DataFrame):
-            return obj.to_dict('records')
-        elif isinstance(obj, pd.Series):
-            return obj.to_dict()
-        elif isinstance(obj, (datetime, date)):
-            return obj.isoformat()
-        elif isinstance(obj, dict):
-            return {key: DataManager._convert_numpy_types(value) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [DataManager._convert_numpy_types(item) for item in obj]
-        return obj
-
-    @staticmethod
-    def _prepare_data_for_cache(data):
-        """Prepara los datos para ser guardados en caché, asegurando que sean serializables"""
-        if isinstance(data, pd.DataFrame):
-            # Convertir columnas de fecha a string en formato ISO
-            for col in data.columns:
-                if pd.api.types.is_datetime64_any_dtype(data[col]):
-                    data[col] = data[col].dt.strftime('%Y-%m-%d')
-                elif isinstance(data[col].iloc[0], (datetime, date)) if len(data) > 0 else False:
-                    data[col] = data[col].apply(lambda x: x.isoformat() if isinstance(x, (datetime, date)) else x)
-            return DataManager._convert_numpy_types(data)
-        elif isinstance(data, dict):
-            return {key: DataManager._prepare_data_for_cache(value) for key, value in data.items()}
-        elif isinstance(data, list):
-            return [DataManager._prepare_data_for_cache(item) for item in data]
-        elif isinstance(data, (datetime, date)):
-            return data.isoformat()
-        return DataManager._convert_numpy_types(data)
-
-    @staticmethod
-    def _save_to_cache(data):
-        """Guarda los datos procesados en el cache"""
+    def _save_to_cache(data, fuente, artefactos, anterior=None, nuevas=None):
+        """Guarda los datos procesados en el cache columnar: un directorio .npy por DataFrame
+        y los agregados pequeños en JSON. Cada guardado es una versión nueva del caché en su
+        propio directorio, que se publica al final; devuelve ese directorio.
+
+        `anterior` es el manifiesto de la versión publicada cuando las filas crudas son las suyas
+        más `nuevas` (None si no hay filas nuevas): sus bloques de filas y su base SQLite se
+        reutilizan y solo se escriben las filas nuevas"""
         try:
-            os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
-            cache_data = {
+            directorio = new_version_directory(CACHE_DIR)
+            previo = os.path.join(CACHE_DIR, anterior['directory']) if anterior is not None else None
+
+            frames = {}
+            for key in [key for key, value in data.items() if isinstance(value, pd.DataFrame)]:
+                bloques = [f"{key}/0"]
+                if key == 'data' and previo is not None and len(anterior['frames']['data']) < DATA_MAX_BLOQUES:
+                    bloques = list(anterior['frames']['data'])
+                    for bloque in bloques:
+                        link_frame(os.path.join(previo, bloque), os.path.join(directorio, bloque))
+                    if nuevas is not None and len(nuevas):
+                        bloques.append(f"data/{len(bloques)}")
+                        save_frame(nuevas, os.path.join(directorio, bloques[-1]))
+                else:
+                    save_frame(data[key], os.path.join(directorio, bloques[0]))
+                frames[key] = bloques
+
+            cubes = [key for key, value in data.items() if isinstance(value, CuboConteos)]
+            for key in cubes:
+                data[key].guardar(os.path.join(directorio, key))
+
+            # Con QUERY_BACKEND = "sqlite" las filas también se cargan en la base embebida
+            sqlite = None
+            if QUERY_BACKEND == "sqlite":
+                sqlite = SQLITE_FILE
+                ruta = os.path.join(directorio, SQLITE_FILE)
+                if previo is not None and anterior.get('sqlite') and anterior['artifacts'].get('sqlite') == artefactos.get('sqlite'):
+                    if nuevas is not None and len(nuevas):
+                        SesionSQLite.anexar(os.path.join(previo, anterior['sqlite']), ruta, nuevas)
+                    else:
+                        link_file(os.path.join(previo, anterior['sqlite']), ruta)
+                else:
+                    SesionSQLite.crear(ruta, data['data'])
+
+            sesiones = [key for key, value in data.items() if isinstance(value, SesionSQLite)]
+            aggregates = {key: value for key, value in data.items() if key not in [*frames, *cubes, *sesiones]}
+            # El codificador de plotly (orjson si está instalado) serializa los tipos de numpy
+            with open(os.path.join(directorio, AGGREGATES_FILE), 'w', encoding='utf-8') as f:
+                f.write(to_json_plotly(aggregates))
+
+            # El manifiesto se escribe al final y la versión se publica cuando está completa
+            manifest = {
+                'format': CACHE_FORMAT,
+                'directory': os.path.basename(directorio),
                 'last_update': datetime.now().isoformat(),
-                'data': DataManager._prepare_data_for_cache(data)
+                'frames': frames,
+                'cubes': cubes,
+                'sqlite': sqlite,
+                'source_hash': fuente,
+                'artifacts': artefactos
             }
-            with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            with open(os.path.join(directorio, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+
+            publish_version(CACHE_DIR, directorio)
             print("Datos guardados en cache correctamente")
+            return directorio
         except Exception as e:
             print(f"Error al guardar en cache: {str(e)}")
             raise
 
     @staticmethod
-    def _load_from_cache():
-        """Carga los datos desde el cache"""
+    def _load_manifest():
+        """Lee el manifiesto de la versión publicada del caché; None si no existe o tiene otro
+        formato"""
+        directorio = current_version(CACHE_DIR)
+        if directorio is None:
+            return None
         try:
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-                data = cache_data['data']
-                
-                # Convertir datos de vuelta a DataFrames donde sea necesario
-                if 'data' in data and isinstance(data['data'], list):
-                    df = pd.DataFrame(data['data'])
-                    # Convertir columnas de fecha de vuelta a datetime
-                    date_columns = [col for col in df.columns if isinstance(df[col].iloc[0], str) and 
-                                  df[col].iloc[0].count('-') == 2]
-                    for col in date_columns:
-                        try:
-                            df[col] = pd.to_datetime(df[col])
-                        except:
-                            pass  # Si la conversión falla, mantener como string
-                    data['data'] = df
-                
-                print("Datos cargados desde cache correctamente")
-                return data
+            with open(os.path.join(directorio, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get('format') == CACHE_FORMAT else None
+
+    @staticmethod
+    def _load_from_cache(manifest, omitir=()):
+        """Carga los datos desde el cache; los DataFrames y los índices del cubo se mapean en
+        memoria con sus dtypes. Los DataFrames de `omitir` no se cargan"""
+        try:
+            directorio = os.path.join(CACHE_DIR, manifest['directory'])
+            with open(os.path.join(directorio, AGGREGATES_FILE), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for key, bloques in manifest['frames'].items():
+                if key not in omitir:
+                    # Con un solo bloque el DataFrame queda mapeado; con varios se concatenan
+                    partes = [load_frame(os.path.join(directorio, bloque)) for bloque in bloques]
+                    data[key] = functools.reduce(concatenar, partes)
+            for key in manifest['cubes']:
+                data[key] = CuboConteos.cargar(os.path.join(directorio, key))
+            if manifest.get('sqlite'):
+                data['sql'] = SesionSQLite(os.path.join(directorio, manifest['sqlite']))
+
+            print("Datos cargados desde cache correctamente")
+            return data
         except Exception as e:
             print(f"Error al cargar desde cache: {str(e)}")
             return None
 
     @staticmethod
-    def _should_update_cache():
-        """Verifica si se debe actualizar el caché"""
-        try:
-            # Si el archivo de caché no existe
-            if not os.path.exists(CACHE_FILE):
-                return True
-            
-            # Si el archivo Excel es más reciente que el caché
-            excel_modified = os.path.getmtime(DATA_FILE)
-            cache_modified = os.path.getmtime(CACHE_FILE)
-            return excel_modified > cache_modified
-        except:
-            return True
+    def attach_cache(timeout=None):
+        """Modo worker: usa el caché que publica el proceso cargador sin procesar el Excel.
+
+        Todo se mapea en memoria de solo lectura, así que las páginas se comparten entre
+        procesos. Las filas crudas no se cargan porque los callbacks solo usan el cubo y los
+        agregados. Si el cargador publica una versión mientras se lee, se vuelve a intentar."""
+        inicio = time.monotonic()
+        while True:
+            manifest = DataManager._load_manifest()
+            if manifest is not None:
+                data = DataManager._load_from_cache(manifest, omitir=ATTACH_SKIP_FRAMES)
+                if data is not None and DataManager._load_manifest() == manifest:
+                    return data
+            if timeout is not None and time.monotonic() - inicio > timeout:
+                raise TimeoutError(f"No hay un caché publicado en {CACHE_DIR}")
+            print("Esperando a que el proceso cargador publique el caché...")
+            time.sleep(1)
 
     @staticmethod
-    def initialize_data():
-        """Inicializa los datos, usando caché si está disponible"""
-        # Verificar si podemos usar el caché
-        if not DataManager._should_update_cache():
-            cached_data = DataManager._load_from_cache()
-            if cached_data is not None:
-                print("Usando datos en caché...")
-                return cached_data
+    def _huella_archivo(file_path):
+        """Huella blake2b del contenido del archivo: copiarlo o sincronizarlo no la cambia"""
+        huella = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for bloque in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                huella.update(bloque)
+        return huella.hexdigest()
 
-        print("Procesando datos desde Excel...")
-        # Cargar datos iniciales
-        data = Queries.get_inscripciones_data(DATA_FILE)
-        
-        # Obtener métricas
-        df_metricas = Queries.get_metricas(data)
-        total_estudiantes = int(df_metricas[df_metricas["categoria"] == "total_estudiantes"]["valor"].values[0])
-        total_instituciones = int(df_metricas[df_metricas["categoria"] == "total_instituciones"]["valor"].values[0])
-        total_personal = int(df_metricas[df_metricas["categoria"] == "total_personal"]["valor"].values[0])
+    @staticmethod
+    def _sello_codigo(partes):
+        """Sello de versión de un artefacto a partir del código fuente que lo produce"""
+        huella = hashlib.blake2b(digest_size=16)
+        for parte in partes:
+            if inspect.ismodule(parte) or inspect.isclass(parte) or inspect.isfunction(parte):
+                huella.update(inspect.getsource(parte).encode('utf-8'))
+            else:
+                huella.update(repr(parte).encode('utf-8'))
+        return huella.hexdigest()
+
+    @staticmethod
+    def _leer_incremental(cached_data):
+        """Si el Excel solo creció añadiendo filas al final, lee únicamente las filas nuevas y
+        las suma al caché. Devuelve (data, cubo, marca, nuevas) o None si hace falta reprocesar todo"""
+        marca_previa = cached_data.get('ingesta')
+        if not marca_previa:
+            return None
+        marca, solo_anexado = leer_marca(DATA_FILE, marca_previa)
+        if not solo_anexado:
+            print("El Excel cambió en filas ya procesadas, se reprocesa completo")
+            return None
 
-        # Obtener datos para gráficos
+        nuevas = leer_filas_nuevas(DATA_FILE, marca_previa['filas'])
+        if len(nuevas) != marca['filas'] - marca_previa['filas']:
+            return None
+        print(f"Procesando {len(nuevas)} inscripciones nuevas desde Excel...")
+        nuevas = Queries.normalizar_dimensiones(nuevas)
+
+        data = concatenar(cached_data['data'], nuevas)
+        cubo = cached_data['cubo'].combinar(CuboConteos.construir(nuevas)).indexar()
+        return data, cubo, marca, nuevas
+
+    @staticmethod
+    def _leer_en_bloques():
+        """Lee el Excel completo por bloques: cada bloque se escribe en disco en formato columnar
+        y se suma al cubo, y al final las filas se mapean en memoria. Devuelve (data, cubo)"""
+        shutil.rmtree(INGEST_DIR, ignore_errors=True)
+        escritor = FrameWriter(os.path.join(INGEST_DIR, "data"))
+        cubo = None
+        vacio = None
+        inicio = time.perf_counter()
+        for bloque in Queries.iter_inscripciones_data(DATA_FILE, INGESTA_FILAS_POR_BLOQUE):
+            if len(bloque) == 0:
+                vacio = bloque
+                continue
+            escritor.append(bloque)
+            parcial = CuboConteos.construir(bloque)
+            cubo = parcial if cubo is None else cubo.combinar(parcial)
+        escritor.close()
+        segundos = time.perf_counter() - inicio
+        print(f"Excel leído por bloques: {escritor.rows} filas en {segundos:.1f} s "
+              f"({escritor.rows / max(segundos, 1e-9):,.0f} filas/s)")
+        if cubo is None:
+            if vacio is None:
+                raise ValueError(f"{DATA_FILE} no tiene encabezado")
+            # Hoja con solo el encabezado: sin bloques escritos, las columnas se toman del bloque
+            # vacío ya normalizado para que conserven sus tipos
+            return vacio, CuboConteos.construir(vacio).indexar()
+        return load_frame(os.path.join(INGEST_DIR, "data")), cubo.indexar()
+
+    @staticmethod
+    def _calcular_metricas(data):
+        df_metricas = Queries.get_metricas(data, ["generales"])
+        return {'metricas': {
+            categoria: int(df_metricas[df_metricas["categoria"] == categoria]["valor"].values[0])
+            for categoria in ("total_estudiantes", "total_instituciones", "total_personal")
+        }}
+
+    @staticmethod
+    def _calcular_distribuciones(data):
         zona_labels, zona_values = Queries.get_zona_counts(data)
         tipo_labels, tipo_values = Queries.get_tipo_counts(data)
         departamentos = Queries.get_departamentos(data)
-        municipios = Queries.get_municipios(data)
         rural, urbano = Queries.get_rural_urbano_counts(data, departamentos)
-        trend_data = Queries.get_trend_data(data)
-        deportes_data = Queries.get_deportes_data(data)
-        
-        processed_data = {
-            'data': data,
-            'metricas': {
-                'total_estudiantes': total_estudiantes,
-                'total_instituciones': total_instituciones,
-                'total_personal': total_personal
-            },
+        return {
             'zona': {
                 'labels': zona_labels,
                 'values': zona_values
@@ -151,43 +276,212 @@ class DataManager:
             },
             'ubicacion': {
                 'departamentos': departamentos,
-                'municipios': municipios,
+                'municipios': Queries.get_municipios(data),
                 'rural': rural,
                 'urbano': urbano
-            },
-            'trend_data': trend_data,
-            'deportes_data': deportes_data
+            }
+        }
+
+    @staticmethod
+    def _calcular_tendencia(data):
+        return {'trend_data': Queries.get_trend_data(data)}
+
+    @staticmethod
+    def _calcular_deportes(data):
+        return {'deportes_data': Queries.get_deportes_data(data)}
+
+    # Artefactos derivados de las filas crudas y la función que los calcula
+    DERIVADOS = {
+        "metricas": _calcular_metricas,
+        "distribuciones": _calcular_distribuciones,
+        "trend_data": _calcular_tendencia,
+        "deportes_data": _calcular_deportes,
+    }
+
+    @staticmethod
+    def _sumar_conteos(etiquetas, valores, etiquetas_nuevas, valores_nuevos):
+        """Suma dos conteos por etiqueta, de mayor a menor y los empates en orden alfabético
+        (el de las categorías), como los devuelven los motores"""
+        suma = dict(zip(etiquetas, valores))
+        for etiqueta, valor in zip(etiquetas_nuevas, valores_nuevos):
+            suma[etiqueta] = suma.get(etiqueta, 0) + valor
+        orden = sorted(suma, key=lambda etiqueta: (-suma[etiqueta], etiqueta))
+        return {'labels': orden, 'values': [suma[etiqueta] for etiqueta in orden]}
+
+    @staticmethod
+    def _combinar_metricas(previo, parcial, cubo):
+        metricas = {clave: previo['metricas'][clave] + parcial['metricas'][clave] for clave in previo['metricas']}
+        # Las instituciones distintas no se pueden sumar: salen del cubo ya combinado
+        metricas['total_instituciones'] = cubo.total_instituciones()
+        return {'metricas': metricas}
+
+    @staticmethod
+    def _combinar_distribuciones(previo, parcial, cubo):
+        ubicacion, nueva = previo['ubicacion'], parcial['ubicacion']
+        departamentos = sorted(set(ubicacion['departamentos']) | set(nueva['departamentos']))
+        zonas = {}
+        for zona in ('rural', 'urbano'):
+            suma = dict(zip(ubicacion['departamentos'], ubicacion[zona]))
+            for departamento, valor in zip(nueva['departamentos'], nueva[zona]):
+                suma[departamento] = suma.get(departamento, 0) + valor
+            zonas[zona] = [suma.get(departamento, 0) for departamento in departamentos]
+        return {
+            'zona': DataManager._sumar_conteos(
+                previo['zona']['labels'], previo['zona']['values'], parcial['zona']['labels'], parcial['zona']['values']
+            ),
+            'tipo': DataManager._sumar_conteos(
+                previo['tipo']['labels'], previo['tipo']['values'], parcial['tipo']['labels'], parcial['tipo']['values']
+            ),
+            'ubicacion': {
+                'departamentos': departamentos,
+                'municipios': sorted(set(ubicacion['municipios']) | set(nueva['municipios'])),
+                'rural': zonas['rural'],
+                'urbano': zonas['urbano']
+            }
         }
 
+    @staticmethod
+    def _combinar_tendencia(previo, parcial, cubo):
+        tendencia = (
+            pd.concat([previo['trend_data'], parcial['trend_data']], ignore_index=True)
+            .groupby('Fecha', sort=True)['inscritos'].sum()
+        )
+        return {'trend_data': pd.DataFrame({'Fecha': tendencia.index.to_numpy(dtype=object), 'inscritos': tendencia.to_numpy()})}
+
+    @staticmethod
+    def _combinar_deportes(previo, parcial, cubo):
+        deportes = concatenar(previo['deportes_data'], parcial['deportes_data'])
+        return {'deportes_data': deportes.groupby(['Deporte', 'tipo deporte'], observed=True)['total'].sum().reset_index()}
+
+    # Ingesta incremental: cómo se suman a cada artefacto guardado los de las filas nuevas. Reciben
+    # los datos guardados, los artefactos de las filas nuevas y el cubo ya combinado
+    COMBINAR = {
+        "metricas": _combinar_metricas,
+        "distribuciones": _combinar_distribuciones,
+        "trend_data": _combinar_tendencia,
+        "deportes_data": _combinar_deportes,
+    }
+
+    @staticmethod
+    def _imprimir_resumen(processed_data):
+        """Resumen de una línea de los datos procesados (todas las tablas con RESUMEN_DETALLADO)"""
+        if RESUMEN_DETALLADO:
+            DataManager._imprimir_detalle(processed_data)
+            return
+        metricas = processed_data['metricas']
+        fechas = processed_data['trend_data']['Fecha']
+        rango = f", del {fechas.min()} al {fechas.max()}" if len(fechas) else ""
+        print(
+            f"Datos procesados: {metricas['total_estudiantes']:,} inscritos, "
+            f"{metricas['total_instituciones']:,} instituciones, "
+            f"{len(processed_data['ubicacion']['departamentos'])} departamentos{rango}"
+        )
+
+    @staticmethod
+    def _imprimir_detalle(processed_data):
+        metricas = processed_data['metricas']
+        ubicacion = processed_data['ubicacion']
         print("\n=== DATOS PROCESADOS ===")
         print("\nMétricas:")
-        print(f"Total Estudiantes: {total_estudiantes}")
-        print(f"Total Instituciones: {total_instituciones}")
-        print(f"Total Personal: {total_personal}")
+        print(f"Total Estudiantes: {metricas['total_estudiantes']}")
+        print(f"Total Instituciones: {metricas['total_instituciones']}")
+        print(f"Total Personal: {metricas['total_personal']}")
         
         print("\nDatos por Zona:")
-        for label, value in zip(zona_labels, zona_values):
+        for label, value in zip(processed_data['zona']['labels'], processed_data['zona']['values']):
             print(f"{label}: {value}")
             
         print("\nDatos por Tipo:")
-        for label, value in zip(tipo_labels, tipo_values):
+        for label, value in zip(processed_data['tipo']['labels'], processed_data['tipo']['values']):
             print(f"{label}: {value}")
             
         print("\nDatos de Tendencia:")
-        print(trend_data)
+        print(processed_data['trend_data'])
             
         print("\nDatos de Deportes:")
-        print(deportes_data)
+        print(processed_data['deportes_data'])
         
         print("\nDatos por Ubicación:")
-        print(f"Departamentos: {departamentos}")
+        print(f"Departamentos: {ubicacion['departamentos']}")
         print(f"Rural vs Urbano:")
-        for dep, (r, u) in zip(departamentos, zip(rural, urbano)):
+        for dep, (r, u) in zip(ubicacion['departamentos'], zip(ubicacion['rural'], ubicacion['urbano'])):
             print(f"{dep}: Rural={r}, Urbano={u}")
         
         print("\n=====================")
 
+    @staticmethod
+    def initialize_data():
+        """Inicializa los datos reutilizando del caché cada artefacto cuyas entradas no cambiaron:
+        la huella del contenido del Excel y el sello del código que produce el artefacto"""
+        manifest = DataManager._load_manifest()
+        cached_data = DataManager._load_from_cache(manifest) if manifest else None
+
+        if not os.path.exists(DATA_FILE):
+            if cached_data is None:
+                raise FileNotFoundError(f"No existe {DATA_FILE} ni un caché utilizable")
+            print(f"No se encontró {DATA_FILE}, usando datos en caché...")
+            return cached_data
+
+        fuente = DataManager._huella_archivo(DATA_FILE)
+        sellos = {nombre: DataManager._sello_codigo(partes) for nombre, partes in CODIGO_ARTEFACTOS.items()}
+        previos = manifest.get('artifacts', {}) if cached_data is not None else {}
+
+        if cached_data is not None and manifest.get('source_hash') == fuente and previos.get('data') == sellos['data']:
+            processed_data = cached_data
+            recalcular = [nombre for nombre in DataManager.DERIVADOS if previos.get(nombre) != sellos[nombre]]
+            # La base SQLite se vuelve a crear si se pide y falta o cambió su código
+            sqlite_vigente = QUERY_BACKEND != "sqlite" or (manifest.get('sqlite') and previos.get('sqlite') == sellos['sqlite'])
+            if not recalcular and sqlite_vigente:
+                print("Usando datos en caché...")
+                return processed_data
+            # Las filas crudas no cambiaron: la versión nueva reutiliza sus bloques
+            anterior, nuevas = manifest, None
+        else:
+            incremental = None
+            if INGESTA_INCREMENTAL and cached_data is not None and previos.get('data') == sellos['data']:
+                try:
+                    incremental = DataManager._leer_incremental(cached_data)
+                except Exception as e:
+                    print(f"Error al leer las filas nuevas, se reprocesa completo: {str(e)}")
+
+            recalcular = list(DataManager.DERIVADOS)
+            if incremental is not None:
+                data, cubo, marca, nuevas = incremental
+                processed_data = {'ingesta': marca, 'data': data, 'cubo': cubo}
+                # Los artefactos cuyo código no cambió suman los de las filas nuevas a los guardados
+                combinar = [nombre for nombre in recalcular if previos.get(nombre) == sellos[nombre]]
+                print(f"Sumando las filas nuevas a: {', '.join(combinar)}")
+                for nombre in combinar:
+                    parcial = DataManager.DERIVADOS[nombre](nuevas)
+                    processed_data.update(DataManager.COMBINAR[nombre](cached_data, parcial, cubo))
+                recalcular = [nombre for nombre in recalcular if nombre not in combinar]
+                anterior = manifest
+            else:
+                print("Procesando datos desde Excel...")
+                # Cargar datos iniciales junto con el cubo de conteos que responde a los filtros
+                data, cubo = DataManager._leer_en_bloques()
+                marca, _ = leer_marca(DATA_FILE)
+                if marca['filas'] != len(data):
+                    marca = None  # Hoja con filas vacías o saltos: sin lectura incremental
+                processed_data = {'ingesta': marca, 'data': data, 'cubo': cubo}
+                anterior, nuevas = None, None
+
+        if recalcular:
+            print(f"Recalculando: {', '.join(recalcular)}")
+        for nombre in recalcular:
+            processed_data.update(DataManager.DERIVADOS[nombre](processed_data['data']))
+        processed_data['version'] = datetime.now().isoformat()
+
+        DataManager._imprimir_resumen(processed_data)
+
         # Guardar en caché
-        DataManager._save_to_cache(processed_data)
+        directorio = DataManager._save_to_cache(processed_data, fuente, sellos, anterior, nuevas)
+        if os.path.exists(INGEST_DIR):
+            # Las filas pasan a mapearse desde el caché y los bloques de la ingesta sobran
+            processed_data['data'] = load_frame(os.path.join(directorio, "data", "0"))
+            shutil.rmtree(INGEST_DIR, ignore_errors=True)
+        processed_data.pop('sql', None)
+        if QUERY_BACKEND == "sqlite":
+            processed_data['sql'] = SesionSQLite(os.path.join(directorio, SQLITE_FILE))
         
-        return processed_data 
\ No newline at end of file
+        return processed_data
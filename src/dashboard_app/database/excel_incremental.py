@@ -0,0 +1,120 @@
+import hashlib
+import io
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+import pandas as pd
+
+# Un .xlsx es un zip de XML: las filas de la hoja son fragmentos <row>...</row> en orden y las
+# cadenas compartidas son fragmentos <si>...</si>. Comparar los bytes de esos fragmentos permite
+# saber si las filas ya procesadas siguen iguales sin convertir ninguna celda.
+
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+SHARED_STRINGS = "xl/sharedStrings.xml"
+BLOCK_SIZE = 1 << 20
+ROW_REF = re.compile(rb'( r="[A-Z]*)\d+(")')
+
+
+def _primera_hoja(archivo: zipfile.ZipFile) -> str:
+    """Ruta dentro del zip de la primera hoja del libro (la que lee pd.read_excel por defecto)"""
+    libro = ET.fromstring(archivo.read("xl/workbook.xml"))
+    rel_id = libro.find(f"{NS_MAIN}sheets/{NS_MAIN}sheet").get(f"{NS_REL}id")
+    relaciones = ET.fromstring(archivo.read("xl/_rels/workbook.xml.rels"))
+    destino = next(rel.get("Target") for rel in relaciones if rel.get("Id") == rel_id)
+    if destino.startswith("/"):
+        return destino.lstrip("/")
+    return posixpath.normpath(posixpath.join("xl", destino))
+
+
+def _fragmentos(stream, cierre: bytes):
+    """Divide un XML en fragmentos terminados en `cierre`; el último es el resto del documento"""
+    resto = b""
+    while True:
+        bloque = stream.read(BLOCK_SIZE)
+        if not bloque:
+            break
+        partes = (resto + bloque).split(cierre)
+        resto = partes.pop()
+        for parte in partes:
+            yield parte + cierre
+    yield resto
+
+
+def _huella_prefijo(archivo: zipfile.ZipFile, miembro: str, cierre: bytes, cantidad: int, inicio: bytes = None):
+    """Cuenta los fragmentos de un miembro y calcula la huella de los `cantidad` primeros y de todos.
+    Si `inicio` se indica, lo anterior a ese marcador en el primer fragmento no entra en la huella"""
+    huella = hashlib.blake2b(digest_size=16)
+    huella_prefijo = huella.hexdigest() if cantidad == 0 else None
+    total = 0
+    with archivo.open(miembro) as stream:
+        for fragmento in _fragmentos(stream, cierre):
+            if not fragmento.endswith(cierre):
+                break
+            if total == 0 and inicio is not None:
+                fragmento = fragmento[max(fragmento.find(inicio), 0):]
+            huella.update(fragmento)
+            total += 1
+            if total == cantidad:
+                huella_prefijo = huella.hexdigest()
+    return total, huella.hexdigest(), huella_prefijo
+
+
+def leer_marca(file_path: str, marca_previa: dict = None):
+    """Calcula la marca de agua del archivo: filas de datos, cadenas compartidas y sus huellas.
+
+    Con `marca_previa` devuelve además si las filas y cadenas que cubría siguen intactas,
+    es decir, si el archivo solo ha crecido añadiendo filas al final."""
+    filas_previas = marca_previa['filas'] + 1 if marca_previa else 0  # +1 por la fila de encabezado
+    cadenas_previas = marca_previa['cadenas'] if marca_previa else 0
+
+    with zipfile.ZipFile(file_path) as archivo:
+        hoja = _primera_hoja(archivo)
+        filas, huella, huella_filas = _huella_prefijo(archivo, hoja, b"</row>", filas_previas, b"<sheetData")
+        cadenas, huella_cadenas, prefijo_cadenas = 0, None, None
+        if SHARED_STRINGS in archivo.namelist():
+            cadenas, huella_cadenas, prefijo_cadenas = _huella_prefijo(archivo, SHARED_STRINGS, b"</si>", cadenas_previas, b"<si")
+
+    marca = {
+        'filas': filas - 1,
+        'huella': huella,
+        'cadenas': cadenas,
+        'huella_cadenas': huella_cadenas
+    }
+    solo_anexado = bool(marca_previa) and filas >= filas_previas and cadenas >= cadenas_previas \
+        and huella_filas == marca_previa['huella'] \
+        and (cadenas_previas == 0 or prefijo_cadenas == marca_previa['huella_cadenas'])
+    return marca, solo_anexado
+
+
+def leer_filas_nuevas(file_path: str, desde: int) -> pd.DataFrame:
+    """Lee solo las filas de datos posteriores a `desde`.
+
+    Copia el libro cambiando la hoja por una que contiene el encabezado y las filas nuevas
+    (renumeradas), y lo pasa a pd.read_excel para obtener los mismos tipos que la lectura completa."""
+    with zipfile.ZipFile(file_path) as archivo:
+        hoja = _primera_hoja(archivo)
+        partes = []
+        fila = 0
+        with archivo.open(hoja) as stream:
+            for fragmento in _fragmentos(stream, b"</row>"):
+                if not fragmento.endswith(b"</row>"):
+                    partes.append(fragmento)  # cierre de sheetData y resto de la hoja
+                elif fila == 0:
+                    partes.append(fragmento)  # inicio de la hoja y fila de encabezado
+                elif fila > desde:
+                    numero = str(len(partes) + 1).encode()
+                    partes.append(ROW_REF.sub(lambda m: m.group(1) + numero + m.group(2), fragmento))
+                fila += 1
+
+        salida = io.BytesIO()
+        with zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as copia:
+            for miembro in archivo.infolist():
+                if miembro.filename == hoja:
+                    copia.writestr(miembro, b"".join(partes))
+                else:
+                    copia.writestr(miembro, archivo.read(miembro.filename))
+
+    salida.seek(0)
+    return pd.read_excel(salida)
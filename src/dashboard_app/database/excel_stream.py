@@ -0,0 +1,64 @@
+import pandas as pd
+import numpy as np
+from pandas.io.parsers import TextParser
+
+# Tipos de celda de openpyxl.cell.cell; openpyxl solo se importa al leer un libro, no al
+# cargar los datos desde el caché
+TYPE_ERROR = "e"
+TYPE_NUMERIC = "n"
+
+
+def _convertir_celda(celda):
+    """Convierte una celda igual que el lector openpyxl de pd.read_excel"""
+    if celda.value is None:
+        return ""
+    if celda.data_type == TYPE_ERROR:
+        return np.nan
+    if celda.data_type == TYPE_NUMERIC:
+        valor = int(celda.value)
+        return valor if valor == celda.value else float(celda.value)
+    return celda.value
+
+
+def _a_dataframe(encabezado, filas) -> pd.DataFrame:
+    """Interpreta un bloque de filas con el mismo parser que usa pd.read_excel"""
+    ancho = len(encabezado)
+    filas = [fila[:ancho] + [""] * (ancho - len(fila)) for fila in filas]
+    return TextParser([encabezado] + filas, header=0, skip_blank_lines=False).read()
+
+
+def leer_bloques(file_path: str, filas_por_bloque: int):
+    """Recorre la primera hoja en modo solo lectura y genera DataFrames de como mucho
+    `filas_por_bloque` filas, así que nunca se tiene el libro completo en memoria. Una hoja
+    con solo el encabezado genera un único bloque vacío con sus columnas, como read_excel"""
+    from openpyxl import load_workbook
+    libro = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        hoja = libro.worksheets[0]
+        hoja.reset_dimensions()
+        encabezado = None
+        filas = []
+        vacias = []
+        bloques = 0
+        for fila in hoja.rows:
+            valores = [_convertir_celda(celda) for celda in fila]
+            while valores and valores[-1] == "":
+                valores.pop()
+            if encabezado is None:
+                encabezado = valores
+                continue
+            if not valores:
+                # Las filas vacías solo cuentan si después hay más datos (read_excel recorta las finales)
+                vacias.append(valores)
+                continue
+            filas.extend(vacias)
+            vacias = []
+            filas.append(valores)
+            if len(filas) >= filas_por_bloque:
+                yield _a_dataframe(encabezado, filas)
+                bloques += 1
+                filas = []
+        if filas or (encabezado is not None and not bloques):
+            yield _a_dataframe(encabezado, filas)
+    finally:
+        libro.close()
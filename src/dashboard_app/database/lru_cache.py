@@ -0,0 +1,97 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+# Cachés vivas: en un proceso hijo (fork) se recrean sus locks, que pudieron copiarse
+# tomados por otro hilo del servidor
+_caches = weakref.WeakSet()
+
+
+def _tras_fork():
+    for cache in _caches:
+        cache._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_tras_fork)
+
+
+class LRUCache:
+    """Cache en memoria con política LRU, compartida entre callbacks y sesiones.
+
+    Se puede limitar por número de entradas, por tamaño (`max_bytes`, medido con `sizeof`)
+    o por ambos."""
+
+    def __init__(self, max_entries=32, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def get(self, key):
+        """Devuelve el valor guardado (sin copiarlo) o None si no está en caché"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        """Guarda un valor y descarta las entradas menos usadas si se supera algún límite"""
+        size = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._sizes[key]
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            self._entries.move_to_end(key)
+            while len(self._entries) > 1 and self._over_limit():
+                old_key, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+
+    def get_or_compute(self, key, compute):
+        """Devuelve el valor guardado o lo calcula y lo guarda"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _over_limit(self):
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Contadores de uso de la caché"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def __contains__(self, key):
+        """Indica si la clave está guardada, sin contarlo como consulta ni renovarla"""
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,50 +1,149 @@
+import numpy as np
 import pandas as pd
+from transformers.agregados_general import calcular_agregados_general
 from transformers.kpi_metrics import MetricasInscritos
+from transformers.motores import obtener_motor
+from .excel_stream import leer_bloques
+
+# Columnas de dimensión que se guardan como categóricas (códigos enteros + categorías)
+COLUMNAS_DIMENSION = [
+    'Departamento Deportista',
+    'Municipio Deportista',
+    'Zona',
+    'Género',
+    'tipo deporte',
+    'Deporte',
+    'Nombre Institución'
+]
+COLUMNAS_MINUSCULAS = ['Zona', 'tipo deporte']
+
+# Columna de fecha que se convierte a datetime64 al leer, para no volver a interpretarla
+COLUMNA_FECHA = 'Fecha de Registro'
+
+class ConsultasPandas:
+    """Backend de consultas sobre las filas crudas en memoria, con la misma interfaz que el
+    cubo de conteos y SesionSQLite (filtrar, contar, valores, total y total_instituciones).
+    Cada consulta recorre todas las filas de la selección"""
+
+    def __init__(self, data: pd.DataFrame, ubicacion=None):
+        self.data = data
+        self._ubicacion = ubicacion  # máscara de departamento y municipio, o None
+
+    def filtrar(self, departamentos=None, municipios=None):
+        """Departamentos y municipios vacíos no filtran"""
+        ubicacion = self._ubicacion
+        for columna, seleccion in (('Departamento Deportista', departamentos), ('Municipio Deportista', municipios)):
+            if seleccion:
+                mascara = self.data[columna].isin(seleccion).to_numpy()
+                ubicacion = mascara if ubicacion is None else ubicacion & mascara
+        return ConsultasPandas(self.data, ubicacion)
+
+    def _filas(self) -> pd.DataFrame:
+        if self._ubicacion is None:
+            return self.data
+        return self.data[self._ubicacion]
+
+    @staticmethod
+    def _columna(data, nombre):
+        if nombre == 'Fecha':
+            return data[COLUMNA_FECHA].dt.normalize().rename('Fecha')
+        return data[nombre]
+
+    def contar(self, por) -> pd.Series:
+        """Inscritos por las dimensiones indicadas (los valores nulos se descartan)"""
+        data = self._filas()
+        nombres = [por] if isinstance(por, str) else list(por)
+        claves = [self._columna(data, nombre) for nombre in nombres]
+        return data.groupby(claves if len(claves) > 1 else claves[0], observed=True).size().rename("total")
+
+    def valores(self, dimension):
+        """Valores distintos y no nulos de una dimensión, ordenados"""
+        return sorted(self._columna(self._filas(), dimension).dropna().unique().tolist())
+
+    def total(self) -> int:
+        return len(self._filas())
+
+    def total_instituciones(self) -> int:
+        return int(self._filas()['Nombre Institución'].nunique())
+
+
+def _motor(nombre=None):
+    """Motor de DataFrame de las consultas sobre las filas crudas: el de DATAFRAME_ENGINE
+    salvo que se pida otro ("pandas", "numpy" o "polars")"""
+    return obtener_motor(nombre)
+
 
 class QueriesInscripciones:
     @staticmethod
     def get_inscripciones_data(file_path: str) -> pd.DataFrame:
         data = pd.read_excel(file_path)
-        data['tipo deporte'] = data['tipo deporte'].str.strip().str.lower()
+        return QueriesInscripciones.normalizar_dimensiones(data)
+
+    @staticmethod
+    def iter_inscripciones_data(file_path: str, filas_por_bloque: int):
+        """Lee el Excel por bloques de filas ya normalizados, con memoria acotada por el bloque"""
+        for bloque in leer_bloques(file_path, filas_por_bloque):
+            yield QueriesInscripciones.normalizar_dimensiones(bloque)
+
+    @staticmethod
+    def normalizar_dimensiones(data: pd.DataFrame) -> pd.DataFrame:
+        """Normaliza una sola vez las columnas de dimensión y las convierte a categóricas,
+        para que filtros y conteos trabajen sobre códigos enteros; la fecha de registro
+        se interpreta aquí y se guarda como datetime64"""
+        for columna in COLUMNAS_DIMENSION:
+            valores = data[columna]
+            if valores.dtype != object:
+                # Columna sin texto (p. ej. toda vacía, que pandas lee como float64 con NaN): se
+                # pasa a texto conservando los nulos para poder usar .str
+                valores = valores.astype('string').astype(object).where(valores.notna(), np.nan)
+            valores = valores.str.strip()
+            if columna in COLUMNAS_MINUSCULAS:
+                valores = valores.str.lower()
+            data[columna] = valores.astype('category')
+        data[COLUMNA_FECHA] = pd.to_datetime(data[COLUMNA_FECHA])
         return data
 
     @staticmethod
-    def get_metricas(data: pd.DataFrame):
-        metricas = MetricasInscritos(data)
-        return metricas.construir_metricas()
+    def get_agregados_filtro(consultas, departamentos=None, municipios=None) -> dict:
+        """Agregados de la página General para una selección, resueltos en el backend de
+        consultas (cubo de conteos, SesionSQLite o ConsultasPandas)"""
+        return calcular_agregados_general(consultas.filtrar(departamentos, municipios))
+
+    @staticmethod
+    def get_metricas(data: pd.DataFrame, categorias=None, motor=None):
+        metricas = MetricasInscritos(data, _motor(motor))
+        return metricas.construir_metricas(categorias)
 
     @staticmethod
-    def get_zona_counts(data: pd.DataFrame):
-        zona_counts = data['Zona'].value_counts()
+    def get_zona_counts(data: pd.DataFrame, motor=None):
+        zona_counts = _motor(motor).conteo(data, 'Zona')
         return zona_counts.index.tolist(), zona_counts.values.tolist()
 
     @staticmethod
-    def get_tipo_counts(data: pd.DataFrame):
-        tipo_counts = data['tipo deporte'].value_counts()
+    def get_tipo_counts(data: pd.DataFrame, motor=None):
+        tipo_counts = _motor(motor).conteo(data, 'tipo deporte')
         return tipo_counts.index.tolist(), tipo_counts.values.tolist()
 
     @staticmethod
-    def get_departamentos(data: pd.DataFrame):
-        return sorted(data['Departamento Deportista'].dropna().unique().tolist())
+    def get_departamentos(data: pd.DataFrame, motor=None):
+        return _motor(motor).valores(data, 'Departamento Deportista')
 
     @staticmethod
-    def get_municipios(data: pd.DataFrame):
-        return sorted(data['Municipio Deportista'].dropna().unique().tolist())
+    def get_municipios(data: pd.DataFrame, motor=None):
+        return _motor(motor).valores(data, 'Municipio Deportista')
 
     @staticmethod
-    def get_rural_urbano_counts(data: pd.DataFrame, departamentos):
-        rural_counts = data[data['Zona'].str.lower() == 'rural']['Departamento Deportista'].value_counts()
-        urbano_counts = data[data['Zona'].str.lower() == 'urbano']['Departamento Deportista'].value_counts()
-        rural = [rural_counts.get(dep, 0) for dep in departamentos]
-        urbano = [urbano_counts.get(dep, 0) for dep in departamentos]
+    def get_rural_urbano_counts(data: pd.DataFrame, departamentos, motor=None):
+        conteos = _motor(motor).conteo_cruzado(data, ['Zona', 'Departamento Deportista']).to_dict()
+        rural = [conteos.get(('rural', dep), 0) for dep in departamentos]
+        urbano = [conteos.get(('urbano', dep), 0) for dep in departamentos]
         return rural, urbano
 
     @staticmethod
-    def get_trend_data(data: pd.DataFrame):
-        trend_data = data.copy()
-        trend_data['Fecha'] = pd.to_datetime(trend_data['Fecha de Registro']).dt.date
-        return trend_data.groupby('Fecha').size().reset_index(name='inscritos')
+    def get_trend_data(data: pd.DataFrame, motor=None):
+        tendencia = _motor(motor).conteo_por_dia(data, COLUMNA_FECHA)
+        return pd.DataFrame({'Fecha': tendencia.index.date, 'inscritos': tendencia.to_numpy()})
 
     @staticmethod
-    def get_deportes_data(data: pd.DataFrame):
-        return data.groupby(['Deporte', 'tipo deporte']).size().reset_index(name='total')
+    def get_deportes_data(data: pd.DataFrame, motor=None):
+        return _motor(motor).conteo_cruzado(data, ['Deporte', 'tipo deporte']).reset_index(name='total')
@@ -0,0 +1,52 @@
+import os
+import threading
+from .data_manager import DataManager
+from config import DATA_FILE
+
+
+class DataRefresher(threading.Thread):
+    """Hilo que vigila un archivo y, cuando cambia, vuelve a cargar los datos fuera de las
+    peticiones y publica la nueva versión en el snapshot.
+
+    Por defecto vigila DATA_FILE y reconstruye con DataManager.initialize_data; los workers
+    vigilan el puntero a la versión publicada del caché y se enganchan con
+    DataManager.attach_cache."""
+
+    def __init__(self, snapshot, interval: float, watch_file: str = DATA_FILE, load=DataManager.initialize_data):
+        super().__init__(name="data-refresher", daemon=True)
+        self.snapshot = snapshot
+        self.interval = interval
+        self.watch_file = watch_file
+        self.load = load
+        self._stop_event = threading.Event()
+        self._signature = self._file_signature()
+
+    def _file_signature(self):
+        """Fecha de modificación y tamaño del archivo vigilado; None si no existe"""
+        try:
+            stat = os.stat(self.watch_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self):
+        """Vuelve a cargar los datos y los publica si la versión cambió"""
+        data = self.load()
+        if data['version'] != self.snapshot.get()['version']:
+            self.snapshot.publish(data)
+            print(f"Datos actualizados a la versión {data['version']}")
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            signature = self._file_signature()
+            if signature is None or signature == self._signature:
+                continue
+            self._signature = signature
+            try:
+                self.refresh()
+            except Exception as e:
+                # Se sigue sirviendo la versión anterior
+                print(f"Error al recargar los datos: {str(e)}")
+
+    def stop(self):
+        self._stop_event.set()
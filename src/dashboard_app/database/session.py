@@ -0,0 +1,154 @@
+import os
+import shutil
+import sqlite3
+import threading
+import pandas as pd
+
+# Columnas de la tabla de inscripciones y su nombre en los DataFrames; "Fecha" es la fecha de
+# registro sin hora, como en el cubo de conteos
+COLUMNAS_SQL = {
+    'Departamento Deportista': 'departamento',
+    'Municipio Deportista': 'municipio',
+    'Zona': 'zona',
+    'Género': 'genero',
+    'tipo deporte': 'tipo',
+    'Deporte': 'deporte',
+    'Nombre Institución': 'institucion',
+    'Fecha': 'fecha'
+}
+COLUMNAS_INDICE = ['departamento', 'municipio', 'fecha']
+
+
+class SesionSQLite:
+    """Base SQLite embebida con una fila por inscripción, creada en la ingesta junto al caché.
+
+    Responde a las mismas consultas que el cubo de conteos (filtrar, contar, valores, total
+    y total_instituciones), así que calcular_agregados_general funciona igual sobre ella: los
+    filtros y las agrupaciones se resuelven en SQL con los índices de departamento, municipio
+    y fecha. La base no cambia después de publicarse, así que se abre en modo inmutable con
+    una conexión de solo lectura por hilo (y por proceso, para los trabajos con fork)."""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._local = threading.local()
+
+    @classmethod
+    def crear(cls, ruta: str, data: pd.DataFrame, filas_por_bloque: int = 50_000):
+        """Crea la base a partir de las filas normalizadas de la ingesta y la indexa"""
+        conexion = sqlite3.connect(ruta)
+        try:
+            with conexion:
+                conexion.execute("PRAGMA journal_mode = OFF")
+                conexion.execute("PRAGMA synchronous = OFF")
+                conexion.execute(f"CREATE TABLE inscripciones ({', '.join(f'{c} TEXT' for c in COLUMNAS_SQL.values())})")
+                cls._insertar(conexion, data, filas_por_bloque)
+                for columna in COLUMNAS_INDICE:
+                    conexion.execute(f"CREATE INDEX idx_{columna} ON inscripciones ({columna})")
+                conexion.execute("ANALYZE")
+        finally:
+            conexion.close()
+        return cls(ruta)
+
+    @classmethod
+    def anexar(cls, origen: str, ruta: str, nuevas: pd.DataFrame, filas_por_bloque: int = 50_000):
+        """Crea en `ruta` una copia de la base de `origen` con las filas nuevas añadidas. La base
+        publicada no se modifica: sus lectores la abren como inmutable"""
+        shutil.copyfile(origen, ruta)
+        conexion = sqlite3.connect(ruta)
+        try:
+            with conexion:
+                conexion.execute("PRAGMA journal_mode = OFF")
+                conexion.execute("PRAGMA synchronous = OFF")
+                cls._insertar(conexion, nuevas, filas_por_bloque)
+                conexion.execute("ANALYZE")
+        finally:
+            conexion.close()
+        return cls(ruta)
+
+    @staticmethod
+    def _insertar(conexion: sqlite3.Connection, data: pd.DataFrame, filas_por_bloque: int):
+        insertar = f"INSERT INTO inscripciones VALUES ({', '.join('?' * len(COLUMNAS_SQL))})"
+        for inicio in range(0, len(data), filas_por_bloque):
+            bloque = data.iloc[inicio:inicio + filas_por_bloque]
+            valores = []
+            for columna in COLUMNAS_SQL:
+                if columna == 'Fecha':
+                    serie = bloque['Fecha de Registro'].dt.strftime('%Y-%m-%d')
+                else:
+                    serie = bloque[columna].astype(object)
+                valores.append(serie.where(serie.notna(), None).tolist())
+            conexion.executemany(insertar, zip(*valores))
+
+    def conexion(self) -> sqlite3.Connection:
+        """Conexión de solo lectura del hilo actual"""
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.conexion = sqlite3.connect(f"file:{self.ruta}?mode=ro&immutable=1", uri=True)
+            self._local.pid = os.getpid()
+        return self._local.conexion
+
+    def filtrar(self, departamentos=None, municipios=None):
+        return ConsultaSQLite(self).filtrar(departamentos, municipios)
+
+    def contar(self, por) -> pd.Series:
+        return ConsultaSQLite(self).contar(por)
+
+    def valores(self, dimension):
+        return ConsultaSQLite(self).valores(dimension)
+
+    def total(self) -> int:
+        return ConsultaSQLite(self).total()
+
+    def total_instituciones(self) -> int:
+        return ConsultaSQLite(self).total_instituciones()
+
+
+class ConsultaSQLite:
+    """Selección de la base: acumula las condiciones y las envía a SQLite en cada consulta"""
+
+    def __init__(self, sesion: SesionSQLite, ubicacion=()):
+        self.sesion = sesion
+        self._ubicacion = list(ubicacion)  # [(condición, parámetros)]
+
+    def filtrar(self, departamentos=None, municipios=None):
+        """Departamentos y municipios vacíos no filtran"""
+        ubicacion = list(self._ubicacion)
+        for columna, seleccion in (('departamento', departamentos), ('municipio', municipios)):
+            if seleccion:
+                ubicacion.append((f"{columna} IN ({', '.join('?' * len(seleccion))})", list(seleccion)))
+        return ConsultaSQLite(self.sesion, ubicacion)
+
+    def _consultar(self, select, condiciones=(), agrupar=None):
+        filtros = self._ubicacion + [(c, []) for c in condiciones]
+        sql = f"SELECT {select} FROM inscripciones"
+        if filtros:
+            sql += " WHERE " + " AND ".join(condicion for condicion, _ in filtros)
+        if agrupar:
+            sql += f" GROUP BY {agrupar} ORDER BY {agrupar}"
+        parametros = [valor for _, valores in filtros for valor in valores]
+        return self.sesion.conexion().execute(sql, parametros).fetchall()
+
+    def contar(self, por) -> pd.Series:
+        """Inscritos por las dimensiones indicadas (los valores nulos se descartan, igual que en el cubo)"""
+        nombres = [por] if isinstance(por, str) else list(por)
+        columnas = [COLUMNAS_SQL[nombre] for nombre in nombres]
+        filas = self._consultar(
+            f"{', '.join(columnas)}, COUNT(*)",
+            condiciones=[f"{columna} IS NOT NULL" for columna in columnas],
+            agrupar=", ".join(columnas)
+        )
+        conteos = pd.DataFrame(filas, columns=nombres + ["total"])
+        if 'Fecha' in nombres:
+            conteos['Fecha'] = pd.to_datetime(conteos['Fecha'])
+        return conteos.set_index(nombres if len(nombres) > 1 else nombres[0])["total"].astype('int64')
+
+    def valores(self, dimension):
+        """Valores distintos y no nulos de una dimensión, ordenados"""
+        columna = COLUMNAS_SQL[dimension]
+        filas = self._consultar(f"DISTINCT {columna}", condiciones=[f"{columna} IS NOT NULL"])
+        return sorted(valor for valor, in filas)
+
+    def total(self) -> int:
+        return self._consultar("COUNT(*)")[0][0]
+
+    def total_instituciones(self) -> int:
+        return self._consultar("COUNT(DISTINCT institucion)")[0][0]
@@ -0,0 +1,59 @@
+import os
+import threading
+
+
+class DataSnapshot:
+    """Referencia a los datos procesados vigentes.
+
+    Al recargar se sustituye el diccionario completo en lugar de modificarlo, así que un
+    callback que lee el snapshot una vez trabaja con una versión coherente hasta terminar.
+
+    Con `provisional=True` los datos iniciales son solo la instantánea de arranque (sin el
+    cubo) y wait() espera a que se publiquen los datos completos. Si su carga falla, fail()
+    hace que wait() lance el error hasta que se publiquen. En un proceso hijo creado con fork
+    (los callbacks en segundo plano) no hay hilo de carga, así que wait() no espera."""
+
+    def __init__(self, data=None, provisional=False):
+        self._data = data
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._error = None
+        self._pid = os.getpid()
+        if data is not None and not provisional:
+            self._ready.set()
+
+    def get(self):
+        """Devuelve los datos vigentes; no se modifican después de publicarse"""
+        return self._data
+
+    def wait(self, timeout=None):
+        """Devuelve los datos vigentes cuando ya están completos"""
+        if os.getpid() != self._pid and not self._ready.is_set():
+            timeout = 0
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Los datos todavía se están cargando")
+        error = self._error
+        if error is not None:
+            raise RuntimeError(f"No se pudieron cargar los datos: {str(error)}") from error
+        return self._data
+
+    def fail(self, error):
+        """Marca como fallida la carga de los datos completos mientras no se publiquen"""
+        self._error = error
+        self._ready.set()
+
+    def publish(self, data):
+        """Sustituye los datos vigentes y avisa a los suscriptores"""
+        with self._lock:
+            self._data = data
+            self._error = None
+            subscribers = list(self._subscribers)
+        self._ready.set()
+        for subscriber in subscribers:
+            subscriber(data)
+
+    def subscribe(self, subscriber):
+        """Registra una función que se llama con los datos nuevos en cada publicación"""
+        with self._lock:
+            self._subscribers.append(subscriber)
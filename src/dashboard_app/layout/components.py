@@ -1,6 +1,7 @@
-from dash import html, dcc
+import copy
+import numpy as np
+from dash import html, dcc, Patch
 import dash_bootstrap_components as dbc
-import plotly.graph_objects as go
 
 TIPOS_DEPORTE = ["conjunto", "individual", "para deporte"]
 color_map = {
@@ -10,6 +11,159 @@ color_map = {
 }
 
 
+# Plantillas ya construidas por (card_type, line_color); la instantánea de arranque las precarga
+_plantillas = {}
+
+
+def plantillas():
+    """Plantillas construidas hasta ahora, para guardarlas en la instantánea de arranque"""
+    return [[card_type, line_color, figura] for (card_type, line_color), figura in _plantillas.items()]
+
+
+def precargar_plantillas(lista):
+    """Usa plantillas guardadas con plantillas() en lugar de construirlas con plotly"""
+    for card_type, line_color, figura in lista:
+        _plantillas[(card_type, line_color)] = figura
+
+
+def _plantilla_figura(card_type, line_color):
+    """Figura de cada tipo de tarjeta sin datos, construida y validada una sola vez.
+    Las tarjetas parten de una copia y los callbacks solo envían los datos de los trazos"""
+    if (card_type, line_color) not in _plantillas:
+        _plantillas[(card_type, line_color)] = _construir_plantilla(card_type, line_color)
+    return _plantillas[(card_type, line_color)]
+
+
+def _construir_plantilla(card_type, line_color):
+    import plotly.graph_objects as go  # solo hace falta si no hay instantánea de arranque
+    if card_type == "donut":
+        fig = go.Figure()
+        fig.add_trace(go.Pie(
+            labels=[],
+            values=[],
+            hole=0.6,
+            marker_colors=[],
+            textinfo="percent",
+            insidetextorientation='auto'
+        ))
+        fig.update_layout(
+            showlegend=True,
+            margin={"l": 20, "r": 20, "t": 40, "b": 40},
+            font={"family": "Helvetica", "size": 12, "color": "#001226"},
+            legend={"orientation": "v", "x": 1, "y": 0.5, "xanchor": "left"}
+        )
+    elif card_type == "trendline":
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=[],
+            y=[],
+            mode="lines+markers",
+            name="Inscripciones",
+            line={"color": line_color, "width": 2, "shape": "spline"}
+        ))
+        fig.update_layout(
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+            title_pad={"t": 10, "l": 10},
+            xaxis={
+                "title": {"text": "Mes", "font": {"size": 14, "color": "#828282"}},
+                "tickfont": {"size": 12, "color": "#828282"},
+                "gridcolor": "rgba(0,0,0,0)",
+                "showgrid": False,
+                "zeroline": False,
+            },
+            yaxis={
+                "title": {"text": ""},
+                "tickfont": {"size": 12, "color": "#828282"},
+                "gridcolor": "#d3d3d3",
+                "gridwidth": 1,
+                "showgrid": True,
+                "zeroline": False,
+                "griddash": "dash",
+            },
+            margin={"l": 40, "r": 40, "t": 60, "b": 40},
+            font={"family": "Helvetica", "size": 12, "color": "#828282"},
+            hovermode="x unified",
+            legend={
+                "font": {"size": 12, "color": "#828282"},
+                "x": 1,
+                "y": 1,
+                "xanchor": "right",
+                "yanchor": "top",
+            }
+        )
+        fig.add_annotation(
+            xref="paper", yref="paper",
+            x=-0.07, y=1.02,
+            text="No. de inscritos",
+            showarrow=False,
+            font={"size": 14, "color": "#828282", "family": "Helvetica"},
+            align="left"
+        )
+    elif card_type == "bar":
+        fig = go.Figure()
+
+        # Agregar barra para rural
+        fig.add_trace(go.Bar(
+            name='Rural',
+            x=[],
+            y=[],
+            marker_color='#E5C473',
+            customdata=[],
+            hovertemplate='%{customdata[0]}<br>Rural: %{y}<extra></extra>'
+        ))
+
+        # Agregar barra para urbano
+        fig.add_trace(go.Bar(
+            name='Urbano',
+            x=[],
+            y=[],
+            marker_color='#FFA354',
+            customdata=[],
+            hovertemplate='%{customdata[0]}<br>Urbano: %{y}<extra></extra>'
+        ))
+
+        fig.update_layout(
+            barmode='stack',
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            showlegend=True,
+            font={'family': 'Helvetica', 'size': 12, 'color': '#828282'},
+            legend={
+                'orientation': 'h',
+                'x': 0.5,
+                'y': 1.15,
+                'xanchor': 'center'
+            },
+            xaxis=dict(
+                tickangle=-30,
+                automargin=True,
+                title='Departamento',
+                tickfont={'size': 12, 'color': '#828282'},
+                gridcolor='rgba(0,0,0,0)',
+                showgrid=False,
+                zeroline=False
+            ),
+            yaxis=dict(
+                title='No. de inscritos',
+                tickfont={'size': 12, 'color': '#828282'},
+                gridcolor='#d3d3d3',
+                gridwidth=1,
+                showgrid=True,
+                zeroline=False,
+                griddash='dash'
+            ),
+            margin={'l': 40, 'r': 40, 't': 60, 'b': 40}
+        )
+    elif card_type == "deportes_individuales":
+        # Los trazos de cada tipo los agrega el navegador (assets/tipo_deporte.js)
+        fig = go.Figure()
+        fig.update_layout(barmode="group")
+    else:
+        raise ValueError(f"La tarjeta {card_type} no tiene figura")
+    return fig.to_plotly_json()
+
+
 class DashboardCard:
     def __init__(
         self,
@@ -25,7 +179,9 @@ class DashboardCard:
         # Tendencia
         x_data=None, y_data=None, line_color="#5167F1", trend_title=None,
         # Deportes individuales
-        deportes=None, tipo_colores=None
+        deportes=None, tipo_colores=None,
+        # Prefijo de ids para actualizar valores y gráficos sin volver a renderizar la tarjeta
+        component_id=None
     ):
         self.card_type = card_type
         self.icon_path = icon_path
@@ -49,6 +205,54 @@ class DashboardCard:
         self.trend_title = trend_title
         self.deportes = deportes
         self.tipo_colores = tipo_colores
+        self.component_id = component_id
+
+    def _id(self, sufijo):
+        """Argumento id de un componente interno, solo si la tarjeta tiene component_id"""
+        return {"id": f"{self.component_id}-{sufijo}"} if self.component_id else {}
+
+    def figure(self):
+        """Figura de las tarjetas donut, trendline y bar: copia de la plantilla con los datos"""
+        fig = copy.deepcopy(_plantilla_figura(self.card_type, self.line_color))
+        for indice, trazo in self._datos_trazos().items():
+            for propiedad, valor in trazo.items():
+                if isinstance(valor, dict):
+                    fig["data"][indice].setdefault(propiedad, {}).update(valor)
+                else:
+                    fig["data"][indice][propiedad] = valor
+        return fig
+
+    def patch(self):
+        """Actualización parcial de la figura: solo los datos de los trazos que cambian. Se
+        devuelve en su forma JSON (dict) para que orjson la serialice sin el paso de limpieza
+        de plotly, que recorre en Python toda la respuesta si encuentra un objeto desconocido"""
+        figura = Patch()
+        for indice, trazo in self._datos_trazos().items():
+            for propiedad, valor in trazo.items():
+                if isinstance(valor, dict):
+                    for subpropiedad, subvalor in valor.items():
+                        figura["data"][indice][propiedad][subpropiedad] = subvalor
+                else:
+                    figura["data"][indice][propiedad] = valor
+        return figura.to_plotly_json()
+
+    def _datos_trazos(self):
+        """Propiedades de cada trazo que dependen de los datos, por índice de trazo"""
+        if self.card_type == "donut":
+            return {0: {"labels": list(self.labels), "values": list(self.values), "marker": {"colors": list(self.colors)}}}
+        if self.card_type == "trendline":
+            # Arrays de numpy tal cual: orjson serializa las fechas (datetime64) y los números sin convertirlos
+            return {0: {"x": np.asarray(self.x_data), "y": np.asarray(self.y_data)}}
+        if self.card_type == "bar":
+            departamentos = [dep.split()[0] for dep in self.x_data]  # Solo el primer nombre del departamento
+            customdata = [[dep] for dep in self.x_data]
+            return {
+                0: {"x": departamentos, "y": list(self.y_data[0]), "customdata": customdata},  # datos rurales
+                1: {"x": departamentos, "y": list(self.y_data[1]), "customdata": customdata}   # datos urbanos
+            }
+        if self.card_type == "deportes_individuales":
+            return {}
+        raise ValueError(f"La tarjeta {self.card_type} no tiene figura")
 
     def render(self):
         if self.card_type == "metric":
@@ -57,7 +261,7 @@ class DashboardCard:
                     html.Div([
                         html.Img(src=self.icon_path, className="metric-icon"),
                         html.Div([
-                            html.Span(self.value, className="metric-value"),
+                            html.Span(self.value, className="metric-value", **self._id("value")),
                             html.Div([
                                 html.Div(line) for line in self.title_lines
                             ], className="metric-text")
@@ -90,7 +294,7 @@ class DashboardCard:
                             html.Span([
                                 html.Span(self.male_label, className="gender-label"),
                                 html.Br(),
-                                html.Span(f"({self.male_value:,})", className="gender-value")
+                                html.Span(f"({self.male_value:,})", className="gender-value", **self._id("male"))
                             ])
                         ], className="gender-legend-item"),
                         html.Span([
@@ -98,7 +302,7 @@ class DashboardCard:
                             html.Span([
                                 html.Span(self.female_label, className="gender-label"),
                                 html.Br(),
-                                html.Span(f"({self.female_value:,})", className="gender-value")
+                                html.Span(f"({self.female_value:,})", className="gender-value", **self._id("female"))
                             ])
                         ], className="gender-legend-item")
                     ], className="gender-legend")
@@ -107,153 +311,36 @@ class DashboardCard:
             )
 
         elif self.card_type == "donut":
-            fig = go.Figure()
-            fig.add_trace(go.Pie(
-                labels=self.labels,
-                values=self.values,
-                hole=0.6,
-                marker_colors=self.colors,
-                textinfo="percent",
-                insidetextorientation='auto'
-            ))
-            fig.update_layout(
-                showlegend=True,
-                margin={"l": 20, "r": 20, "t": 40, "b": 40},
-                font={"family": "Helvetica", "size": 12, "color": "#001226"},
-                legend={"orientation": "v", "x": 1, "y": 0.5, "xanchor": "left"}
-            )
             return dbc.Card(
                 dbc.CardBody([
                     html.Div([
                         html.H5(self.donut_title, className="dash-card-title"),
                     ], className="donut-title"),
                     html.Div(className="dash-card-divider"),
-                    dcc.Graph(figure=fig, config={"displayModeBar": False}, className="dash-graph")
+                    dcc.Graph(figure=self.figure(), config={"displayModeBar": False}, className="dash-graph", **self._id("graph"))
                 ]),
                 className="dash-card donut-card"
             )
 
         elif self.card_type == "trendline":
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=self.x_data,
-                y=self.y_data,
-                mode="lines+markers",
-                name="Inscripciones",
-                line={"color": self.line_color, "width": 2, "shape": "spline"}
-            ))
-            fig.update_layout(
-                plot_bgcolor="white",
-                paper_bgcolor="white",
-                title_pad={"t": 10, "l": 10},
-                xaxis={
-                    "title": {"text": "Mes", "font": {"size": 14, "color": "#828282"}},
-                    "tickfont": {"size": 12, "color": "#828282"},
-                    "gridcolor": "rgba(0,0,0,0)",
-                    "showgrid": False,
-                    "zeroline": False,
-                },
-                yaxis={
-                    "title": {"text": ""},
-                    "tickfont": {"size": 12, "color": "#828282"},
-                    "gridcolor": "#d3d3d3",
-                    "gridwidth": 1,
-                    "showgrid": True,
-                    "zeroline": False,
-                    "griddash": "dash",
-                },
-                margin={"l": 40, "r": 40, "t": 60, "b": 40},
-                font={"family": "Helvetica", "size": 12, "color": "#828282"},
-                hovermode="x unified",
-                legend={
-                    "font": {"size": 12, "color": "#828282"},
-                    "x": 1,
-                    "y": 1,
-                    "xanchor": "right",
-                    "yanchor": "top",
-                }
-            )
-            fig.add_annotation(
-                xref="paper", yref="paper",
-                x=-0.07, y=1.02,
-                text="No. de inscritos",
-                showarrow=False,
-                font={"size": 14, "color": "#828282", "family": "Helvetica"},
-                align="left"
-            )
             return dbc.Card(
                 dbc.CardBody([
                     html.Div([
                         html.H5(self.trend_title, className="dash-card-title"),
                     ], className="trend-title"),
                     html.Div(className="dash-card-divider"),
-                    dcc.Graph(figure=fig, config={"displayModeBar": False}, className="dash-graph")
+                    dcc.Graph(figure=self.figure(), config={"displayModeBar": False}, className="dash-graph", **self._id("graph"))
                 ]),
                 className="dash-card trend-card"
             )
         elif self.card_type == "bar":
-            fig = go.Figure()
-            
-            # Agregar barra para rural
-            fig.add_trace(go.Bar(
-                name='Rural',
-                x=[dep.split()[0] for dep in self.x_data],  # Solo el primer nombre del departamento
-                y=self.y_data[0],  # datos rurales
-                marker_color='#E5C473',
-                customdata=[[dep] for dep in self.x_data],
-                hovertemplate='%{customdata[0]}<br>Rural: %{y}<extra></extra>'
-            ))
-            
-            # Agregar barra para urbano
-            fig.add_trace(go.Bar(
-                name='Urbano',
-                x=[dep.split()[0] for dep in self.x_data],  # Solo el primer nombre del departamento
-                y=self.y_data[1],  # datos urbanos
-                marker_color='#FFA354',
-                customdata=[[dep] for dep in self.x_data],
-                hovertemplate='%{customdata[0]}<br>Urbano: %{y}<extra></extra>'
-            ))
-
-            fig.update_layout(
-                barmode='stack',
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                showlegend=True,
-                font={'family': 'Helvetica', 'size': 12, 'color': '#828282'},
-                legend={
-                    'orientation': 'h',
-                    'x': 0.5,
-                    'y': 1.15,
-                    'xanchor': 'center'
-                },
-                xaxis=dict(
-                    tickangle=-30,
-                    automargin=True,
-                    title='Departamento',
-                    tickfont={'size': 12, 'color': '#828282'},
-                    gridcolor='rgba(0,0,0,0)',
-                    showgrid=False,
-                    zeroline=False
-                ),
-                yaxis=dict(
-                    title='No. de inscritos',
-                    tickfont={'size': 12, 'color': '#828282'},
-                    gridcolor='#d3d3d3',
-                    gridwidth=1,
-                    showgrid=True,
-                    zeroline=False,
-                    griddash='dash'
-                ),
-                margin={'l': 40, 'r': 40, 't': 60, 'b': 40}
-            )
-
             return dbc.Card(
                 dbc.CardBody([
                     html.Div([
                         html.H5(self.trend_title, className='dash-card-title'),
                     ], className='trend-title'),
                     html.Div(className='dash-card-divider'),
-                    dcc.Graph(figure=fig, config={'displayModeBar': False}, className='dash-graph')
+                    dcc.Graph(figure=self.figure(), config={'displayModeBar': False}, className='dash-graph', **self._id('graph'))
                 ]),
                 className='dash-card'
             )
@@ -291,6 +378,7 @@ class DashboardCard:
                 html.Div(className="dash-card-divider"),
                 dcc.Graph(
                     id="grafico-deportes-individuales",
+                    figure=self.figure(),
                     config={"displayModeBar": False},
                     className="dash-graph"
                 )
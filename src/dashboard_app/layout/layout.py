@@ -4,9 +4,11 @@ from layout.components import DashboardCard
 
 
 
-def get_layout(departamentos, municipios, TIPOS_DEPORTE):
+def get_layout(departamentos, TIPOS_DEPORTE):
     return html.Div(className="app-container", children=[
         dcc.Store(id="filtered-data-store"),
+        # Series por tipo de deporte del filtro vigente; el gráfico se arma en el navegador
+        dcc.Store(id="deportes-series-store"),
         dbc.Container([
             # Sección de filtros
             html.H4("General", className="mt-4 mb-3 dash-card-title"),
@@ -28,7 +30,8 @@ def get_layout(departamentos, municipios, TIPOS_DEPORTE):
                 dbc.Col(
                     dcc.Dropdown(
                         id="municipio-dropdown",
-                        options=[{"label": mun, "value": mun} for mun in municipios],
+                        # Las opciones las carga actualizar_municipios al abrir la página y al buscar
+                        options=[],
                         multi=True,
                         placeholder="Seleccionar municipio",
                         className="municipio-dropdown"
@@ -49,7 +52,8 @@ def get_layout(departamentos, municipios, TIPOS_DEPORTE):
                         icon_path="/assets/Images/Imagen1.png",
                         value="0",
                         title_lines=["Total de estudiantes", "inscritos"],
-                        border_color="#293377"
+                        border_color="#293377",
+                        component_id="total-estudiantes"
                     ).render(),
                     id="card-total-estudiantes",
                     width=4,
@@ -61,7 +65,8 @@ def get_layout(departamentos, municipios, TIPOS_DEPORTE):
                         icon_path="/assets/Images/Imagen2.png",
                         value="0",
                         title_lines=["Total de instituciones", "inscritas"],
-                        border_color="#FFA354"
+                        border_color="#FFA354",
+                        component_id="total-instituciones"
                     ).render(),
                     id="card-total-instituciones",
                     width=4,
@@ -73,7 +78,8 @@ def get_layout(departamentos, municipios, TIPOS_DEPORTE):
                         icon_path="/assets/Images/Imagen1.png",
                         value="0",
                         title_lines=["Total de personal de", "apoyo inscrito"],
-                        border_color="#602A8C"
+                        border_color="#602A8C",
+                        component_id="total-personal"
                     ).render(),
                     id="card-total-personal",
                     width=4,
@@ -87,7 +93,8 @@ def get_layout(departamentos, municipios, TIPOS_DEPORTE):
                         card_type="trendline",
                         x_data=[],
                         y_data=[],
-                        trend_title=""
+                        trend_title="Tendencia de inscripciones",
+                        component_id="trendline"
                     ).render(),
                     id="trendline-card",
                     width=8,
@@ -98,7 +105,8 @@ def get_layout(departamentos, municipios, TIPOS_DEPORTE):
                         card_type="gender",
                         image_path="/assets/Images/img_gender.png",
                         male_value=0,
-                        female_value=0
+                        female_value=0,
+                        component_id="gender"
                     ).render(),
                     id="gender-card",
                     width=4,
@@ -113,7 +121,8 @@ def get_layout(departamentos, municipios, TIPOS_DEPORTE):
                         labels=[],
                         values=[],
                         colors=["#FFA354", "#E5C473"],
-                        donut_title="Distribución por Zona"
+                        donut_title="Distribución por Zona",
+                        component_id="zona-donut"
                     ).render(),
                     id="zona-donut-card",
                     width=6,
@@ -125,7 +134,8 @@ def get_layout(departamentos, municipios, TIPOS_DEPORTE):
                         labels=[],
                         values=[],
                         colors=["#5167F1", "#AAB8D8", "#001F54"],
-                        donut_title="Tipo de Deporte"
+                        donut_title="Tipo de Deporte",
+                        component_id="tipo-donut"
                     ).render(),
                     id="tipo-donut-card",
                     width=6,
@@ -139,7 +149,8 @@ def get_layout(departamentos, municipios, TIPOS_DEPORTE):
                         card_type="bar",
                         x_data=departamentos,
                         y_data=[[0] * len(departamentos), [0] * len(departamentos)],
-                        trend_title="Estudiantes inscritos por departamento"
+                        trend_title="Estudiantes inscritos por departamento",
+                        component_id="bar-estudiantes"
                     ).render(),
                     id="bar-estudiantes-card",
                     width=6,
@@ -173,6 +184,7 @@ def get_layout(departamentos, municipios, TIPOS_DEPORTE):
                         ], className="gender-legend"),
                         dcc.Graph(
                             id="grafico-deportes-individuales",
+                            figure=DashboardCard(card_type="deportes_individuales").figure(),
                             className="dash-graph"
                         )
                     ], className="dash-card"),
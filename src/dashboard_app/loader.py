@@ -0,0 +1,22 @@
+import argparse
+from database.data_manager import DataManager
+from database.snapshot import DataSnapshot
+from database.refresher import DataRefresher
+from config import REFRESH_INTERVAL
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Procesa el Excel y publica el caché que usan los workers de wsgi.py")
+    parser.add_argument("--once", action="store_true", help="publicar el caché y terminar, sin vigilar el Excel")
+    args = parser.parse_args()
+
+    snapshot = DataSnapshot(DataManager.initialize_data())
+    if args.once or not REFRESH_INTERVAL:
+        return
+
+    print(f"Vigilando el Excel cada {REFRESH_INTERVAL} s...")
+    DataRefresher(snapshot, REFRESH_INTERVAL).run()
+
+
+if __name__ == "__main__":
+    main()
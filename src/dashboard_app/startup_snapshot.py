@@ -0,0 +1,71 @@
+import hashlib
+import importlib.util
+import json
+import os
+from layout import components
+from callbacks import kpi_callbacks
+from config import STARTUP_SNAPSHOT_FILE
+
+# Instantánea de arranque: lo necesario para servir la página inicial sin cargar pandas ni los
+# datos (departamentos del layout, plantillas de las figuras y salidas de la página sin filtro).
+# Se guarda en el directorio del caché, fuera de sus versiones, y se sustituye cuando se cargan
+# unos datos completos de otra versión.
+
+FORMATO = 1
+
+# Módulos de los que dependen las salidas guardadas; si cambia su código la instantánea no sirve
+MODULOS = [
+    "config", "startup_snapshot", "layout.components", "layout.layout", "callbacks.kpi_callbacks",
+    "transformers.agregados_general", "transformers.tendencia"
+]
+
+
+def _sello():
+    """Huella del código de MODULOS, leída de los archivos sin importarlos"""
+    huella = hashlib.blake2b(digest_size=16)
+    for modulo in MODULOS:
+        with open(importlib.util.find_spec(modulo).origin, 'rb') as f:
+            huella.update(f.read())
+    return huella.hexdigest()
+
+
+def cargar():
+    """Devuelve la instantánea guardada o None si no existe o es de otro código"""
+    try:
+        with open(STARTUP_SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+            instantanea = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if instantanea.get('formato') != FORMATO or instantanea.get('sello') != _sello():
+        return None
+    return instantanea
+
+
+def aplicar(instantanea):
+    """Precarga las plantillas de las figuras y las salidas iniciales de la página; los datos
+    provisionales son instantanea['datos'] hasta que terminan de cargarse los completos"""
+    components.precargar_plantillas(instantanea['plantillas'])
+    kpi_callbacks.precargar_salidas(instantanea['datos']['version'], instantanea['salidas'])
+
+
+def guardar(datos):
+    """Guarda la instantánea de los datos completos si la vigente es de otra versión"""
+    vigente = cargar()
+    if vigente is not None and vigente['datos']['version'] == datos['version']:
+        return
+    instantanea = {
+        'formato': FORMATO,
+        'sello': _sello(),
+        'datos': {
+            'version': datos['version'],
+            'ubicacion': {'departamentos': list(datos['ubicacion']['departamentos'])}
+        },
+        'salidas': kpi_callbacks.salidas_iniciales(datos),
+        'plantillas': components.plantillas()
+    }
+    contenido = json.dumps(instantanea, ensure_ascii=False)
+    temporal = f"{STARTUP_SNAPSHOT_FILE}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(contenido)
+    # Reemplazo atómico: varios workers pueden guardarla a la vez
+    os.replace(temporal, STARTUP_SNAPSHOT_FILE)
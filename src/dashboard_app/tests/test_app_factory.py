@@ -0,0 +1,20 @@
+import unittest
+from unittest import mock
+
+import app_factory
+
+
+class ModoWorker(unittest.TestCase):
+    """Un worker no carga las filas crudas, así que rechaza al arrancar el backend pandas en
+    lugar de fallar en el primer filtro"""
+
+    def test_backend_pandas_rechazado(self):
+        with mock.patch.object(app_factory, "QUERY_BACKEND", "pandas"), \
+                mock.patch.object(app_factory, "_cargar_datos") as cargar:
+            with self.assertRaisesRegex(ValueError, "QUERY_BACKEND"):
+                app_factory.create_app(worker=True)
+        cargar.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generador import generar_inscripciones
+from database.queries import QueriesInscripciones
+from transformers.bitmap_index import BitmapIndex
+from transformers.cubo_conteos import COLUMNAS_UBICACION, CuboConteos
+
+FILAS = 20_000
+
+
+class FiltrosBitmap(unittest.TestCase):
+    """Las filas que selecciona el índice bitmap, y los totales del cubo filtrado, son los
+    mismos que con una máscara de pandas `isin` sobre las filas crudas"""
+
+    @classmethod
+    def setUpClass(cls):
+        data = QueriesInscripciones.normalizar_dimensiones(generar_inscripciones(FILAS, semilla=5))
+        # Nulos en la ubicación y en la institución
+        data.loc[data.index[:40], 'Municipio Deportista'] = np.nan
+        data.loc[data.index[40:60], 'Departamento Deportista'] = np.nan
+        data.loc[data.index[60:90], 'Nombre Institución'] = np.nan
+        cls.data = data
+        cls.cubo = CuboConteos.construir(data).indexar()
+        departamentos = cls.cubo.valores('Departamento Deportista')
+        municipios = [m for m, _ in cls.cubo.jerarquia().municipios(departamentos[:2])]
+        cls.selecciones = [
+            (departamentos[:1], None),
+            (departamentos[:3], None),
+            (None, municipios[:1]),
+            (None, municipios[:4] + ["NO EXISTE"]),
+            (departamentos[:2], municipios[:3]),
+            (departamentos[2:3], municipios[:3]),  # municipios de otro departamento: vacía
+            (["NO EXISTE"], None),
+        ]
+
+    def _mascara(self, tabla, departamentos, municipios):
+        mascara = np.ones(len(tabla), dtype=bool)
+        for columna, valores in zip(COLUMNAS_UBICACION, (departamentos, municipios)):
+            if valores:
+                mascara &= tabla[columna].isin(valores).to_numpy()
+        return mascara
+
+    def test_filas_iguales_a_isin(self):
+        tabla = self.data[COLUMNAS_UBICACION]
+        indice = BitmapIndex(tabla, COLUMNAS_UBICACION)
+        with tempfile.TemporaryDirectory(prefix="test_bitmap_") as directorio:
+            indice.guardar(directorio)
+            cargado = BitmapIndex.cargar(directorio, tabla)
+            for departamentos, municipios in self.selecciones:
+                filtros = dict(zip(COLUMNAS_UBICACION, (departamentos, municipios)))
+                esperado = np.flatnonzero(self._mascara(tabla, departamentos, municipios))
+                for nombre, actual in (("construido", indice), ("cargado", cargado)):
+                    with self.subTest(indice=nombre, departamentos=departamentos, municipios=municipios):
+                        np.testing.assert_array_equal(actual.a_filas(actual.seleccionar(filtros)), esperado)
+
+    def test_sin_filtros(self):
+        indice = BitmapIndex(self.data, COLUMNAS_UBICACION)
+        self.assertIsNone(indice.seleccionar({columna: None for columna in COLUMNAS_UBICACION}))
+
+    def test_cubo_filtrado_igual_a_isin(self):
+        for departamentos, municipios in self.selecciones:
+            filas = self.data[self._mascara(self.data, departamentos, municipios)]
+            cubo = self.cubo.filtrar(departamentos, municipios)
+            with self.subTest(departamentos=departamentos, municipios=municipios):
+                self.assertEqual(cubo.total(), len(filas))
+                self.assertEqual(cubo.total_instituciones(), filas['Nombre Institución'].nunique())
+                pd.testing.assert_series_equal(
+                    cubo.contar('Zona'), filas.groupby('Zona', observed=True).size().rename("total")
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
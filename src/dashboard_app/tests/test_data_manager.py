@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from benchmarks.generador import generar_inscripciones
+from database import data_manager
+from database.columnar_store import current_version
+from database.data_manager import DataManager, MANIFEST_FILE
+from transformers.cubo_conteos import AGREGADOS, COLUMNAS_UBICACION
+
+FILAS = 3_000
+ANEXADAS = 700
+
+AGREGADOS_JSON = ('metricas', 'zona', 'tipo', 'ubicacion')
+TABLAS = ('trend_data', 'deportes_data')
+
+
+class IngestaIncremental(unittest.TestCase):
+    """Sumar las filas añadidas al Excel al caché guardado da lo mismo que reprocesar el Excel
+    completo: agregados, tablas, cubo y filas crudas, también al volver a cargar el caché"""
+
+    def setUp(self):
+        self._directorio = tempfile.TemporaryDirectory(prefix="test_data_manager_")
+        self.crudo = generar_inscripciones(FILAS + ANEXADAS, semilla=11)
+        self.excel = self.ruta("inscripciones.xlsx")
+
+    def tearDown(self):
+        self._directorio.cleanup()
+
+    def ruta(self, nombre):
+        return os.path.join(self._directorio.name, nombre)
+
+    def _inicializar(self, cache, backend="cubo"):
+        with mock.patch.multiple(
+            data_manager, DATA_FILE=self.excel, CACHE_DIR=cache, INGEST_DIR=cache + ".ingest", QUERY_BACKEND=backend
+        ):
+            data = DataManager.initialize_data()
+            with open(os.path.join(current_version(cache), MANIFEST_FILE), encoding='utf-8') as f:
+                manifest = json.load(f)
+            recargado = DataManager._load_from_cache(manifest)
+        return data, manifest, recargado
+
+    def _conteos(self, cubo):
+        """Lo que responde el cubo sin filtro y con filtros, por cada dimensión"""
+        departamentos = cubo.valores('Departamento Deportista')
+        municipios = cubo.valores('Municipio Deportista')
+        conteos = {}
+        for seleccion in ((None, None), (departamentos[:2], None), (None, municipios[::7]), (departamentos[:3], municipios[:40])):
+            filtrado = cubo.filtrar(*seleccion)
+            conteos[str(seleccion)] = {
+                'total': filtrado.total(),
+                'instituciones': filtrado.total_instituciones(),
+                **{str(columnas): filtrado.contar(columnas).to_dict() for columnas in [*AGREGADOS.values(), *COLUMNAS_UBICACION]},
+            }
+        return conteos
+
+    def _comparar(self, obtenido, esperado):
+        for clave in AGREGADOS_JSON:
+            self.assertEqual(obtenido[clave], esperado[clave], clave)
+        for clave in TABLAS:
+            pd.testing.assert_frame_equal(
+                pd.DataFrame(obtenido[clave]).reset_index(drop=True), pd.DataFrame(esperado[clave]).reset_index(drop=True),
+                check_categorical=False, obj=clave
+            )
+        pd.testing.assert_frame_equal(obtenido['data'], esperado['data'], check_categorical=False, obj='data')
+        self.assertEqual(self._conteos(obtenido['cubo']), self._conteos(esperado['cubo']))
+
+    def _incremental_y_completo(self, backend):
+        cache = self.ruta(f"cache_{backend}")
+        self.crudo.iloc[:FILAS].to_excel(self.excel, index=False)
+        self._inicializar(cache, backend)
+        self.crudo.to_excel(self.excel, index=False)
+        incremental, manifest, recargado = self._inicializar(cache, backend)
+        # Las filas nuevas se guardaron como un bloque más, sin reescribir el anterior
+        self.assertEqual(manifest['frames']['data'], ["data/0", "data/1"])
+        self.assertEqual(recargado['ingesta']['filas'], FILAS + ANEXADAS)
+        completo, _, _ = self._inicializar(self.ruta(f"completo_{backend}"), backend)
+        return incremental, recargado, completo
+
+    def test_incremental_igual_a_completo(self):
+        incremental, recargado, completo = self._incremental_y_completo("cubo")
+        self.assertEqual(len(completo['data']), FILAS + ANEXADAS)
+        for nombre, obtenido in (("incremental", incremental), ("recargado", recargado)):
+            with self.subTest(nombre):
+                self._comparar(obtenido, completo)
+
+    def test_incremental_sqlite(self):
+        incremental, recargado, completo = self._incremental_y_completo("sqlite")
+        # La base SQLite responde a las mismas consultas que el cubo
+        for nombre, obtenido in (("incremental", incremental), ("recargado", recargado)):
+            with self.subTest(nombre):
+                self.assertEqual(self._conteos(obtenido['sql']), self._conteos(completo['sql']))
+
+    def test_fila_editada_reprocesa(self):
+        cache = self.ruta("cache")
+        self.crudo.iloc[:FILAS].to_excel(self.excel, index=False)
+        self._inicializar(cache)
+        editado = self.crudo.copy()
+        editado.loc[0, 'Nombre Completo'] = 'OTRO NOMBRE'
+        editado.to_excel(self.excel, index=False)
+        data, manifest, _ = self._inicializar(cache)
+        self.assertEqual(manifest['frames']['data'], ["data/0"])
+        self.assertEqual(data['data'].loc[0, 'Nombre Completo'], 'OTRO NOMBRE')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import re
+import tempfile
+import unittest
+import zipfile
+
+import pandas as pd
+
+from benchmarks.generador import generar_inscripciones
+from database.excel_incremental import SHARED_STRINGS, leer_filas_nuevas, leer_marca
+
+FILAS = 600
+ANEXADAS = 250
+
+CELDA_EN_LINEA = re.compile(rb'<c ([^>]*?)t="inlineStr"><is><t([^>]*)>(.*?)</t></is></c>')
+
+
+def con_cadenas_compartidas(origen: str, destino: str, cambiar=None):
+    """Copia un libro escrito por openpyxl (cadenas en línea) pasando sus textos a
+    xl/sharedStrings.xml, en orden de aparición como hace Excel. `cambiar` reemplaza el texto de
+    esas posiciones de la tabla de cadenas sin tocar las filas que las usan"""
+    cadenas = {}
+
+    def compartir(m):
+        clave = (m.group(2), m.group(3))
+        indice = cadenas.setdefault(clave, len(cadenas))
+        return b'<c ' + m.group(1) + b't="s"><v>' + str(indice).encode() + b'</v></c>'
+
+    with zipfile.ZipFile(origen) as archivo, zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as copia:
+        for miembro in archivo.infolist():
+            contenido = archivo.read(miembro.filename)
+            if miembro.filename == "xl/worksheets/sheet1.xml":
+                contenido = CELDA_EN_LINEA.sub(compartir, contenido)
+            elif miembro.filename == "[Content_Types].xml":
+                contenido = contenido.replace(b"</Types>", (
+                    b'<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+                    b'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>'
+                ))
+            elif miembro.filename == "xl/_rels/workbook.xml.rels":
+                contenido = contenido.replace(b"</Relationships>", (
+                    b'<Relationship Id="rIdCadenas" Type="http://schemas.openxmlformats.org/officeDocument/'
+                    b'2006/relationships/sharedStrings" Target="sharedStrings.xml"/></Relationships>'
+                ))
+            copia.writestr(miembro, contenido)
+        textos = [(atributos, (cambiar or {}).get(i, texto)) for i, (atributos, texto) in enumerate(cadenas)]
+        copia.writestr(SHARED_STRINGS, (
+            b'<?xml version="1.0" encoding="UTF-8"?>'
+            b'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            + b"".join(b"<si><t" + atributos + b">" + texto + b"</t></si>" for atributos, texto in textos)
+            + b"</sst>"
+        ))
+    return len(cadenas)
+
+
+class MarcaIncremental(unittest.TestCase):
+    """leer_marca reconoce un Excel que solo creció por el final (filas y cadenas compartidas) y
+    pide reprocesarlo completo si cambió algo ya procesado; leer_filas_nuevas devuelve lo mismo
+    que pd.read_excel para las filas añadidas"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._directorio = tempfile.TemporaryDirectory(prefix="test_excel_incremental_")
+        cls.crudo = generar_inscripciones(FILAS + ANEXADAS, semilla=3)
+        cls.previo = cls.ruta("previo.xlsx")
+        cls.crudo.iloc[:FILAS].to_excel(cls.previo, index=False)
+        cls.anexado = cls.ruta("anexado.xlsx")
+        cls.crudo.to_excel(cls.anexado, index=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._directorio.cleanup()
+
+    @classmethod
+    def ruta(cls, nombre):
+        return os.path.join(cls._directorio.name, nombre)
+
+    def test_filas_anexadas(self):
+        marca, _ = leer_marca(self.previo)
+        self.assertEqual(marca['filas'], FILAS)
+        nueva, solo_anexado = leer_marca(self.anexado, marca)
+        self.assertTrue(solo_anexado)
+        self.assertEqual(nueva['filas'], FILAS + ANEXADAS)
+        pd.testing.assert_frame_equal(
+            leer_filas_nuevas(self.anexado, marca['filas']),
+            pd.read_excel(self.anexado).iloc[FILAS:].reset_index(drop=True)
+        )
+
+    def test_sin_cambios(self):
+        marca, _ = leer_marca(self.previo)
+        self.assertEqual(leer_marca(self.previo, marca), (marca, True))
+        self.assertEqual(len(leer_filas_nuevas(self.previo, marca['filas'])), 0)
+
+    def test_fila_anterior_editada(self):
+        marca, _ = leer_marca(self.previo)
+        for fila, columna, valor in ((0, 'Nombre Completo', 'OTRO NOMBRE'), (FILAS - 1, 'Número de Documento', 1)):
+            with self.subTest(fila=fila, columna=columna):
+                editado = self.crudo.copy()
+                editado.loc[fila, columna] = valor
+                ruta = self.ruta(f"editado_{fila}.xlsx")
+                editado.to_excel(ruta, index=False)
+                self.assertFalse(leer_marca(ruta, marca)[1])
+
+    def test_filas_borradas(self):
+        marca, _ = leer_marca(self.anexado)
+        self.assertFalse(leer_marca(self.previo, marca)[1])
+
+    def test_cadenas_compartidas(self):
+        previo, anexado = self.ruta("previo_cadenas.xlsx"), self.ruta("anexado_cadenas.xlsx")
+        cadenas = con_cadenas_compartidas(self.previo, previo)
+        total_cadenas = con_cadenas_compartidas(self.anexado, anexado)
+        marca, _ = leer_marca(previo)
+        self.assertEqual(marca['cadenas'], cadenas)
+
+        # Las filas nuevas añaden cadenas al final de la tabla
+        nueva, solo_anexado = leer_marca(anexado, marca)
+        self.assertTrue(solo_anexado)
+        self.assertEqual(nueva['cadenas'], total_cadenas)
+        self.assertGreater(total_cadenas, cadenas)
+        pd.testing.assert_frame_equal(
+            leer_filas_nuevas(anexado, marca['filas']),
+            pd.read_excel(anexado).iloc[FILAS:].reset_index(drop=True)
+        )
+
+        # Cambiar el texto de una cadena ya usada cambia las filas anteriores sin tocar sus bytes
+        cambiado = self.ruta("cadena_cambiada.xlsx")
+        con_cadenas_compartidas(self.anexado, cambiado, cambiar={cadenas - 1: b"TEXTO CAMBIADO"})
+        self.assertFalse(leer_marca(cambiado, marca)[1])
+        # Una cadena nueva cambiada no afecta a lo ya procesado
+        con_cadenas_compartidas(self.anexado, cambiado, cambiar={cadenas: b"TEXTO CAMBIADO"})
+        self.assertTrue(leer_marca(cambiado, marca)[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
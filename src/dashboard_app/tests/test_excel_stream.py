@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generador import generar_inscripciones
+from database import data_manager
+from database.data_manager import DataManager
+from database.queries import QueriesInscripciones as Queries
+
+FILAS = 2_500
+FILAS_POR_BLOQUE = 700
+
+
+class IngestaPorBloques(unittest.TestCase):
+    """Leer el Excel por bloques (excel_stream + FrameWriter) da el mismo DataFrame, con los
+    mismos tipos y categorías, que pd.read_excel seguido de normalizar_dimensiones"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._directorio = tempfile.TemporaryDirectory(prefix="test_excel_stream_")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._directorio.cleanup()
+
+    def _comprobar(self, nombre, crudo):
+        excel = os.path.join(self._directorio.name, f"{nombre}.xlsx")
+        crudo.to_excel(excel, index=False)
+        ingesta = os.path.join(self._directorio.name, f"{nombre}.ingest")
+        with mock.patch.multiple(
+            data_manager, DATA_FILE=excel, INGEST_DIR=ingesta, INGESTA_FILAS_POR_BLOQUE=FILAS_POR_BLOQUE
+        ):
+            data, _ = DataManager._leer_en_bloques()
+        pd.testing.assert_frame_equal(data, Queries.get_inscripciones_data(excel), check_exact=True)
+        return data
+
+    def test_bloques_igual_a_read_excel(self):
+        data = self._comprobar("bloques", generar_inscripciones(FILAS, semilla=7))
+        self.assertEqual(len(data), FILAS)
+
+    def test_nulos_y_filas_vacias(self):
+        crudo = generar_inscripciones(FILAS, semilla=8)
+        # Una columna de texto vacía en el primer bloque y una numérica con nulos solo en el último
+        crudo.loc[:FILAS_POR_BLOQUE, 'Nombre Institución'] = np.nan
+        crudo.loc[FILAS - 100:, 'Número de Documento'] = np.nan
+        crudo.loc[FILAS_POR_BLOQUE - 5:FILAS_POR_BLOQUE + 5, 'Municipio Deportista'] = np.nan
+        # Filas vacías en medio (read_excel las conserva) y al final (las recorta)
+        vacia = pd.DataFrame(np.nan, index=[0, 1], columns=crudo.columns)
+        crudo = pd.concat([crudo.iloc[:1000], vacia, crudo.iloc[1000:], vacia], ignore_index=True)
+        self._comprobar("nulos", crudo)
+
+    def test_solo_encabezado(self):
+        data = self._comprobar("encabezado", generar_inscripciones(FILAS, semilla=9).iloc[:0])
+        self.assertEqual(len(data), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from dash import DiskcacheManager
+from dash.exceptions import PreventUpdate
+
+from benchmarks.generador import generar_inscripciones
+from benchmarks.suite import procesar
+from callbacks import kpi_callbacks
+from callbacks.segundo_plano import crear_gestor
+from database.queries import QueriesInscripciones as Queries
+from database.snapshot import DataSnapshot
+
+FILAS = 2_000
+
+
+class DatosProvisionales(unittest.TestCase):
+    """Mientras solo están los datos de la instantánea de arranque, un filtro responde sin
+    cambios al cabo de CALLBACK_WAIT_TIMEOUT en lugar de bloquear la petición"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.completos = procesar(Queries.normalizar_dimensiones(generar_inscripciones(FILAS, semilla=2)))
+        cls.provisionales = {clave: valor for clave, valor in cls.completos.items() if clave not in ('data', 'cubo')}
+
+    def setUp(self):
+        self.snapshot = DataSnapshot(self.provisionales, provisional=True)
+        parches = (
+            mock.patch.object(kpi_callbacks, "snapshot", self.snapshot),
+            mock.patch.object(kpi_callbacks, "CALLBACK_WAIT_TIMEOUT", 0.2),
+        )
+        for parche in parches:
+            parche.start()
+            self.addCleanup(parche.stop)
+        kpi_callbacks.limpiar_caches()
+
+    def test_filtro_sin_datos_completos(self):
+        filtro = kpi_callbacks.crear_filtro(self.completos['ubicacion']['departamentos'][:1], None)
+        inicio = time.perf_counter()
+        with self.assertRaises(PreventUpdate):
+            kpi_callbacks.actualizar_general(filtro)
+        with self.assertRaises(PreventUpdate):
+            kpi_callbacks.actualizar_municipios(filtro['departamentos'])
+        self.assertLess(time.perf_counter() - inicio, 5)
+        self.assertFalse(kpi_callbacks.version_general()[1])
+
+        # Con los datos completos publicados el mismo filtro se calcula
+        self.snapshot.publish(self.completos)
+        total = kpi_callbacks.obtener_agregados(self.completos, filtro)['total_estudiantes']
+        self.assertEqual(kpi_callbacks.actualizar_general(filtro)[0], f"{total:,}")
+        self.assertTrue(kpi_callbacks.version_general()[1])
+
+    def test_error_de_carga(self):
+        self.snapshot.fail(OSError("Excel ilegible"))
+        filtro = kpi_callbacks.crear_filtro(self.completos['ubicacion']['departamentos'][:1], None)
+        with self.assertRaisesRegex(RuntimeError, "Excel ilegible"):
+            kpi_callbacks.actualizar_general(filtro)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "Sin fork")
+    def test_hijo_no_espera(self):
+        # Un proceso hijo no tiene el hilo que publica los datos completos
+        lectura, escritura = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            inicio = time.perf_counter()
+            try:
+                self.snapshot.wait(30)
+            except TimeoutError:
+                os.write(escritura, f"{time.perf_counter() - inicio}".encode())
+            os._exit(0)
+        os.close(escritura)
+        os.waitpid(pid, 0)
+        with os.fdopen(lectura) as f:
+            self.assertLess(float(f.read() or "inf"), 1)
+
+
+class GestorSegundoPlano(unittest.TestCase):
+    """El gestor es el DiskcacheManager de Dash sin subclases, con la clave de los resultados
+    reutilizables"""
+
+    def test_gestor_de_dash(self):
+        with tempfile.TemporaryDirectory(prefix="test_segundo_plano_") as directorio:
+            gestor = crear_gestor(directorio, cache_by=[kpi_callbacks.version_general])
+            if gestor is None:
+                self.skipTest("Faltan las dependencias de dash[diskcache]")
+            self.assertIs(type(gestor), DiskcacheManager)
+            self.assertEqual(gestor.cache_by, [kpi_callbacks.version_general])
+            gestor.handle.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.equivalencia_motores import OPERACIONES, comparar, comprobar, variantes
+from transformers.kpi_metrics import COLUMNAS_METRICAS, MetricasInscritos
+from transformers.motores import MOTORES, obtener_motor
+
+# Se ejecuta desde src/dashboard_app con `python -m unittest` o `python -m pytest tests`
+
+FILAS = 5_000
+
+
+class EquivalenciaMotores(unittest.TestCase):
+    """Cada motor devuelve en todas las OPERACIONES lo mismo que pandas (valores, orden,
+    índices y tipos) sobre todas las formas del DataFrame de la ingesta"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._directorio = tempfile.TemporaryDirectory(prefix="test_motores_")
+        cls.variantes = list(variantes(FILAS, cls._directorio.name))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._directorio.cleanup()
+
+    def _motor(self, nombre):
+        if obtener_motor(nombre).nombre != nombre:
+            self.skipTest(f"El motor {nombre} no está disponible")
+        return nombre
+
+    def test_motores_iguales_a_pandas(self):
+        for nombre in MOTORES:
+            if nombre == "pandas":
+                continue
+            for variante, data in self.variantes:
+                with self.subTest(motor=nombre, variante=variante):
+                    comprobar(data, self._motor(nombre))
+
+    def test_polars_entre_hilos(self):
+        # El motor es uno por proceso: hilos que consultan DataFrames distintos a la vez
+        # comparten su caché de columnas convertidas
+        motor = self._motor("polars")
+        esperados = {variante: OPERACIONES["Queries.get_deportes_data"](data, "pandas") for variante, data in self.variantes}
+
+        def consultar(i):
+            variante, data = self.variantes[i % len(self.variantes)]
+            return variante, OPERACIONES["Queries.get_deportes_data"](data, motor)
+
+        with ThreadPoolExecutor(max_workers=8) as hilos:
+            for variante, obtenido in hilos.map(consultar, range(40)):
+                comparar(obtenido, esperados[variante], f"{motor}: {variante}")
+
+    def test_esquema_metricas(self):
+        # Columnas de texto object, como la lista de registros original: subcategoria None
+        # donde no aplica y sin categóricas de las agrupaciones
+        _, data = self.variantes[0]
+        for nombre in MOTORES:
+            with self.subTest(motor=nombre):
+                metricas = MetricasInscritos(data, obtener_motor(nombre)).construir_metricas()
+                self.assertEqual(list(metricas.columns), COLUMNAS_METRICAS)
+                for columna in COLUMNAS_METRICAS:
+                    self.assertEqual(metricas[columna].dtype, "int64" if columna == "valor" else object, columna)
+                sin_subcategoria = metricas[metricas["categoria"] == "zona_depto"]["subcategoria"]
+                self.assertTrue(all(valor is None for valor in sin_subcategoria))
+
+    def test_motor_por_defecto(self):
+        # Sin motor explícito las métricas usan el mismo que las consultas
+        _, data = self.variantes[0]
+        self.assertIs(MetricasInscritos(data).motor, obtener_motor())
+
+
+if __name__ == "__main__":
+    unittest.main()
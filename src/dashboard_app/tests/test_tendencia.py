@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from config import TENDENCIA_MAX_PUNTOS
+from transformers.tendencia import elegir_tendencia, lttb, series_tendencia
+
+
+def diaria(inicio: str, dias: int, semilla: int = 0) -> pd.Series:
+    """Inscritos por día con ruido, un pico y una caída aislados"""
+    rng = np.random.default_rng(semilla)
+    valores = rng.integers(40, 60, dias)
+    valores[dias // 3] = 1_000
+    valores[2 * dias // 3] = 0
+    return pd.Series(valores, index=pd.date_range(inicio, periods=dias, freq="D"), name="inscritos")
+
+
+class ReduccionLTTB(unittest.TestCase):
+    """LTTB conserva los extremos de la serie y los picos, y nunca devuelve más puntos de los
+    pedidos; elegir_tendencia respeta TENDENCIA_MAX_PUNTOS"""
+
+    def test_lttb_extremos_y_picos(self):
+        serie = diaria("2024-01-01", 2_000)
+        x, y = serie.index.asi8, serie.to_numpy()
+        for puntos in (3, 10, 50, 180, 1_999):
+            with self.subTest(puntos=puntos):
+                elegidos = lttb(x, y, puntos)
+                self.assertEqual(len(elegidos), puntos)
+                self.assertEqual((elegidos[0], elegidos[-1]), (0, len(serie) - 1))
+                self.assertTrue(np.all(np.diff(elegidos) > 0))
+                if puntos >= 10:
+                    self.assertIn(int(y.argmax()), elegidos)
+                    self.assertIn(int(y.argmin()), elegidos)
+
+    def test_lttb_sin_reducir(self):
+        for n, puntos in ((5, 5), (5, 10), (5, 2), (0, 3)):
+            with self.subTest(n=n, puntos=puntos):
+                np.testing.assert_array_equal(lttb(np.arange(n), np.arange(n), puntos), np.arange(n))
+
+    def test_resolucion_automatica(self):
+        for dias, esperada in ((TENDENCIA_MAX_PUNTOS, "D"), (TENDENCIA_MAX_PUNTOS + 1, "W"), (7 * TENDENCIA_MAX_PUNTOS + 7, "M")):
+            series = series_tendencia(diaria("2020-01-06", dias))
+            with self.subTest(dias=dias):
+                pd.testing.assert_series_equal(elegir_tendencia(series, "auto", TENDENCIA_MAX_PUNTOS), series[esperada])
+
+    def test_max_puntos(self):
+        # Treinta años: ni por mes cabe en TENDENCIA_MAX_PUNTOS y se reduce con LTTB
+        series = series_tendencia(diaria("1995-01-01", 30 * 365))
+        for resolucion in ("auto", "D", "W", "M"):
+            with self.subTest(resolucion=resolucion):
+                completa = series["M" if resolucion == "auto" else resolucion]
+                serie = elegir_tendencia(series, resolucion, TENDENCIA_MAX_PUNTOS)
+                self.assertEqual(len(serie), TENDENCIA_MAX_PUNTOS)
+                self.assertEqual((serie.index[0], serie.index[-1]), (completa.index[0], completa.index[-1]))
+                self.assertEqual(serie.max(), completa.max())
+                self.assertTrue(serie.index.is_monotonic_increasing)
+                # Los puntos conservados tienen sus valores originales
+                pd.testing.assert_series_equal(serie, completa.loc[serie.index])
+
+    def test_sin_limite(self):
+        series = series_tendencia(diaria("2024-01-01", 1_000))
+        pd.testing.assert_series_equal(elegir_tendencia(series, "D"), series["D"])
+
+
+if __name__ == "__main__":
+    unittest.main()
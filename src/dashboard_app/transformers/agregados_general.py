@@ -0,0 +1,52 @@
+import pandas as pd
+from transformers.cubo_conteos import CuboConteos
+from transformers.tendencia import series_tendencia
+
+# Fila que agrupa los deportes fuera del top de matriz_deportes
+OTROS_DEPORTES = "Otros deportes"
+
+
+def calcular_agregados_general(cubo: CuboConteos) -> dict:
+    """Calcula de una vez todos los agregados de la página General sobre la selección
+    filtrada del cubo, para alimentar todas las tarjetas desde un mismo resultado"""
+    zona_depto = cubo.contar(['Departamento Deportista', 'Zona'])
+    zonas = zona_depto.index.get_level_values('Zona')
+    rural_counts = zona_depto[zonas == 'rural'].groupby(level='Departamento Deportista', observed=True).sum()
+    urbano_counts = zona_depto[zonas == 'urbano'].groupby(level='Departamento Deportista', observed=True).sum()
+    departamentos = cubo.valores('Departamento Deportista')
+
+    return {
+        'total_estudiantes': cubo.total(),
+        'total_instituciones': cubo.total_instituciones(),
+        'total_personal': 0,  # Sin datos de personal de apoyo, igual que MetricasInscritos
+        'tendencias': series_tendencia(cubo.contar('Fecha')),  # por día, semana y mes
+        'genero': cubo.contar('Género'),
+        'zona': cubo.contar('Zona').sort_values(ascending=False),
+        'tipo': cubo.contar('tipo deporte').sort_values(ascending=False),
+        'departamentos': departamentos,
+        'rural': [int(rural_counts.get(dep, 0)) for dep in departamentos],
+        'urbano': [int(urbano_counts.get(dep, 0)) for dep in departamentos],
+        'deportes': cubo.contar(['Deporte', 'tipo deporte']).reset_index(name='total')
+    }
+
+
+def matriz_deportes(deportes: pd.DataFrame, tipos, top_n=None) -> pd.DataFrame:
+    """Matriz deporte × tipo de inscritos a partir del conteo largo de 'deportes'.
+
+    Filas en orden alfabético y columnas en el orden de `tipos` (más los tipos no previstos al
+    final). Con `top_n` se conservan los deportes con más inscritos y el resto se suma en la
+    fila OTROS_DEPORTES, al final, para que el gráfico no crezca con el número de deportes."""
+    matriz = deportes.pivot_table(
+        index='Deporte', columns='tipo deporte', values='total',
+        aggfunc='sum', fill_value=0, observed=True
+    )
+    matriz.index = matriz.index.astype(str)
+    matriz.columns = matriz.columns.astype(str)
+    columnas = list(tipos) + sorted(set(matriz.columns) - set(tipos))
+    matriz = matriz.reindex(columns=columnas, fill_value=0).sort_index().astype('int64')
+    if top_n is not None and len(matriz) > top_n:
+        principales = matriz.sum(axis=1).sort_values(ascending=False, kind='stable').index[:top_n]
+        seleccion = matriz.index.isin(principales)
+        otros = matriz[~seleccion].sum()
+        matriz = pd.concat([matriz[seleccion], otros.to_frame(OTROS_DEPORTES).T])
+    return matriz
@@ -0,0 +1,114 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+INDEX_FILE = "index.json"
+
+
+class BitmapIndex:
+    """Índice invertido sobre columnas categóricas.
+
+    Para cada columna guarda las filas ordenadas por código, de modo que cada valor
+    apunta a su lista ordenada de ids de fila. Un filtro multi-selección es la unión de
+    esas listas en un bitmap empaquetado, y varias columnas se combinan con AND."""
+
+    def __init__(self, df: pd.DataFrame, columnas):
+        self.n_rows = len(df)
+        self._listas = {}
+        for columna in columnas:
+            serie = df[columna]
+            codes = serie.cat.codes.to_numpy()
+            # Los nulos (código -1) quedan en el primer tramo y nunca se consultan
+            conteos = np.bincount(codes + 1, minlength=len(serie.cat.categories) + 1)
+            self._listas[columna] = (
+                serie.cat.categories,
+                np.argsort(codes, kind='stable'),
+                np.concatenate(([0], np.cumsum(conteos)))
+            )
+
+    def extender(self, df: pd.DataFrame):
+        """Índice sobre `df`, cuyas primeras filas son las ya indexadas y las demás se añadieron
+        al final (sus categorías pueden ser una unión ordenada de las anteriores y las nuevas).
+
+        Solo se ordenan las filas añadidas: las listas anteriores se desplazan enteras a su nueva
+        posición, porque las filas nuevas de cada valor quedan detrás de las que ya tenía"""
+        anteriores = self.n_rows
+        indice = BitmapIndex.__new__(BitmapIndex)
+        indice.n_rows = len(df)
+        indice._listas = {}
+        for columna, (categorias_previas, orden_previo, limites_previos) in self._listas.items():
+            serie = df[columna]
+            categorias = serie.cat.categories
+            # Tramo de cada valor anterior en el índice nuevo (el 0 es el de los nulos)
+            tramos = np.concatenate(([0], categorias.get_indexer(categorias_previas) + 1))
+            conteos_previos = np.zeros(len(categorias) + 1, dtype=np.int64)
+            conteos_previos[tramos] = np.diff(limites_previos)
+            codes = serie.cat.codes.to_numpy()[anteriores:]
+            conteos_nuevos = np.bincount(codes + 1, minlength=len(categorias) + 1)
+            limites = np.concatenate(([0], np.cumsum(conteos_previos + conteos_nuevos)))
+
+            orden = np.empty(len(df), dtype=np.int64)
+            # Filas anteriores: cada lista se copia al inicio de su tramo
+            largos = np.diff(limites_previos)
+            destino = np.repeat(limites[tramos] - limites_previos[:-1], largos) + np.arange(anteriores)
+            orden[destino] = orden_previo
+            # Filas añadidas: detrás de las anteriores del mismo valor
+            inicios = limites[:-1] + conteos_previos
+            posicion = np.arange(len(codes)) - np.repeat(np.cumsum(conteos_nuevos) - conteos_nuevos, conteos_nuevos)
+            orden[np.repeat(inicios, conteos_nuevos) + posicion] = np.argsort(codes, kind='stable') + anteriores
+            indice._listas[columna] = (categorias, orden, limites)
+        return indice
+
+    def guardar(self, directory: str):
+        """Guarda las listas de filas del índice como archivos .npy para mapearlas desde otros procesos"""
+        os.makedirs(directory, exist_ok=True)
+        for i, (_, orden, limites) in enumerate(self._listas.values()):
+            np.save(os.path.join(directory, f"{i}.orden.npy"), orden, allow_pickle=False)
+            np.save(os.path.join(directory, f"{i}.limites.npy"), limites, allow_pickle=False)
+        with open(os.path.join(directory, INDEX_FILE), 'w', encoding='utf-8') as f:
+            json.dump({"rows": self.n_rows, "columns": list(self._listas)}, f, ensure_ascii=False)
+
+    @classmethod
+    def cargar(cls, directory: str, df: pd.DataFrame, mmap: bool = True):
+        """Carga un índice guardado con `guardar` sobre el mismo DataFrame, sin reconstruirlo"""
+        with open(os.path.join(directory, INDEX_FILE), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        mmap_mode = 'r' if mmap and info["rows"] > 0 else None
+        indice = cls.__new__(cls)
+        indice.n_rows = info["rows"]
+        indice._listas = {}
+        for i, columna in enumerate(info["columns"]):
+            indice._listas[columna] = (
+                df[columna].cat.categories,
+                np.asarray(np.load(os.path.join(directory, f"{i}.orden.npy"), mmap_mode=mmap_mode)),
+                np.asarray(np.load(os.path.join(directory, f"{i}.limites.npy"), mmap_mode=mmap_mode))
+            )
+        return indice
+
+    def filas(self, columna, valores) -> np.ndarray:
+        """Ids de fila (ordenados dentro de cada valor) donde la columna toma alguno de los valores"""
+        categorias, orden, limites = self._listas[columna]
+        posiciones = categorias.get_indexer(valores)
+        tramos = [orden[limites[c + 1]:limites[c + 2]] for c in posiciones[posiciones >= 0]]
+        return np.concatenate(tramos) if tramos else np.empty(0, dtype=orden.dtype)
+
+    def bitmap(self, columna, valores) -> np.ndarray:
+        """Bitmap empaquetado con la unión de las filas de los valores seleccionados"""
+        mascara = np.zeros(self.n_rows, dtype=bool)
+        mascara[self.filas(columna, valores)] = True
+        return np.packbits(mascara)
+
+    def seleccionar(self, filtros: dict):
+        """Intersección de los bitmaps de cada columna filtrada; None si no hay filtros activos"""
+        seleccion = None
+        for columna, valores in filtros.items():
+            if not valores:
+                continue
+            bitmap = self.bitmap(columna, valores)
+            seleccion = bitmap if seleccion is None else np.bitwise_and(seleccion, bitmap)
+        return seleccion
+
+    def a_filas(self, bitmap: np.ndarray) -> np.ndarray:
+        """Convierte un bitmap empaquetado en ids de fila ordenados"""
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
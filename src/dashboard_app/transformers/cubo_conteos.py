@@ -0,0 +1,245 @@
+import copy
+import json
+import os
+import numpy as np
+import pandas as pd
+from database.columnar_store import save_frame, load_frame
+from transformers.bitmap_index import BitmapIndex
+from transformers.frames import concatenar
+from transformers.jerarquia_ubicacion import JerarquiaUbicacion
+
+# Dimensiones de ubicación de los filtros de los desplegables: cada combinación distinta es una
+# fila de `ubicaciones`, indexada con bitmaps
+COLUMNAS_UBICACION = ["Departamento Deportista", "Municipio Deportista"]
+
+# Un agregado por gráfico de la página General: inscritos por ubicación y estas dimensiones
+AGREGADOS = {
+    "zona": ["Zona"],
+    "tipo": ["tipo deporte"],
+    "genero": ["Género"],
+    "fecha": ["Fecha"],
+    "deporte": ["Deporte", "tipo deporte"],
+}
+
+COLUMNA_INSTITUCION = "Nombre Institución"
+CUBO_FILE = "cubo.json"
+
+
+def _marcar(matriz: np.ndarray, filas: np.ndarray, columnas: np.ndarray):
+    """Activa los bits (fila, columna) de una matriz de bits empaquetada con np.packbits"""
+    np.bitwise_or.at(matriz, (filas, columnas >> 3), (0x80 >> (columnas & 7)).astype(np.uint8))
+
+
+class CuboConteos:
+    """Cubo de conteos de inscritos para los filtros de ubicación de la página General.
+
+    `ubicaciones` tiene una fila por combinación de departamento y municipio con sus inscritos,
+    y cada agregado de AGREGADOS los inscritos por ubicación y las dimensiones de un gráfico,
+    ordenados por ubicación. Una selección son los tramos de filas de sus ubicaciones, así que
+    su coste depende de lo que se selecciona y no del número de inscripciones. Las
+    instituciones distintas de cada ubicación se guardan como una fila de bits."""
+
+    def __init__(self, ubicaciones: pd.DataFrame, agregados: dict, instituciones: np.ndarray, nombres: pd.Index):
+        self.ubicaciones = ubicaciones
+        self.agregados = agregados
+        # Matriz de bits empaquetada ubicación × institución (columnas en el orden de `nombres`)
+        self.instituciones = instituciones
+        self.nombres = nombres
+        self._seleccion = None
+        self._indice = None
+        self._limites = None
+        self._jerarquia = None
+
+    @classmethod
+    def construir(cls, df: pd.DataFrame):
+        """Construye el cubo con una agrupación por agregado sobre las filas crudas (ya normalizadas)"""
+        departamentos = df[COLUMNAS_UBICACION[0]].cat
+        municipios = df[COLUMNAS_UBICACION[1]].cat
+        # Clave entera por ubicación a partir de los códigos (los nulos, -1, pasan a 0)
+        ancho = len(municipios.categories) + 1
+        claves = (departamentos.codes.to_numpy().astype(np.int64) + 1) * ancho + municipios.codes.to_numpy() + 1
+        unicas, ubicacion = np.unique(claves, return_inverse=True)
+        ubicaciones = pd.DataFrame({
+            COLUMNAS_UBICACION[0]: pd.Categorical.from_codes(unicas // ancho - 1, dtype=df[COLUMNAS_UBICACION[0]].dtype),
+            COLUMNAS_UBICACION[1]: pd.Categorical.from_codes(unicas % ancho - 1, dtype=df[COLUMNAS_UBICACION[1]].dtype),
+            "total": np.bincount(ubicacion, minlength=len(unicas)).astype(np.int64),
+        })
+
+        ubicacion = pd.Series(ubicacion.astype(np.int32), index=df.index, name="ubicacion")
+        fechas = df['Fecha de Registro'].dt.normalize().rename("Fecha")  # datetime64 desde la ingesta
+        agregados = {}
+        for nombre, dimensiones in AGREGADOS.items():
+            claves = [ubicacion] + [fechas if columna == "Fecha" else df[columna] for columna in dimensiones]
+            agregados[nombre] = cls._ordenar(
+                df.groupby(claves, dropna=False, observed=True, sort=False).size().reset_index(name="total")
+            )
+
+        codigos, nombres = pd.factorize(df[COLUMNA_INSTITUCION])
+        validos = codigos >= 0
+        pares = np.unique(ubicacion.to_numpy()[validos].astype(np.int64) * max(len(nombres), 1) + codigos[validos])
+        instituciones = np.zeros((len(ubicaciones), (len(nombres) + 7) // 8), dtype=np.uint8)
+        _marcar(instituciones, *np.divmod(pares, max(len(nombres), 1)))
+        return cls(ubicaciones, agregados, instituciones, pd.Index(np.asarray(nombres, dtype=object)))
+
+    @staticmethod
+    def _ordenar(agregado: pd.DataFrame) -> pd.DataFrame:
+        """Filas de cada ubicación contiguas y en orden de ubicación"""
+        return agregado.sort_values("ubicacion", kind="stable", ignore_index=True)
+
+    def combinar(self, otro: "CuboConteos"):
+        """Devuelve el cubo que resulta de sumar los conteos de otro cubo (p. ej. el de las
+        inscripciones nuevas) sin volver a agrupar las filas crudas. Las ubicaciones y las
+        instituciones de este cubo conservan su posición y las nuevas se añaden al final"""
+        unidas = concatenar(self.ubicaciones, otro.ubicaciones)
+        claves = pd.Index(
+            (unidas[COLUMNAS_UBICACION[0]].cat.codes.to_numpy().astype(np.int64) + 1)
+            * (len(unidas[COLUMNAS_UBICACION[1]].cat.categories) + 1)
+            + unidas[COLUMNAS_UBICACION[1]].cat.codes.to_numpy() + 1
+        )
+        primeras = ~claves.duplicated()
+        ubicaciones = unidas[primeras].reset_index(drop=True)
+        # Posición en el cubo combinado de cada ubicación de `otro`
+        mapa = pd.Index(claves[primeras]).get_indexer(claves[len(self.ubicaciones):])
+        ubicaciones["total"] = np.bincount(
+            np.concatenate((np.arange(len(self.ubicaciones)), mapa)),
+            weights=unidas["total"].to_numpy(), minlength=len(ubicaciones)
+        ).astype(np.int64)
+
+        agregados = {}
+        for nombre, dimensiones in AGREGADOS.items():
+            nuevo = otro.agregados[nombre]
+            nuevo = nuevo.assign(ubicacion=mapa[nuevo["ubicacion"].to_numpy()].astype(np.int32))
+            agregados[nombre] = self._ordenar(
+                concatenar(self.agregados[nombre], nuevo)
+                .groupby(["ubicacion"] + dimensiones, dropna=False, observed=True, sort=False)["total"].sum()
+                .reset_index()
+            )
+
+        nombres = self.nombres.append(otro.nombres[self.nombres.get_indexer(otro.nombres) < 0])
+        instituciones = np.zeros((len(ubicaciones), (len(nombres) + 7) // 8), dtype=np.uint8)
+        instituciones[:self.instituciones.shape[0], :self.instituciones.shape[1]] = self.instituciones
+        filas, columnas = np.nonzero(np.unpackbits(otro.instituciones, axis=1, count=len(otro.nombres)))
+        _marcar(instituciones, mapa[filas], nombres.get_indexer(otro.nombres)[columnas])
+        cubo = CuboConteos(ubicaciones, agregados, instituciones, nombres)
+        if self._indice is not None:
+            # Solo se indexan las ubicaciones añadidas al final
+            cubo._indice = self._indice.extender(ubicaciones)
+        return cubo
+
+    def indexar(self):
+        """Construye el índice bitmap de departamento y municipio sobre las ubicaciones, los
+        tramos de cada ubicación en los agregados y la jerarquía de ubicación (se llama una vez
+        al cargar los datos)"""
+        if self._indice is None:
+            self._indice = BitmapIndex(self.ubicaciones, COLUMNAS_UBICACION)
+        if self._limites is None:
+            posiciones = np.arange(len(self.ubicaciones) + 1)
+            self._limites = {
+                nombre: np.searchsorted(agregado["ubicacion"].to_numpy(), posiciones)
+                for nombre, agregado in self.agregados.items()
+            }
+        self.jerarquia()
+        return self
+
+    def jerarquia(self) -> JerarquiaUbicacion:
+        """Municipios ordenados de cada departamento, con sus inscritos"""
+        if self._jerarquia is None:
+            self._jerarquia = JerarquiaUbicacion.construir(self.contar(COLUMNAS_UBICACION))
+        return self._jerarquia
+
+    def guardar(self, directory: str):
+        """Guarda el cubo y su índice para que otros procesos los mapeen en lugar de construirlos"""
+        os.makedirs(directory, exist_ok=True)
+        save_frame(self.ubicaciones, os.path.join(directory, "ubicaciones"))
+        for nombre, agregado in self.agregados.items():
+            save_frame(agregado, os.path.join(directory, "agregados", nombre))
+        np.save(os.path.join(directory, "instituciones.npy"), self.instituciones, allow_pickle=False)
+        save_frame(pd.DataFrame({COLUMNA_INSTITUCION: self.nombres}), os.path.join(directory, "nombres"))
+        self.indexar()._indice.guardar(os.path.join(directory, "indice"))
+        with open(os.path.join(directory, CUBO_FILE), 'w', encoding='utf-8') as f:
+            json.dump({"agregados": list(self.agregados), "instituciones": list(self.instituciones.shape)}, f)
+
+    @classmethod
+    def cargar(cls, directory: str, mmap: bool = True):
+        """Carga un cubo guardado con `guardar`; sus arrays se mapean en memoria"""
+        with open(os.path.join(directory, CUBO_FILE), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        # np.load no puede mapear archivos vacíos
+        mmap_mode = 'r' if mmap and 0 not in info["instituciones"] else None
+        ubicaciones = load_frame(os.path.join(directory, "ubicaciones"), mmap)
+        cubo = cls(
+            ubicaciones,
+            {nombre: load_frame(os.path.join(directory, "agregados", nombre), mmap) for nombre in info["agregados"]},
+            np.asarray(np.load(os.path.join(directory, "instituciones.npy"), mmap_mode=mmap_mode)),
+            pd.Index(load_frame(os.path.join(directory, "nombres"), mmap)[COLUMNA_INSTITUCION].to_numpy(dtype=object))
+        )
+        cubo._indice = BitmapIndex.cargar(os.path.join(directory, "indice"), ubicaciones, mmap)
+        return cubo.indexar()
+
+    def filtrar(self, departamentos=None, municipios=None):
+        """Devuelve el sub-cubo de la selección. Departamentos y municipios vacíos no filtran"""
+        if not (departamentos or municipios):
+            return self
+        # Unión de bitmaps por valor seleccionado e intersección entre departamento y municipio
+        indice = self.indexar()._indice
+        seleccion = indice.a_filas(indice.seleccionar(dict(zip(COLUMNAS_UBICACION, (departamentos, municipios)))))
+        if self._seleccion is not None:
+            seleccion = np.intersect1d(self._seleccion, seleccion)
+        cubo = copy.copy(self)
+        cubo._seleccion = seleccion
+        return cubo
+
+    def _filas_ubicacion(self) -> pd.DataFrame:
+        if self._seleccion is None:
+            return self.ubicaciones
+        return self.ubicaciones.take(self._seleccion)
+
+    def _filas_agregado(self, nombre) -> pd.DataFrame:
+        """Filas del agregado de las ubicaciones seleccionadas: un tramo contiguo por ubicación"""
+        agregado = self.agregados[nombre]
+        if self._seleccion is None:
+            return agregado
+        limites = self.indexar()._limites[nombre]
+        inicios, largos = limites[self._seleccion], np.diff(limites)[self._seleccion]
+        desplazamientos = np.repeat(inicios - (np.cumsum(largos) - largos), largos)
+        return agregado.take(desplazamientos + np.arange(largos.sum()))
+
+    def _agregado_para(self, dimensiones) -> str:
+        """El agregado más pequeño que contiene las dimensiones"""
+        candidatos = [nombre for nombre, columnas in AGREGADOS.items() if set(dimensiones) <= set(columnas)]
+        if not candidatos:
+            raise KeyError(f"Ningún agregado del cubo contiene {dimensiones}")
+        return min(candidatos, key=lambda nombre: len(self.agregados[nombre]))
+
+    def _tabla(self, por) -> pd.DataFrame:
+        """Filas de la selección con las columnas de `por` y el total"""
+        columnas = [por] if isinstance(por, str) else list(por)
+        resto = [columna for columna in columnas if columna not in COLUMNAS_UBICACION]
+        if not resto:
+            return self._filas_ubicacion()
+        filas = self._filas_agregado(self._agregado_para(resto))
+        ubicacion = filas["ubicacion"].to_numpy()
+        # Departamento y municipio salen de la tabla de ubicaciones con los mismos códigos
+        return filas[resto + ["total"]].assign(**{
+            columna: pd.Categorical.from_codes(
+                self.ubicaciones[columna].cat.codes.to_numpy()[ubicacion], dtype=self.ubicaciones[columna].dtype
+            )
+            for columna in columnas if columna in COLUMNAS_UBICACION
+        })
+
+    def contar(self, por) -> pd.Series:
+        """Agrega el cubo por las dimensiones indicadas (los valores nulos se descartan,
+        igual que en value_counts/groupby)"""
+        return self._tabla(por).groupby(por, observed=True)["total"].sum()
+
+    def valores(self, dimension):
+        """Valores distintos y no nulos de una dimensión, ordenados"""
+        return sorted(self._tabla(dimension)[dimension].dropna().unique().tolist())
+
+    def total(self) -> int:
+        return int(self._filas_ubicacion()["total"].sum())
+
+    def total_instituciones(self) -> int:
+        """Instituciones distintas: unión de las filas de bits de las ubicaciones seleccionadas"""
+        filas = self.instituciones if self._seleccion is None else self.instituciones[self._seleccion]
+        return int(np.bitwise_count(np.bitwise_or.reduce(filas, axis=0)).sum()) if len(filas) else 0
@@ -0,0 +1,17 @@
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+def concatenar(base: pd.DataFrame, nuevas: pd.DataFrame) -> pd.DataFrame:
+    """Concatena filas nuevas a un DataFrame conservando las columnas categóricas:
+    las categorías se unen (ordenadas, como al convertir con astype) en lugar de
+    degradar la columna a object"""
+    columnas = {}
+    for columna in base.columns:
+        if isinstance(base[columna].dtype, pd.CategoricalDtype):
+            columnas[columna] = union_categoricals(
+                [base[columna], nuevas[columna].astype('category')], ignore_order=True, sort_categories=True
+            )
+        else:
+            columnas[columna] = pd.concat([base[columna], nuevas[columna]], ignore_index=True)
+    return pd.DataFrame(columnas, index=pd.RangeIndex(len(base) + len(nuevas)))
@@ -0,0 +1,56 @@
+import functools
+import heapq
+import unicodedata
+from itertools import groupby
+
+
+@functools.lru_cache(maxsize=4096)
+def clave_busqueda(texto: str) -> str:
+    """Texto sin tildes y en minúsculas para comparar búsquedas"""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+class JerarquiaUbicacion:
+    """Municipios de cada departamento, ordenados, con su número de inscritos.
+
+    Se construye una vez a partir del cubo; las opciones del desplegable de municipios
+    salen de mezclar las listas ya ordenadas de los departamentos seleccionados."""
+
+    def __init__(self, municipios_por_departamento: dict):
+        # departamento -> [(municipio, inscritos), ...] ordenada por municipio
+        self.municipios_por_departamento = municipios_por_departamento
+        self._todos = self._mezclar(municipios_por_departamento.values())
+
+    @classmethod
+    def construir(cls, conteos):
+        """`conteos` es la serie de inscritos indexada por (departamento, municipio)"""
+        municipios = {}
+        for (departamento, municipio), total in conteos[conteos > 0].items():
+            municipios.setdefault(departamento, []).append((municipio, int(total)))
+        return cls({departamento: sorted(lista) for departamento, lista in municipios.items()})
+
+    @staticmethod
+    def _mezclar(listas):
+        """Une listas ordenadas por municipio; un nombre repetido en varios departamentos
+        aparece una vez con la suma de sus inscritos"""
+        mezcla = heapq.merge(*listas, key=lambda par: par[0])
+        return [(municipio, sum(total for _, total in pares)) for municipio, pares in groupby(mezcla, key=lambda par: par[0])]
+
+    def municipios(self, departamentos=None):
+        """Municipios (con inscritos) de los departamentos indicados, o de todos si no hay selección"""
+        if not departamentos:
+            return self._todos
+        return self._mezclar(self.municipios_por_departamento.get(dep, []) for dep in departamentos)
+
+    def opciones(self, departamentos=None, busqueda=None, limite=None):
+        """Nombres de municipio para el desplegable: los que contienen `busqueda` (sin distinguir
+        tildes ni mayúsculas) y, con `limite`, solo los de más inscritos, en orden alfabético"""
+        municipios = self.municipios(departamentos)
+        if busqueda:
+            clave = clave_busqueda(busqueda)
+            municipios = [par for par in municipios if clave in clave_busqueda(par[0])]
+        if limite is not None and len(municipios) > limite:
+            mayores = set(heapq.nlargest(limite, range(len(municipios)), key=lambda i: municipios[i][1]))
+            municipios = [par for i, par in enumerate(municipios) if i in mayores]
+        return [municipio for municipio, _ in municipios]
@@ -1,61 +1,96 @@
 import pandas as pd
+from transformers.motores import obtener_motor
+
+# Esquema del resultado en formato largo
+COLUMNAS_METRICAS = ["categoria", "subcategoria", "valor", "zona", "departamento", "deporte", "tipo", "fecha"]
 
 class MetricasInscritos:
-    def __init__(self, df_inscritos: pd.DataFrame):
-        self.df = df_inscritos.copy()
-        self.metricas = []
+    def __init__(self, df_inscritos: pd.DataFrame, motor=None):
+        # Ningún cálculo modifica el DataFrame, así que se usa sin copiarlo; los conteos los
+        # resuelve el motor de DataFrame (el de DATAFRAME_ENGINE por defecto, como en las consultas)
+        self.df = df_inscritos
+        self.motor = motor or obtener_motor()
+        self._familias = {}
 
-    def _add_metric(self, categoria, subcategoria=None, valor=None, **kwargs):
-        base = {
+    def _conteo(self, columna, categoria):
+        counts = self.motor.conteo(self.df, columna)
+        return pd.DataFrame({
             "categoria": categoria,
-            "subcategoria": subcategoria,
-            "valor": valor
-        }
-        base.update(kwargs)
-        self.metricas.append(base)
+            "subcategoria": counts.index.to_numpy(dtype=object),
+            "valor": counts.to_numpy()
+        })
 
     def calcular_metricas_generales(self):
-        self._add_metric("total_estudiantes", valor=len(self.df))
-        self._add_metric("total_instituciones", valor=self.df['Nombre Institución'].nunique())
-        self._add_metric("total_personal", valor=0)  
+        return pd.DataFrame({
+            "categoria": ["total_estudiantes", "total_instituciones", "total_personal"],
+            "subcategoria": None,
+            "valor": [self.motor.filas(self.df), self.motor.distintos(self.df, 'Nombre Institución'), 0]
+        })
 
     def calcular_por_genero(self):
-        genero_counts = self.df['Género'].value_counts()
-        for genero, count in genero_counts.items():
-            self._add_metric("genero", genero, count)
+        return self._conteo('Género', "genero")
 
     def calcular_por_zona(self):
-        zona_counts = self.df['Zona'].value_counts()
-        for zona, count in zona_counts.items():
-            self._add_metric("zona", zona, count)
+        return self._conteo('Zona', "zona")
 
     def calcular_por_tipo_deporte(self):
-        tipo_counts = self.df['tipo deporte'].value_counts()
-        for tipo, count in tipo_counts.items():
-            self._add_metric("tipo_deporte", tipo, count)
+        return self._conteo('tipo deporte', "tipo_deporte")
 
     def calcular_por_zona_y_departamento(self):
-        grouped = self.df.groupby(['Departamento Deportista', 'Zona']).size()
-        for (dep, zona), count in grouped.items():
-            self._add_metric("zona_depto", zona=zona, departamento=dep, valor=count)
+        grouped = self.motor.conteo_cruzado(self.df, ['Departamento Deportista', 'Zona'])
+        return (
+            grouped.rename_axis(["departamento", "zona"])
+            .reset_index(name="valor")
+            .assign(categoria="zona_depto")
+        )
 
     def calcular_por_deporte_y_tipo(self):
-        grouped = self.df.groupby(['Deporte', 'tipo deporte']).size()
-        for (dep, tipo), count in grouped.items():
-            self._add_metric("deporte_tipo", deporte=dep, tipo=tipo, valor=count)
+        grouped = self.motor.conteo_cruzado(self.df, ['Deporte', 'tipo deporte'])
+        return (
+            grouped.rename_axis(["deporte", "tipo"])
+            .reset_index(name="valor")
+            .assign(categoria="deporte_tipo")
+        )
 
     def calcular_tendencia_por_fecha(self):
-        self.df['fecha'] = pd.to_datetime(self.df['Fecha de Registro']).dt.date  # Solo la fecha
-        tendencia = self.df.groupby('fecha').size()
-        for fecha, count in tendencia.items():
-            self._add_metric("tendencia", fecha=str(fecha), valor=count)
-
-    def construir_metricas(self):
-        self.calcular_metricas_generales()
-        self.calcular_por_genero()
-        self.calcular_por_zona()
-        self.calcular_por_tipo_deporte()
-        self.calcular_por_zona_y_departamento()
-        self.calcular_por_deporte_y_tipo()
-        self.calcular_tendencia_por_fecha()
-        return pd.DataFrame(self.metricas)
+        # La fecha ya es datetime64 desde la ingesta; solo se trunca al día
+        tendencia = self.motor.conteo_por_dia(self.df, 'Fecha de Registro')
+        return pd.DataFrame({
+            "categoria": "tendencia",
+            "fecha": tendencia.index.strftime("%Y-%m-%d"),
+            "valor": tendencia.to_numpy()
+        })
+
+    # Familias de métricas en el orden en que aparecen en el resultado
+    FAMILIAS = {
+        "generales": calcular_metricas_generales,
+        "genero": calcular_por_genero,
+        "zona": calcular_por_zona,
+        "tipo_deporte": calcular_por_tipo_deporte,
+        "zona_depto": calcular_por_zona_y_departamento,
+        "deporte_tipo": calcular_por_deporte_y_tipo,
+        "tendencia": calcular_tendencia_por_fecha,
+    }
+
+    def familia(self, nombre):
+        """Calcula una familia de métricas la primera vez que se pide y la reutiliza después"""
+        if nombre not in self._familias:
+            self._familias[nombre] = self.FAMILIAS[nombre](self)
+        return self._familias[nombre]
+
+    def valor(self, categoria):
+        """Valor de una métrica general: total_estudiantes, total_instituciones o total_personal"""
+        generales = self.familia("generales")
+        return generales.loc[generales["categoria"] == categoria, "valor"].iloc[0]
+
+    def construir_metricas(self, categorias=None):
+        """Devuelve las métricas en formato largo; `categorias` limita el cálculo a esas familias"""
+        nombres = [nombre for nombre in self.FAMILIAS if categorias is None or nombre in categorias]
+        partes = [self.familia(nombre) for nombre in nombres]
+        metricas = pd.concat(partes, ignore_index=True).reindex(columns=COLUMNAS_METRICAS)
+        # Mismo esquema que la lista de registros: columnas de texto object, subcategoria None
+        # donde no aplica y NaN en las columnas que una familia no tiene
+        texto = [columna for columna in COLUMNAS_METRICAS if columna != "valor"]
+        metricas[texto] = metricas[texto].astype(object)
+        metricas["subcategoria"] = metricas["subcategoria"].where(metricas["subcategoria"].notna(), None)
+        return metricas
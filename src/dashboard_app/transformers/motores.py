@@ -0,0 +1,196 @@
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from config import DATAFRAME_ENGINE
+
+# Motores de DataFrame para las consultas y métricas sobre las filas crudas (QueriesInscripciones y
+# MetricasInscritos). Todos reciben el DataFrame normalizado de la ingesta y devuelven lo mismo que
+# pandas, con los mismos tipos: las columnas de dimensión vuelven como categóricas y los conteos
+# como int64. Los empates de un conteo quedan en el orden de las categorías.
+
+
+class MotorPandas:
+    """Operaciones de pandas sobre el DataFrame (la implementación de referencia)"""
+    nombre = "pandas"
+
+    def filas(self, df: pd.DataFrame) -> int:
+        return len(df)
+
+    def distintos(self, df: pd.DataFrame, columna) -> int:
+        """Valores distintos y no nulos de una columna"""
+        return int(df[columna].nunique())
+
+    def conteo(self, df: pd.DataFrame, columna) -> pd.Series:
+        """Filas por valor de la columna, de mayor a menor y omitiendo los valores sin filas"""
+        conteos = df[columna].value_counts()
+        return conteos[conteos > 0]
+
+    def conteo_cruzado(self, df: pd.DataFrame, columnas) -> pd.Series:
+        """Filas por combinación observada de las columnas, ordenadas por sus categorías"""
+        return df.groupby(list(columnas), observed=True).size()
+
+    def valores(self, df: pd.DataFrame, columna):
+        """Valores distintos y no nulos de una columna, ordenados"""
+        return sorted(df[columna].dropna().unique().tolist())
+
+    def conteo_por_dia(self, df: pd.DataFrame, columna) -> pd.Series:
+        """Filas por día de una columna datetime64, indexadas por el día"""
+        return df.groupby(df[columna].dt.normalize()).size()
+
+
+class MotorNumpy(MotorPandas):
+    """Conteos con np.bincount sobre los códigos enteros de las columnas categóricas (y los
+    días de la fecha como enteros): una pasada por columna, sin tablas hash ni objetos Python"""
+    nombre = "numpy"
+
+    @staticmethod
+    def _codigos(serie: pd.Series):
+        """(códigos, categorías) de una columna; -1 marca los nulos"""
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            return np.asarray(serie.cat.codes), serie.cat.categories
+        return pd.factorize(serie, sort=True)
+
+    @staticmethod
+    def _etiquetas(serie: pd.Series, codigos, categorias):
+        """Valores de los códigos, con el mismo tipo de la columna"""
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            return pd.Categorical.from_codes(codigos, dtype=serie.dtype)
+        return categorias[codigos]
+
+    def _bincount(self, serie: pd.Series):
+        # Los códigos se desplazan en uno para contar los nulos aparte sin filtrarlos antes
+        codigos, categorias = self._codigos(serie)
+        return np.bincount(codigos.astype(np.intp) + 1, minlength=len(categorias) + 1)[1:], categorias
+
+    def distintos(self, df, columna):
+        conteos, _ = self._bincount(df[columna])
+        return int(np.count_nonzero(conteos))
+
+    def conteo(self, df, columna):
+        conteos, categorias = self._bincount(df[columna])
+        presentes = np.flatnonzero(conteos)
+        orden = presentes[np.argsort(-conteos[presentes], kind='stable')]
+        indice = pd.Index(self._etiquetas(df[columna], orden, categorias), name=columna)
+        return pd.Series(conteos[orden].astype('int64'), index=indice, name="count")
+
+    def conteo_cruzado(self, df, columnas):
+        # Cada combinación es un entero mixto de los códigos desplazados en uno (el 0 es el nulo);
+        # su orden es el de las categorías
+        combinado, tamano = 0, 1
+        categorias = []
+        for columna in columnas:
+            codigos, categorias_columna = self._codigos(df[columna])
+            categorias.append(categorias_columna)
+            combinado = combinado * (len(categorias_columna) + 1) + (codigos.astype(np.intp) + 1)
+            tamano *= len(categorias_columna) + 1
+        if tamano > max(len(df), 1 << 20):
+            # Demasiadas combinaciones posibles para un arreglo de conteos: se agrupa con pandas
+            return super().conteo_cruzado(df, columnas)
+        conteos = np.bincount(combinado, minlength=tamano)
+        presentes = np.flatnonzero(conteos)
+        digitos, resto = [], presentes
+        for categorias_columna in reversed(categorias):
+            resto, codigos = np.divmod(resto, len(categorias_columna) + 1)
+            digitos.append(codigos - 1)
+        validas = np.logical_and.reduce([codigos >= 0 for codigos in digitos])
+        presentes = presentes[validas]
+        niveles = [
+            self._etiquetas(df[columna], codigos[validas], categorias_columna)
+            for columna, codigos, categorias_columna in zip(columnas, reversed(digitos), categorias)
+        ]
+        indice = pd.MultiIndex.from_arrays(niveles, names=list(columnas))
+        return pd.Series(conteos[presentes].astype('int64'), index=indice)
+
+    def valores(self, df, columna):
+        conteos, categorias = self._bincount(df[columna])
+        return sorted(categorias[conteos > 0].tolist())
+
+    def conteo_por_dia(self, df, columna):
+        dias = df[columna].to_numpy(dtype='datetime64[D]').view('int64')
+        dias = dias[dias != np.iinfo('int64').min]  # NaT
+        if len(dias) == 0:
+            return super().conteo_por_dia(df, columna)
+        primero = dias.min()
+        conteos = np.bincount(dias - primero)
+        presentes = np.flatnonzero(conteos)
+        indice = pd.DatetimeIndex((presentes + primero).astype('datetime64[D]').astype('datetime64[ns]'), name=columna)
+        return pd.Series(conteos[presentes].astype('int64'), index=indice)
+
+
+class MotorPolars(MotorPandas):
+    """Agrupaciones en polars (multihilo y columnar). Las columnas se convierten una vez por
+    DataFrame y se guardan mientras ese DataFrame siga vivo; el motor es compartido entre los
+    hilos del servidor, así que las conversiones se hacen con un lock"""
+    nombre = "polars"
+
+    def __init__(self):
+        # Dependencia opcional: sin polars -> ImportError
+        import polars
+        self.pl = polars
+        self._tabla = (lambda: None, {})
+        self._lock = threading.Lock()
+
+    def _columnas(self, df, columnas):
+        with self._lock:
+            referencia, convertidas = self._tabla
+            if referencia() is not df:
+                referencia, convertidas = weakref.ref(df), {}
+                self._tabla = (referencia, convertidas)
+            for columna in columnas:
+                if columna not in convertidas:
+                    convertidas[columna] = self.pl.from_pandas(df[columna])
+            series = [convertidas[columna].alias(columna) for columna in columnas]
+        return self.pl.DataFrame(series)
+
+    @staticmethod
+    def _categorias(df, columna, valores):
+        if isinstance(df[columna].dtype, pd.CategoricalDtype):
+            return pd.Categorical(valores, dtype=df[columna].dtype)
+        return pd.Index(valores)
+
+    def _agrupar(self, df, columnas):
+        """Conteos por combinación no nula como Series de pandas indexada por las columnas"""
+        tabla = self._columnas(df, columnas).drop_nulls().group_by(columnas).len()
+        niveles = [self._categorias(df, columna, tabla[columna].cast(self.pl.String).to_list()) for columna in columnas]
+        return pd.Series(tabla["len"].to_numpy().astype('int64'), index=pd.MultiIndex.from_arrays(niveles, names=columnas))
+
+    def distintos(self, df, columna):
+        return self._columnas(df, [columna])[columna].drop_nulls().n_unique()
+
+    def conteo(self, df, columna):
+        agrupado = self._agrupar(df, [columna])
+        conteos = pd.Series(agrupado.to_numpy(), index=agrupado.index.get_level_values(0), name="count").sort_index()
+        return conteos.iloc[np.argsort(-conteos.to_numpy(), kind='stable')]
+
+    def conteo_cruzado(self, df, columnas):
+        return self._agrupar(df, list(columnas)).sort_index()
+
+    def valores(self, df, columna):
+        return sorted(self._columnas(df, [columna])[columna].drop_nulls().unique().cast(self.pl.String).to_list())
+
+    def conteo_por_dia(self, df, columna):
+        dias = self._columnas(df, [columna])[columna].dt.truncate("1d").drop_nulls()
+        tabla = dias.to_frame().group_by(columna).len().sort(columna)
+        indice = pd.DatetimeIndex(tabla[columna].to_numpy().astype('datetime64[ns]'), name=columna)
+        return pd.Series(tabla["len"].to_numpy().astype('int64'), index=indice)
+
+
+MOTORES = {"pandas": MotorPandas, "numpy": MotorNumpy, "polars": MotorPolars}
+
+_motores = {}
+_motores_lock = threading.Lock()
+
+
+def obtener_motor(nombre=None):
+    """Motor por nombre ("pandas", "numpy" o "polars"), o el de DATAFRAME_ENGINE si no se indica,
+    creado una sola vez; si falta su dependencia opcional se usa pandas"""
+    nombre = nombre or DATAFRAME_ENGINE
+    with _motores_lock:
+        if nombre not in _motores:
+            try:
+                _motores[nombre] = MOTORES[nombre]()
+            except ImportError as e:
+                print(f"Motor de DataFrame '{nombre}' no disponible ({str(e)}); se usa pandas")
+                _motores[nombre] = MotorPandas()
+        return _motores[nombre]
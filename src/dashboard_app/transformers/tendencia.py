@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+# Resoluciones de la tendencia, de la más fina a la más gruesa
+RESOLUCIONES = ["D", "W", "M"]
+
+
+def series_tendencia(diaria: pd.Series) -> dict:
+    """Inscritos por día, por semana (desde el lunes) y por mes a partir del conteo diario,
+    indexado por fecha y ordenado. La serie diaria conserva solo los días con inscritos"""
+    if diaria.empty:
+        return {resolucion: diaria for resolucion in RESOLUCIONES}
+    return {
+        "D": diaria,
+        "W": diaria.resample("W-MON", label="left", closed="left").sum(),
+        "M": diaria.resample("MS").sum()
+    }
+
+
+def lttb(x: np.ndarray, y: np.ndarray, puntos: int) -> np.ndarray:
+    """Posiciones de los `puntos` elegidos con Largest-Triangle-Three-Buckets: conserva el
+    primero, el último y, en cada tramo, el que forma el triángulo de mayor área con el
+    elegido del tramo anterior y el promedio del siguiente"""
+    n = len(x)
+    if puntos >= n or puntos < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    limites = np.linspace(1, n - 1, puntos - 1).astype(int)
+    elegidos = np.empty(puntos, dtype=int)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    anterior = 0
+    for i in range(puntos - 2):
+        inicio, fin = limites[i], limites[i + 1]
+        siguiente = slice(fin, limites[i + 2]) if i + 2 < len(limites) else slice(n - 1, n)
+        x_medio, y_medio = x[siguiente].mean(), y[siguiente].mean()
+        areas = np.abs(
+            (x[anterior] - x_medio) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (y_medio - y[anterior])
+        )
+        anterior = inicio + int(areas.argmax())
+        elegidos[i + 1] = anterior
+    return elegidos
+
+
+def elegir_tendencia(series: dict, resolucion: str = "auto", max_puntos: int = None) -> pd.Series:
+    """Serie que se dibuja. En "auto" es la resolución más fina que no supera `max_puntos`;
+    si la serie elegida los supera igualmente, se reduce con LTTB"""
+    if resolucion == "auto":
+        resolucion = next(
+            (r for r in RESOLUCIONES if max_puntos is None or len(series[r]) <= max_puntos),
+            RESOLUCIONES[-1]
+        )
+    serie = series[resolucion]
+    if max_puntos is not None and len(serie) > max_puntos:
+        serie = serie.iloc[lttb(serie.index.asi8, serie.to_numpy(), max_puntos)]
+    return serie
@@ -0,0 +1,8 @@
+from app_factory import create_app
+
+# Punto de entrada para servidores WSGI con varios workers, por ejemplo:
+#   python loader.py &
+#   gunicorn --workers 4 wsgi:server
+# Cada worker mapea en memoria el caché que publica loader.py en lugar de procesar el Excel.
+app, data = create_app(worker=True)
+server = app.server